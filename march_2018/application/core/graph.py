@@ -4,19 +4,67 @@ from datetime import datetime, timedelta
 import numpy
 import pandas
 import peakutils
-from scipy.misc import derivative
-import scipy.integrate as integrate
-from scipy.interpolate import interp1d
 from scipy.signal import argrelextrema
 from scipy.signal import find_peaks_cwt
 from matplotlib import pyplot
 import matplotlib.dates as mdates
 from matplotlib.finance import candlestick_ohlc
 
+from core.trend import get_trend
 from core.signals import TrendSignals, ExtremaSignals
 from external.peakdetect import peakdetect
 
 
+class LazyFrames(dict):
+    """Фреймы, которые строятся при первом обращении по имени."""
+
+    def __init__(self, build):
+        super().__init__()
+        self.build = build
+
+    def __missing__(self, frame_name):
+        frame = self.build(frame_name)
+        self[frame_name] = frame
+        return frame
+
+
+class FrameView:
+    """
+    Окно фрейма без копирования: срез общего фрейма по позициям
+    и отдельная таблица производных колонок этого окна.
+    Исходный фрейм не меняется, окна разной длины делят его данные.
+    """
+
+    def __init__(self, frame, start=0):
+        self.frame = frame.iloc[start:]
+        self.columns = {}
+
+    @property
+    def index(self):
+        return self.frame.index
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, column):
+        return column in self.columns or column in self.frame
+
+    def __getitem__(self, column):
+        if column in self.columns:
+            return self.columns[column]
+        return self.frame[column]
+
+    def __setitem__(self, column, values):
+        if not isinstance(values, pandas.Series):
+            values = pandas.Series(values, index=self.index)
+        self.columns[column] = values
+
+    def to_frame(self):
+        """Собрать окно и его колонки в обычный DataFrame (копия)."""
+        columns = pandas.DataFrame(self.columns, index=self.index)
+        return pandas.concat([self.frame, columns], axis=1)
+
+
 class BaseGraph:
     def __init__(self):
         self.frames = {}
@@ -38,39 +86,18 @@ class BaseGraph:
     @staticmethod
     def crop(frame, days_count):
         border = datetime.now() - timedelta(days=days_count)
-        return frame.loc[border:].copy()
+        return FrameView(frame, frame.index.searchsorted(border))
 
     # --- Analyze --- #
 
     @staticmethod
     def analyze_trend(frame, column):
-        y = frame[column]
-        x = range(len(y))
-        f = interp1d(x, y, bounds_error=False)
-
-        x_fake = numpy.arange(0.0, len(x), 1.0)
-        dfdx = derivative(f, x_fake, dx=1e-6)
-        dfdx[0] = dfdx[1]
-        dfdx[-1] = dfdx[-2]
-
-        dfdx_pos = []
-        dfdx_neg = []
-        for value in dfdx:
-            if value > 0:
-                dfdx_pos.append(value)
-                dfdx_neg.append(0)
-            elif value < 0:
-                dfdx_pos.append(0)
-                dfdx_neg.append(abs(value))
-            else:
-                dfdx_pos.append(0)
-                dfdx_neg.append(0)
-
-        f_dfdx_pos = interp1d(x, dfdx_pos, bounds_error=False)
-        f_dfdx_neg = interp1d(x, dfdx_neg, bounds_error=False)
-
-        s_dfdx_pos, error = integrate.quad(f_dfdx_pos, x[0], x[-1])
-        s_dfdx_neg, error = integrate.quad(f_dfdx_neg, x[0], x[-1])
+        trend = get_trend(frame[column].values)
+        dfdx = trend['dfdx']
+        dfdx_pos = trend['dfdx_pos']
+        dfdx_neg = trend['dfdx_neg']
+        s_dfdx_pos = trend['s_dfdx_pos']
+        s_dfdx_neg = trend['s_dfdx_neg']
 
         frame[f'{column}_dfdx'] = dfdx
         frame[f'{column}_dfdx_pos'] = dfdx_pos
@@ -0,0 +1,94 @@
+import os
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+import pandas
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def lttb(x, y, threshold):
+    """
+    Индексы threshold точек ряда по Largest-Triangle-Three-Buckets:
+    первая и последняя точки, а из каждой из threshold - 2 корзин —
+    точка, дающая наибольший треугольник с точкой, выбранной
+    в прошлой корзине, и средним следующей корзины.
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return numpy.arange(length)
+
+    every = (length - 2) / (threshold - 2)
+    edges = numpy.concatenate([
+        (numpy.arange(threshold - 1) * every).astype(numpy.int64) + 1,
+        [length],
+    ])
+    indexes = numpy.empty(threshold, dtype=numpy.int64)
+    indexes[0], indexes[-1] = 0, length - 1
+
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end, next_end = edges[bucket:bucket + 3]
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        areas = numpy.abs(
+            (x[selected] - average_x) * (y[start:end] - y[selected]) -
+            (x[selected] - x[start:end]) * (average_y - y[selected])
+        )
+        selected = start + int(numpy.argmax(areas))
+        indexes[bucket + 1] = selected
+    return indexes
+
+
+def downsample(series, threshold):
+    """Ряд с DatetimeIndex, прореженный lttb; пропуски отбрасываются."""
+    series = series.dropna()
+    x = series.index.values.astype('datetime64[s]').astype(numpy.float64)
+    indexes = lttb(x, series.values.astype(numpy.float64), threshold)
+    return series.iloc[indexes]
+
+
+def render_frame(frame, path, columns=('price',), title=None,
+                 size=(10, 3), dpi=100):
+    """
+    Нарисовать колонки фрейма (по графику на колонку) в файл path
+    без окна: Agg, формат по расширению (png, svg). Каждая колонка
+    прорежена до двух точек на пиксель ширины.
+    """
+    figure = Figure(figsize=(size[0], size[1] * len(columns)), dpi=dpi)
+    FigureCanvasAgg(figure)
+    threshold = 2 * int(size[0] * dpi)
+
+    for number, column in enumerate(columns, start=1):
+        axis = figure.add_subplot(len(columns), 1, number)
+        series = downsample(frame[column], threshold)
+        axis.plot(series.index.to_pydatetime(), series.values)
+        axis.set_title(f'{title}: {column}' if title else column)
+    figure.autofmt_xdate()
+    figure.savefig(path)
+    return path
+
+
+def render_pickle(pickle, path, **kwargs):
+    return render_frame(pandas.read_pickle(pickle), path, **kwargs)
+
+
+def render_items(items, directory, extension='png', workers=None, **kwargs):
+    """
+    Нарисовать графики предметов в процессах пула.
+    items — пары (название, фрейм или путь к pickle фрейма).
+    Вернуть пути файлов в порядке items.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for name, frame in items:
+            path = os.path.join(
+                directory, f'{quote(name, safe="")}.{extension}'
+            )
+            render = render_pickle if isinstance(frame, str) else render_frame
+            futures.append(executor.submit(
+                render, frame, path, title=name, **kwargs
+            ))
+        return [future.result() for future in futures]
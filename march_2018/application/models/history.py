@@ -6,10 +6,14 @@ import pandas
 import sqlalchemy as orm
 from sqlalchemy.orm import relationship
 
-from steam.utils import get_text_between
+from steam.parsing import parse_price_history
 from models.utils import get_trend, get_extremas
 from core.database import transaction, BaseModel
-from core.graph import BaseGraph
+from core.graph import BaseGraph, FrameView, LazyFrames
+
+
+# Окна, которые обрезают историю до последних дней
+WINDOWS = {'month': 31, 'week': 7}
 
 
 class History(BaseModel, BaseGraph):
@@ -27,13 +31,10 @@ class History(BaseModel, BaseGraph):
         self.screen_id = screen_id
 
         self.data = self.parse_response_to_data(response_text)
-        self.frames = {'original': self.parse_data_to_frame(self.data)}
-        self.frames['daily'] = self.get_daily_frame()
-        self.frames['month'] = self.get_month_frame()
-        self.frames['week'] = self.get_week_frame()
+        self.frames = LazyFrames(self.get_frame)
 
-        self.statistics = {key: {} for key in ['daily', 'month', 'week']}
-        self.shortcuts = {key: {} for key in ['daily', 'month', 'week']}
+        self.statistics = {}
+        self.shortcuts = {}
         self.created_at = datetime.now()
 
     @property
@@ -49,15 +50,12 @@ class History(BaseModel, BaseGraph):
     @staticmethod
     def parse_response_to_data(response_text):
         # TODO: try/except
-        history = eval(get_text_between(response_text, 'var line1=', ';'))
-        #
-        pattern = '%b %d %Y %H: +0'
-        data = {'date': [], 'price': [], 'count': []}
-        for date, price, count in history:
-            timestamp = datetime.strptime(date, pattern).timestamp()
-            data['date'].append(timestamp)
-            data['price'].append(price)
-            data['count'].append(int(count))
+        dates, prices, counts = parse_price_history(response_text)
+        data = {
+            'date': dates.tolist(),
+            'price': prices.tolist(),
+            'count': counts.tolist(),
+        }
         return data
 
     @staticmethod
@@ -68,19 +66,48 @@ class History(BaseModel, BaseGraph):
         frame = pandas.DataFrame(data_copy, index=index)
         return frame
 
-    def get_daily_frame(self):
-        return self.frames['original'].resample('D').mean()
+    def get_frame(self, frame_name):
+        """
+        Построить фрейм по имени: original, daily, month, week
+        или произвольное окно вида 14d (последние 14 дней).
+        """
+        if frame_name == 'original':
+            return self.parse_data_to_frame(self.data)
+        if frame_name == 'daily':
+            return self.get_daily_frame()
+        return self.get_window_frame(self.get_days_count(frame_name))
 
-    def get_month_frame(self):
-        return self.crop(self.frames['original'], days_count=31)
+    @staticmethod
+    def get_days_count(frame_name):
+        if frame_name in WINDOWS:
+            return WINDOWS[frame_name]
+        if frame_name.endswith('d') and frame_name[:-1].isdigit():
+            return int(frame_name[:-1])
+        raise KeyError(frame_name)
 
-    def get_week_frame(self):
-        return self.crop(self.frames['original'], days_count=7)
+    def get_daily_frame(self):
+        return FrameView(self.frames['original'].resample('D').mean())
+
+    def get_window_frame(self, days_count):
+        return self.crop(self.frames['original'], days_count=days_count)
+
+    def get_view(self, frame_name):
+        """
+        Фрейм и его статистика. Анализируется только запрошенный фрейм
+        и только при первом обращении.
+        """
+        if frame_name not in self.statistics:
+            analyze = getattr(self, f'analyze_{frame_name}_frame', None)
+            if analyze:
+                analyze()
+            else:
+                self.analyze_window_frame(frame_name)
+        return self.frames[frame_name], self.statistics[frame_name]
 
     def analyze_daily_frame(self):
         frame_name = 'daily'
-        frame = self.frames[frame_name].copy()
-        statistics = self.statistics[frame_name].copy()
+        frame = self.frames[frame_name]
+        statistics = {}
 
         frame, stats = self.analyze_mean(frame, 'price', '168h')
         statistics.update(stats)
@@ -89,15 +116,14 @@ class History(BaseModel, BaseGraph):
         frame, stats = self.analyze_trend(frame, 'price_mean_168h')
         statistics.update(stats)
 
-        self.frames[frame_name] = frame
-        self.statistics[frame_name].update(statistics)
+        self.statistics[frame_name] = statistics
         trend = self.statistics[frame_name]['price_mean_168h_trend']
-        self.shortcuts[frame_name]['trend'] = trend
+        self.shortcuts[frame_name] = {'trend': trend}
 
     def analyze_month_frame(self):
         frame_name = 'month'
-        frame = self.frames[frame_name].copy()
-        statistics = self.statistics[frame_name].copy()
+        frame = self.frames[frame_name]
+        statistics = {}
 
         frame, stats = self.analyze_mean(frame, 'price', '168h')
         statistics.update(stats)
@@ -116,15 +142,16 @@ class History(BaseModel, BaseGraph):
         frame, stats = self.analyze_deviation(frame, 'price', '24h')
         statistics.update(stats)
 
-        self.frames[frame_name] = frame
-        self.statistics[frame_name].update(statistics)
+        self.statistics[frame_name] = statistics
         trend = self.statistics[frame_name]['price_mean_168h_trend']
-        self.shortcuts[frame_name]['trend'] = trend
+        self.shortcuts[frame_name] = {'trend': trend}
 
     def analyze_week_frame(self):
-        frame_name = 'week'
-        frame = self.frames[frame_name].copy()
-        statistics = self.statistics[frame_name].copy()
+        self.analyze_window_frame('week')
+
+    def analyze_window_frame(self, frame_name):
+        frame = self.frames[frame_name]
+        statistics = {}
 
         frame, stats = self.analyze_mean(frame, 'price', '168h')
         statistics.update(stats)
@@ -133,17 +160,15 @@ class History(BaseModel, BaseGraph):
         frame, stats = self.analyze_trend(frame, 'price_mean_168h')
         statistics.update(stats)
 
-        self.frames[frame_name] = frame
-        self.statistics[frame_name].update(statistics)
+        self.statistics[frame_name] = statistics
         trend = self.statistics[frame_name]['price_mean_168h_trend']
-        self.shortcuts[frame_name]['trend'] = trend
+        self.shortcuts[frame_name] = {'trend': trend}
 
     def analyze(self):
-        self.analyze_daily_frame()
-        self.analyze_month_frame()
-        self.analyze_week_frame()
+        for frame_name in ('daily', 'month', 'week'):
+            self.get_view(frame_name)
 
-        self.days_count = self.frames['daily'].shape[0]
+        self.days_count = len(self.frames['daily'])
 
         self.daily_trend = self.shortcuts['daily']['trend']
         self.month_trend = self.shortcuts['month']['trend']
@@ -56,8 +56,8 @@ class Screen(BaseModel):
         self.session.add(history)
         self.session.commit()
 
-        history.analyze()
-        history.frame = history.frames['daily']
+        frame, statistics = history.get_view('daily')
+        history.frame = frame.to_frame()
         history.dump()
         input()
 
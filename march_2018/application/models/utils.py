@@ -3,52 +3,18 @@ from datetime import datetime, timedelta
 
 import numpy
 import pandas
-from scipy.misc import derivative
-import scipy.integrate as integrate
-from scipy.interpolate import interp1d
 from scipy.signal import argrelextrema
 from matplotlib import pyplot
 import matplotlib.dates as mdates
 from matplotlib.finance import candlestick_ohlc
 
+from core.trend import get_trend as calculate_trend
 
-def get_trend(y):
-    x = range(len(y))
-    f = interp1d(x, y, bounds_error=False)
-
-    x_fake = numpy.arange(0.0, len(x), 1.0)
-    dfdx = derivative(f, x_fake, dx=1e-6)
-    dfdx[0] = dfdx[1]
-    dfdx[-1] = dfdx[-2]
-
-    dfdx_pos = []
-    dfdx_neg = []
-    for value in dfdx:
-        if value > 0:
-            dfdx_pos.append(value)
-            dfdx_neg.append(0)
-        elif value < 0:
-            dfdx_pos.append(0)
-            dfdx_neg.append(abs(value))
-        else:
-            dfdx_pos.append(0)
-            dfdx_neg.append(0)
-
-    f_dfdx_pos = interp1d(x, dfdx_pos, bounds_error=False)
-    f_dfdx_neg = interp1d(x, dfdx_neg, bounds_error=False)
-
-    s_dfdx_pos, error = integrate.quad(f_dfdx_pos, x[0], x[-1])
-    s_dfdx_neg, error = integrate.quad(f_dfdx_neg, x[0], x[-1])
 
-    result = {
-        'dfdx': dfdx,
-        'dfdx_pos': dfdx_pos,
-        'dfdx_neg': dfdx_neg,
-        's_dfdx_pos': s_dfdx_pos,
-        's_dfdx_neg': s_dfdx_neg,
-        's_dfdx_diff': None,
-        'direction': None,
-    }
+def get_trend(y):
+    result = calculate_trend(y)
+    s_dfdx_pos = result['s_dfdx_pos']
+    s_dfdx_neg = result['s_dfdx_neg']
     if s_dfdx_pos > s_dfdx_neg:
         result['s_dfdx_diff'] = s_dfdx_pos - s_dfdx_neg
         result['direction'] = 1
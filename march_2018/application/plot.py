@@ -1,8 +1,12 @@
+import os
+import argparse
+
 from matplotlib import pyplot
 import matplotlib.dates as mdates
 from matplotlib.finance import candlestick_ohlc
 
 from core.graph import BaseGraph
+from core.rendering import render_items
 
 
 class History(BaseGraph):
@@ -45,6 +49,25 @@ class History(BaseGraph):
 
 
 if __name__ == '__main__':
-    g = History()
-    g.load()
-    g.plot()
+    parser = argparse.ArgumentParser(description='')
+    parser.add_argument('pickles', nargs='*')
+    parser.add_argument('--output', help='directory for headless charts')
+    parser.add_argument('--format', default='png', choices=('png', 'svg'))
+    parser.add_argument('--workers', type=int)
+    namespace = parser.parse_args()
+
+    if namespace.output:
+        pickles = namespace.pickles or [BaseGraph().pickle]
+        items = [
+            (os.path.splitext(os.path.basename(pickle))[0], pickle)
+            for pickle in pickles
+        ]
+        paths = render_items(
+            items, namespace.output, namespace.format, namespace.workers
+        )
+        for path in paths:
+            print(path)
+    else:
+        g = History()
+        g.load()
+        g.plot()
@@ -0,0 +1,216 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from steam.market import SteamMarket
+from steam.utils import async_login_required
+from steam.scheduling import (
+    PRIORITY_ORDER, PRIORITY_DEFAULT, scheduler, get_endpoint
+)
+from steam.throttling import throttle, is_error_status
+from steam.caching import TTLS, Response, cache
+from steam.coalescing import flights
+
+
+class AsyncSteamMarket(SteamMarket):
+    """
+    SteamMarket поверх AsyncSteamAPI: те же методы и payload,
+    но каждый возвращает корутину.
+    """
+
+    async def is_logged_in(self):
+        return await self.api.is_logged_in()
+
+    # Заявки собираются теми же методами SteamMarket, вход проверяется
+    # корутиной
+    create_sell_order = async_login_required(
+        SteamMarket.create_sell_order.__wrapped__
+    )
+    create_buy_order = async_login_required(
+        SteamMarket.create_buy_order.__wrapped__
+    )
+    cancel_sell_order = async_login_required(
+        SteamMarket.cancel_sell_order.__wrapped__
+    )
+    cancel_buy_order = async_login_required(
+        SteamMarket.cancel_buy_order.__wrapped__
+    )
+
+
+class AsyncSteamAPI:
+    """
+    SteamAPI на asyncio: запросы идут через один пул соединений aiohttp,
+    а одновременных запросов к одному хосту не больше
+    concurrency_per_host. Вход в аккаунт остаётся за SteamAPI: его куки
+    можно передать в cookies.
+    """
+
+    def __init__(self, api_key=None, credentials=None,
+                 base_url='https://steamcommunity.com', cookies=None,
+                 concurrency_per_host=16, connections_count=256,
+                 request_scheduler=None, request_throttle=None, timeout=30,
+                 response_cache=None, single_flight=None):
+        self.market = AsyncSteamMarket(self)
+        self.base_url = base_url
+
+        self.api_key = api_key
+        self.credentials = credentials
+        self.cookies = cookies or {}
+
+        self.concurrency_per_host = concurrency_per_host
+        self.connections_count = connections_count
+        self.semaphores = {}
+        self.session = None
+        self.scheduler = request_scheduler or scheduler
+        self.throttle = request_throttle or throttle
+        self.cache = response_cache or cache
+        self.flights = single_flight or flights
+        self.timeout = timeout
+
+    @classmethod
+    def from_api(cls, api, **kwargs):
+        """Клиент с ключом и куками сессии синхронного SteamAPI."""
+        return cls(api.api_key, api.credentials,
+                   base_url=api.base_url,
+                   cookies=api.session.cookies.get_dict(), **kwargs)
+
+    @property
+    def session_id(self):
+        return self.cookies['sessionid']
+
+    def get_session(self):
+        # Сессия создаётся внутри цикла событий, на котором работает
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.connections_count)
+            self.session = aiohttp.ClientSession(
+                connector=connector, cookies=self.cookies
+            )
+        return self.session
+
+    def get_semaphore(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self.semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency_per_host)
+            self.semaphores[host] = semaphore
+        return semaphore
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exception):
+        await self.close()
+
+    async def is_logged_in(self):
+        response = await self.get('/')
+        return self.credentials['username'] in response.text
+
+    # --- API request helpers --- #
+
+    async def get(self, api_method, query_params=None, headers=None,
+                  priority=None):
+        url = self.base_url + api_method
+        return await self.request('get', url, query_params, headers, priority)
+
+    async def post(self, api_method, data=None, headers=None, priority=None):
+        url = self.base_url + api_method
+        return await self.request('post', url, data, headers, priority)
+
+    async def request(self, http_method, url, payload=None, headers=None,
+                      priority=None):
+        # requests пропускает None и приводит значения к строкам сам
+        if payload is not None:
+            payload = {
+                key: value if isinstance(value, (str, bytes)) else str(value)
+                for key, value in payload.items() if value is not None
+            }
+        if http_method == 'get':
+            options = {'params': payload}
+        elif http_method == 'post':
+            options = {'data': payload}
+        else:
+            raise AttributeError(f'Unsupported HTTP method {http_method}')
+        # Одинаковые GET публичных методов рынка, идущие одновременно,
+        # получают один ответ. Страницы аккаунта у каждой сессии свои
+        if get_endpoint(http_method, url) not in TTLS:
+            return await self._send(
+                http_method, url, payload, headers, options, priority
+            )
+        key = self.cache.make_key(url, payload)
+        return await self.flights.do_async(
+            key, self._send, http_method, url, payload, headers, options,
+            priority
+        )
+
+    async def _send(self, http_method, url, payload, headers, options,
+                    priority):
+        if priority is None:
+            priority = PRIORITY_ORDER if http_method == 'post' \
+                else PRIORITY_DEFAULT
+        endpoint = get_endpoint(http_method, url)
+        if not self.cache.is_cached(http_method, endpoint):
+            return await self._perform(
+                endpoint, http_method, url, headers, options, priority
+            )
+        key = self.cache.make_key(url, payload)
+        response, validators = self.cache.get(endpoint, key)
+        if response is not None:
+            return response
+        response = await self._perform(
+            endpoint, http_method, url, dict(headers or {}, **validators),
+            options, priority
+        )
+        response = self.cache.update(endpoint, key, response)
+        if response.status_code == 304:
+            # Сохранённый ответ вытеснен, пока шла проверка: без него
+            # 304 без тела бесполезен, запрашиваем ответ целиком
+            response = await self._perform(
+                endpoint, http_method, url, headers, options, priority
+            )
+            response = self.cache.update(endpoint, key, response)
+        return response
+
+    async def _perform(self, endpoint, http_method, url, headers, options,
+                       priority):
+        self.throttle.check(endpoint)
+        await self.scheduler.acquire_async(endpoint, priority)
+
+        started_at = await self.throttle.acquire_async(endpoint)
+        # None — результата нет, например запрос отменил вызывающий
+        failed = None
+        try:
+            response = await asyncio.wait_for(
+                self._fetch(http_method, url, headers, options), self.timeout
+            )
+            failed = is_error_status(response.status_code)
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            failed = True
+            raise
+        finally:
+            self.throttle.release(endpoint, started_at, failed)
+        return response
+
+    async def _fetch(self, http_method, url, headers, options):
+        async with self.get_semaphore(url):
+            async with self.get_session().request(
+                http_method.upper(), url, headers=headers, **options
+            ) as response:
+                text = await response.text()
+                return Response(
+                    str(response.url), response.status,
+                    dict(response.headers), text
+                )
+
+    def get_statistics(self):
+        return {
+            'scheduler': self.scheduler.get_statistics(),
+            'throttle': self.throttle.get_statistics(),
+            'cache': self.cache.get_statistics(),
+            'coalescing': self.flights.get_statistics(),
+        }
@@ -7,10 +7,18 @@ import requests
 from steam.market import SteamMarket
 from steam.utils import login_required
 from steam.guard import generate_one_time_code
+from steam.scheduling import (
+    PRIORITY_ORDER, PRIORITY_DEFAULT, scheduler, get_endpoint
+)
+from steam.throttling import throttle, is_error_status
+from steam.caching import TTLS, cache
+from steam.coalescing import flights
 
 
 class SteamAPI:
-    def __init__(self, api_key, credentials):
+    def __init__(self, api_key, credentials, request_scheduler=None,
+                 request_throttle=None, timeout=30, response_cache=None,
+                 single_flight=None):
         self.market = SteamMarket(self)
         self.base_url = 'https://steamcommunity.com'
 
@@ -19,6 +27,11 @@ class SteamAPI:
         self.guard = credentials['guard']
 
         self.session = requests.Session()
+        self.scheduler = request_scheduler or scheduler
+        self.throttle = request_throttle or throttle
+        self.cache = response_cache or cache
+        self.flights = single_flight or flights
+        self.timeout = timeout
         self.one_time_code_created_at = None
 
     @property
@@ -139,23 +152,87 @@ class SteamAPI:
 
     # --- API request helpers --- #
 
-    def get(self, api_method, query_params=None, headers=None):
+    def get(self, api_method, query_params=None, headers=None, priority=None):
         url = self.base_url + api_method
-        return self.request('get', url, query_params, headers)
+        return self.request('get', url, query_params, headers, priority)
 
-    def post(self, api_method, data=None, headers=None):
+    def post(self, api_method, data=None, headers=None, priority=None):
         url = self.base_url + api_method
-        return self.request('post', url, data, headers)
-
-    def request(self, http_method, url, payload=None, headers=None):
-        if http_method == 'get':
-            response = self.session.get(url, params=payload, headers=headers)
-        elif http_method == 'post':
-            response = self.session.post(url, data=payload, headers=headers)
-        else:
+        return self.request('post', url, data, headers, priority)
+
+    def request(self, http_method, url, payload=None, headers=None,
+                priority=None):
+        if http_method not in ('get', 'post'):
             raise AttributeError(f'Unsupported HTTP method {http_method}')
+        # Одинаковые GET публичных методов рынка, идущие одновременно,
+        # получают один ответ. Страницы аккаунта у каждой сессии свои
+        if get_endpoint(http_method, url) not in TTLS:
+            return self._send(http_method, url, payload, headers, priority)
+        key = self.cache.make_key(url, payload)
+        return self.flights.do(
+            key, self._send, http_method, url, payload, headers, priority
+        )
+
+    def _send(self, http_method, url, payload, headers, priority):
+        if priority is None:
+            priority = PRIORITY_ORDER if http_method == 'post' \
+                else PRIORITY_DEFAULT
+        endpoint = get_endpoint(http_method, url)
+        if not self.cache.is_cached(http_method, endpoint):
+            return self._perform(
+                endpoint, http_method, url, payload, headers, priority
+            )
+        key = self.cache.make_key(url, payload)
+        response, validators = self.cache.get(endpoint, key)
+        if response is not None:
+            return response
+        response = self._perform(
+            endpoint, http_method, url, payload,
+            dict(headers or {}, **validators), priority
+        )
+        response = self.cache.update(endpoint, key, response)
+        if response.status_code == 304:
+            # Сохранённый ответ вытеснен, пока шла проверка: без него
+            # 304 без тела бесполезен, запрашиваем ответ целиком
+            response = self._perform(
+                endpoint, http_method, url, payload, headers, priority
+            )
+            response = self.cache.update(endpoint, key, response)
         return response
 
+    def _perform(self, endpoint, http_method, url, payload, headers,
+                 priority):
+        self.throttle.check(endpoint)
+        self.scheduler.acquire(endpoint, priority)
+
+        started_at = self.throttle.acquire(endpoint)
+        # None — результата нет: запрос упал не из-за Steam
+        failed = None
+        try:
+            if http_method == 'get':
+                response = self.session.get(
+                    url, params=payload, headers=headers, timeout=self.timeout
+                )
+            elif http_method == 'post':
+                response = self.session.post(
+                    url, data=payload, headers=headers, timeout=self.timeout
+                )
+            failed = is_error_status(response.status_code)
+        except (requests.Timeout, requests.ConnectionError):
+            failed = True
+            raise
+        finally:
+            self.throttle.release(endpoint, started_at, failed)
+        return response
+
+    def get_statistics(self):
+        return {
+            'scheduler': self.scheduler.get_statistics(),
+            'throttle': self.throttle.get_statistics(),
+            'cache': self.cache.get_statistics(),
+            'coalescing': self.flights.get_statistics(),
+        }
+
     # --- API Methods --- #
 
     @login_required
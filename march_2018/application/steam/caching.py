@@ -0,0 +1,259 @@
+import os
+import json
+import time
+from hashlib import sha1
+from threading import Lock, get_ident
+from collections import OrderedDict
+
+
+# Сколько секунд ответ метода считается свежим; остальные не кэшируются.
+# История на странице предмета меняется раз в час
+TTLS = {
+    'listings': 60 * 60,
+    'overview': 60,
+    'histogram': 10,
+}
+
+
+class Response:
+    """Прочитанный ответ с интерфейсом requests.Response."""
+
+    def __init__(self, url, status_code, headers, text):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    @classmethod
+    def from_response(cls, response):
+        """Прочитанная копия ответа requests или aiohttp."""
+        if isinstance(response, cls):
+            return response
+        return cls(
+            str(response.url), response.status_code,
+            dict(response.headers), response.text
+        )
+
+    def as_dict(self):
+        return {
+            'url': self.url,
+            'status_code': self.status_code,
+            'headers': dict(self.headers),
+            'text': self.text,
+        }
+
+
+class Entry:
+    def __init__(self, response, stored_at):
+        self.response = response
+        self.stored_at = stored_at
+
+    @property
+    def validators(self):
+        """Заголовки для условного запроса, если Steam их прислал."""
+        received = {
+            name.lower(): value
+            for name, value in self.response.headers.items()
+        }
+        headers = {}
+        etag = received.get('etag')
+        if etag:
+            headers['If-None-Match'] = etag
+        last_modified = received.get('last-modified')
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def as_dict(self):
+        return {
+            'response': self.response.as_dict(),
+            'stored_at': self.stored_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(Response(**data['response']), data['stored_at'])
+
+
+class EndpointStatistics:
+    def __init__(self):
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def as_dict(self):
+        requests_count = self.hits + self.revalidations + self.misses
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses,
+            'hit_ratio': self.hits / requests_count if requests_count else 0,
+            # Ответы без загрузки тела: свежие и подтверждённые 304
+            'saved_ratio': (self.hits + self.revalidations) / requests_count
+            if requests_count else 0,
+        }
+
+
+class ResponseCache:
+    """
+    Кэш GET-ответов Steam по URL и параметрам со сроком жизни на метод
+    (TTLS). Устаревший ответ с ETag или Last-Modified проверяется
+    условным запросом: на 304 он снова считается свежим. Если задан
+    path, ответы лежат ещё и в файлах этой папки и переживают
+    перезапуск. В памяти и в папке хранится не больше max_size
+    ответов: давно не использованные вытесняются. Ответы кэшируемых
+    методов всегда Response, из кэша они или из сети.
+    """
+
+    def __init__(self, ttls=None, path=None, max_size=4096):
+        self.ttls = TTLS if ttls is None else ttls
+        self.path = path
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.statistics = {
+            endpoint: EndpointStatistics() for endpoint in self.ttls
+        }
+        self.lock = Lock()
+        # Файлы ответов от давно не использованных к недавним
+        self.files = OrderedDict()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.load_files()
+
+    def load_files(self):
+        # Файлы прошлых запусков идут в очередь по времени изменения
+        paths = [
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.endswith('.json')
+        ]
+        paths.sort(key=lambda path: os.stat(path).st_mtime)
+        with self.lock:
+            for path in paths:
+                self.files[path] = None
+            self.trim_files()
+
+    def use_file(self, path):
+        with self.lock:
+            self.files[path] = None
+            self.files.move_to_end(path)
+            self.trim_files()
+
+    def trim_files(self):
+        while len(self.files) > self.max_size:
+            path, _ = self.files.popitem(last=False)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def is_cached(self, http_method, endpoint):
+        return http_method == 'get' and endpoint in self.ttls
+
+    @staticmethod
+    def make_key(url, payload=None):
+        parameters = sorted(
+            (str(key), str(value)) for key, value in (payload or {}).items()
+            if value is not None
+        )
+        return json.dumps([url, parameters])
+
+    def get_file_path(self, key):
+        name = sha1(key.encode()).hexdigest()
+        return os.path.join(self.path, f'{name}.json')
+
+    def get_entry(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+        if not self.path:
+            return None
+        path = self.get_file_path(key)
+        try:
+            with open(path) as file:
+                entry = Entry.from_dict(json.load(file))
+        except (OSError, ValueError, KeyError):
+            return None
+        self.use_file(path)
+        self.remember(key, entry)
+        return entry
+
+    def remember(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, endpoint, key, now=None):
+        """
+        Свежий ответ или None. Вторым значением — заголовки условного
+        запроса для устаревшего ответа.
+        """
+        now = time.time() if now is None else now
+        entry = self.get_entry(key)
+        if entry is None:
+            return None, {}
+        if now - entry.stored_at < self.ttls[endpoint]:
+            with self.lock:
+                self.statistics[endpoint].hits += 1
+            return entry.response, {}
+        return None, entry.validators
+
+    def update(self, endpoint, key, response, now=None):
+        """
+        Учесть ответ сети и вернуть Response для клиента: на 304 —
+        сохранённый ответ, на 200 — сам ответ, запомнив его. Если
+        сохранённый ответ уже вытеснен, 304 возвращается как есть:
+        запрос надо повторить без заголовков проверки.
+        """
+        response = Response.from_response(response)
+        now = time.time() if now is None else now
+        if response.status_code == 304:
+            entry = self.get_entry(key)
+            if entry is not None:
+                with self.lock:
+                    self.statistics[endpoint].revalidations += 1
+                self.set(key, Entry(entry.response, now))
+                return entry.response
+        with self.lock:
+            self.statistics[endpoint].misses += 1
+        if response.status_code == 200:
+            self.set(key, Entry(response, now))
+        return response
+
+    def set(self, key, entry):
+        self.remember(key, entry)
+        if not self.path:
+            return
+        path = self.get_file_path(key)
+        # Запись через временный файл: файл не бывает недописанным
+        temporary_path = f'{path}.{os.getpid()}.{get_ident()}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(dict(entry.as_dict(), key=key), file)
+        os.replace(temporary_path, path)
+        self.use_file(path)
+
+    def get_statistics(self):
+        with self.lock:
+            statistics = {
+                'size': len(self.entries),
+                'endpoints': {
+                    endpoint: statistics.as_dict()
+                    for endpoint, statistics in self.statistics.items()
+                },
+            }
+        return statistics
+
+
+# Общий кэш процесса, только в памяти; для записи на диск
+# клиенту передаётся свой ResponseCache(path=...)
+cache = ResponseCache()
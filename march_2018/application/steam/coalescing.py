@@ -0,0 +1,90 @@
+import asyncio
+from threading import Event, Lock
+
+
+class Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Одинаковые запросы, идущие одновременно, выполняются один раз:
+    первый вызов с ключом идёт в сеть, остальные ждут его результат
+    или его исключение. Работает из потоков (do) и из asyncio
+    (do_async); потоки и корутины друг друга не ждут.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.futures = {}
+        self.lock = Lock()
+        self.requests_count = 0
+        self.coalesced_count = 0
+
+    def do(self, key, function, *args):
+        with self.lock:
+            self.requests_count += 1
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+            else:
+                self.coalesced_count += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, function, *args):
+        # Запрос идёт отдельной задачей: отмена одного из ждущих
+        # не отменяет его для остальных
+        key = (asyncio.get_event_loop(), key)
+        with self.lock:
+            self.requests_count += 1
+            future = self.futures.get(key)
+            if future is not None:
+                self.coalesced_count += 1
+            else:
+                future = asyncio.ensure_future(function(*args))
+                self.futures[key] = future
+                future.add_done_callback(
+                    lambda future: self.forget(key, future)
+                )
+        return await asyncio.shield(future)
+
+    def forget(self, key, future):
+        with self.lock:
+            if self.futures.get(key) is future:
+                del self.futures[key]
+        # Если все ждущие отменены, исключение запроса больше никто
+        # не заберёт: забираем сами, чтобы asyncio не ругался
+        if not future.cancelled():
+            future.exception()
+
+    def get_statistics(self):
+        with self.lock:
+            statistics = {
+                'requests': self.requests_count,
+                'coalesced': self.coalesced_count,
+                'in_flight': len(self.calls) + len(self.futures),
+            }
+        return statistics
+
+
+# Общий на процесс: совпадать могут запросы разных клиентов
+flights = SingleFlight()
@@ -0,0 +1,135 @@
+import asyncio
+import argparse
+
+from aiohttp import web
+
+
+# Страница предмета: история цен как в var line1 на steamcommunity.com
+LISTINGS_PAGE = '''<html><body><script>
+var line1=[["Mar 13 2018 01: +0",0.63,"154"],["Mar 14 2018 01: +0",0.61,"98"],\
+["Mar 14 2018 14: +0",0.59,"7"]];
+</script></body></html>'''
+
+LISTINGS_ETAG = '"listings-1"'
+
+PRICE_OVERVIEW = {
+    'success': True,
+    'lowest_price': '$0.61',
+    'volume': '1,024',
+    'median_price': '$0.60',
+}
+
+PRICE_HISTOGRAM = {
+    'success': 1,
+    'highest_buy_order': '58',
+    'lowest_sell_order': '61',
+    'buy_order_graph': [[0.58, 120, '120 buy orders at $0.58 or higher']],
+    'sell_order_graph': [[0.61, 35, '35 sell listings at $0.61 or lower']],
+}
+
+
+class FakeSteam:
+    """
+    Локальный сервер с ответами рыночных методов Steam для проверки
+    клиентов: считает запросы и наибольшее число одновременных.
+    delay — задержка каждого ответа в секундах, status — код, которым
+    отвечать вместо данных (например, 429). Запрос с кукой sessionid
+    считается запросом вошедшего username: главная страница показывает
+    его имя, а заявки принимаются и копятся в orders.
+    """
+
+    def __init__(self, delay=0.0, status=None, username=None):
+        self.delay = delay
+        self.status = status
+        self.username = username
+        self.requests = []
+        self.orders = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def create_application(self):
+        application = web.Application(middlewares=[self.count])
+        application.router.add_get(
+            '/market/listings/{app_id}/{market_hash_name}', self.get_listings
+        )
+        application.router.add_get(
+            '/market/priceoverview/', self.get_price_overview
+        )
+        application.router.add_get(
+            '/market/itemordershistogram/', self.get_price_histogram
+        )
+        application.router.add_get('/', self.get_main_page)
+        application.router.add_post('/market/sellitem/', self.post_order)
+        application.router.add_post(
+            '/market/createbuyorder/', self.post_order
+        )
+        application.router.add_post(
+            '/market/removelisting/{listing_id}', self.post_order
+        )
+        application.router.add_post(
+            '/market/cancelbuyorder/', self.post_order
+        )
+        return application
+
+    @web.middleware
+    async def count(self, request, handler):
+        self.requests.append((request.method, request.path_qs))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.status is not None:
+                return web.Response(status=self.status)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def get_listings(self, request):
+        if request.headers.get('If-None-Match') == LISTINGS_ETAG:
+            return web.Response(status=304)
+        return web.Response(
+            text=LISTINGS_PAGE, content_type='text/html',
+            headers={'ETag': LISTINGS_ETAG}
+        )
+
+    async def get_price_overview(self, request):
+        if 'market_hash_name' not in request.query:
+            return web.json_response({'success': False}, status=500)
+        return web.json_response(PRICE_OVERVIEW)
+
+    async def get_price_histogram(self, request):
+        if 'item_nameid' not in request.query:
+            return web.json_response({'success': 0}, status=500)
+        return web.json_response(PRICE_HISTOGRAM)
+
+    def is_logged_in(self, request):
+        return self.username is not None and 'sessionid' in request.cookies
+
+    async def get_main_page(self, request):
+        name = self.username if self.is_logged_in(request) else 'Login'
+        return web.Response(
+            text=f'<html><body>{name}</body></html>', content_type='text/html'
+        )
+
+    async def post_order(self, request):
+        data = await request.post()
+        # Как и Steam, заявка принимается только с sessionid из кук
+        if not self.is_logged_in(request) or \
+                data.get('sessionid') != request.cookies['sessionid']:
+            return web.json_response({'success': 0}, status=401)
+        self.orders.append((request.path, dict(data)))
+        return web.json_response({'success': 1})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake Steam market server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--status', type=int)
+    parser.add_argument('--username')
+    arguments = parser.parse_args()
+
+    steam = FakeSteam(arguments.delay, arguments.status, arguments.username)
+    web.run_app(steam.create_application(),
+                host=arguments.host, port=arguments.port)
@@ -1,4 +1,5 @@
 from steam.utils import login_required
+from steam.scheduling import PRIORITY_BACKGROUND
 
 
 class SteamMarket:
@@ -47,8 +48,7 @@ class SteamMarket:
     def get_price_history(self, market_hash_name, **kwargs):
         app_id = kwargs.get('app_id') or self.app_id
         method = f'/market/listings/{app_id}/{market_hash_name}'
-        response = self.api.get(method)
-        return self.api.get(method)
+        return self.api.get(method, priority=PRIORITY_BACKGROUND)
 
     def get_price_overview(self, market_hash_name, **kwargs):
         method = '/market/priceoverview/'
@@ -0,0 +1,365 @@
+import os
+import time
+import asyncio
+from bisect import insort
+from itertools import count
+from threading import Condition, Lock
+from collections import deque
+from urllib.parse import urlsplit
+
+
+# Чем меньше число, тем раньше запрос: заявки вытесняют фоновую загрузку
+PRIORITY_ORDER = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2
+
+# GET-методы Steam с отдельными лимитами; все POST идут в 'post'
+ENDPOINTS = (
+    ('listings', '/market/listings/'),
+    ('histogram', '/market/itemordershistogram'),
+    ('overview', '/market/priceoverview'),
+)
+
+# Запросов в секунду и наибольший всплеск: по методу и на все вместе
+RATES = {
+    'listings': (12 / 60, 3),
+    'histogram': (30 / 60, 5),
+    'overview': (20 / 60, 3),
+    'post': (30 / 60, 2),
+    'other': (60 / 60, 5),
+}
+TOTAL_RATE = (60 / 60, 10)
+
+
+class RequestRejected(Exception):
+    pass
+
+
+def get_endpoint(http_method, url):
+    if http_method == 'post':
+        return 'post'
+    path = urlsplit(url).path
+    for endpoint, prefix in ENDPOINTS:
+        if path.startswith(prefix):
+            return endpoint
+    return 'other'
+
+
+def get_percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def get_delay(tokens, rate, count=1):
+    """Сколько секунд ждать, пока в корзине наберётся count токенов."""
+    if tokens >= count:
+        return 0
+    return (count - tokens) / rate
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def refill(self, now):
+        elapsed = max(now - self.updated_at, 0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = max(self.updated_at, now)
+
+
+class MemoryBuckets:
+    """
+    Токены в памяти процесса: бюджет общий только для планировщиков,
+    которым передан этот объект.
+    """
+
+    def __init__(self, rates=None, total_rate=TOTAL_RATE, now=0):
+        self.rates = rates or RATES
+        self.total_rate = total_rate
+        self.buckets = {
+            endpoint: TokenBucket(rate, capacity, now)
+            for endpoint, (rate, capacity) in self.rates.items()
+        }
+        self.total = TokenBucket(*total_rate, now)
+        self.lock = Lock()
+
+    def get_tokens(self, now):
+        """Вернуть (общие токены, {метод: токены})."""
+        with self.lock:
+            for bucket in (self.total, *self.buckets.values()):
+                bucket.refill(now)
+            return self.total.tokens, {
+                endpoint: bucket.tokens
+                for endpoint, bucket in self.buckets.items()
+            }
+
+    def take(self, endpoint, now):
+        """Забрать токен метода и общий токен, если есть оба."""
+        with self.lock:
+            bucket = self.buckets[endpoint]
+            bucket.refill(now)
+            self.total.refill(now)
+            if bucket.tokens < 1 or self.total.tokens < 1:
+                return False
+            bucket.tokens -= 1
+            self.total.tokens -= 1
+            return True
+
+
+# Пополнить корзины KEYS на момент ARGV[1] и, если ARGV[2] == '1',
+# забрать по токену из каждой, когда хватает во всех. Скорость и ёмкость
+# корзины i лежат в ARGV[2i + 1] и ARGV[2i + 2]. Числа возвращаются
+# строками: redis обрезает дробные числа из Lua до целых
+REDIS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local enough = true
+local buckets = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i + 1])
+    local capacity = tonumber(ARGV[2 * i + 2])
+    local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or capacity
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+    buckets[i] = {tokens, math.max(now, updated_at)}
+    if tokens < 1 then
+        enough = false
+    end
+end
+local taken = ARGV[2] == '1' and enough
+local result = {taken and 1 or 0}
+for i, key in ipairs(KEYS) do
+    local tokens = buckets[i][1]
+    if taken then
+        tokens = tokens - 1
+    end
+    redis.call('HMSET', key, 'tokens', tostring(tokens),
+               'updated_at', tostring(buckets[i][2]))
+    result[i + 1] = tostring(tokens)
+end
+return result
+"""
+
+
+class RedisBuckets:
+    """
+    Токены в redis: один бюджет Steam на все процессы и сервисы,
+    подключённые к одному redis. Время берётся из time.time, поэтому
+    часы машин должны совпадать.
+    """
+
+    def __init__(self, client, rates=None, total_rate=TOTAL_RATE,
+                 prefix='steam:scheduler:'):
+        self.rates = rates or RATES
+        self.total_rate = total_rate
+        self.keys = {endpoint: prefix + endpoint for endpoint in self.rates}
+        self.total_key = prefix + 'total'
+        self.script = client.register_script(REDIS_SCRIPT)
+
+    def _call(self, endpoints, now, take):
+        keys = [self.total_key]
+        arguments = [repr(now), '1' if take else '0', *self.total_rate]
+        for endpoint in endpoints:
+            keys.append(self.keys[endpoint])
+            arguments.extend(self.rates[endpoint])
+        result = self.script(keys=keys, args=arguments)
+        return bool(int(result[0])), [float(tokens) for tokens in result[1:]]
+
+    def get_tokens(self, now):
+        _, tokens = self._call(self.rates, now, take=False)
+        return tokens[0], dict(zip(self.rates, tokens[1:]))
+
+    def take(self, endpoint, now):
+        taken, _ = self._call([endpoint], now, take=True)
+        return taken
+
+
+class EndpointStatistics:
+    def __init__(self, size=1000):
+        self.granted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waits = deque(maxlen=size)
+
+    def add(self, wait):
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.waits.append(wait)
+
+    def as_dict(self):
+        data = {
+            'granted': self.granted,
+            'rejected': self.rejected,
+            'mean_wait': self.total_wait / self.granted if self.granted else 0,
+            'max_wait': self.max_wait,
+        }
+        if self.waits:
+            data['p50_wait'] = get_percentile(self.waits, 0.5)
+            data['p90_wait'] = get_percentile(self.waits, 0.9)
+        return data
+
+
+class RequestScheduler:
+    """
+    Общая очередь запросов к Steam. Запрос ждёт токен своего метода
+    (RATES) и общий токен (TOTAL_RATE). Общие токены достаются по
+    приоритету, а при равном приоритете по очереди; запрос не ждёт
+    тех, кто впереди, но сам упёрся в лимит своего метода.
+    Если запрос ждёт дольше timeout или в очереди уже max_queue
+    запросов, он отклоняется с RequestRejected.
+    Токены лежат в store (MemoryBuckets или RedisBuckets); очередь
+    своя у каждого процесса. Если токен перехватил другой процесс,
+    запрос ждёт poll_interval и пробует снова.
+    Работает и из потоков (acquire), и из asyncio (acquire_async).
+    """
+
+    def __init__(self, rates=None, total_rate=TOTAL_RATE, timeout=None,
+                 max_queue=None, poll_interval=0.05, clock=time.monotonic,
+                 store=None):
+        self.clock = clock
+        self.store = store or MemoryBuckets(rates, total_rate, clock())
+        self.rates = self.store.rates
+        self.total_rate = self.store.total_rate
+        self.statistics = {
+            endpoint: EndpointStatistics() for endpoint in self.rates
+        }
+
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+
+        # Ожидающие запросы (priority, sequence, endpoint, created_at)
+        self.waiting = []
+        self.sequence = count()
+        self.condition = Condition()
+
+    def acquire(self, endpoint, priority=PRIORITY_DEFAULT, timeout=None):
+        """Дождаться разрешения на запрос; вернуть время ожидания."""
+        with self.condition:
+            ticket, deadline = self._enqueue(endpoint, priority, timeout)
+            try:
+                while True:
+                    delay = self._get_wait(ticket, deadline)
+                    if not delay:
+                        return self.clock() - ticket[3]
+                    self.condition.wait(delay)
+            except BaseException:
+                self._discard(ticket)
+                raise
+
+    async def acquire_async(self, endpoint, priority=PRIORITY_DEFAULT,
+                            timeout=None):
+        with self.condition:
+            ticket, deadline = self._enqueue(endpoint, priority, timeout)
+        try:
+            while True:
+                with self.condition:
+                    delay = self._get_wait(ticket, deadline)
+                if not delay:
+                    return self.clock() - ticket[3]
+                await asyncio.sleep(min(delay, self.poll_interval))
+        except BaseException:
+            # В том числе отмена задачи: запрос не должен остаться в очереди
+            with self.condition:
+                self._discard(ticket)
+            raise
+
+    def _enqueue(self, endpoint, priority, timeout):
+        if endpoint not in self.rates:
+            endpoint = 'other'
+        if self.max_queue is not None and len(self.waiting) >= self.max_queue:
+            self.statistics[endpoint].rejected += 1
+            raise RequestRejected(f'Request queue is full ({endpoint})')
+        now = self.clock()
+        ticket = (priority, next(self.sequence), endpoint, now)
+        insort(self.waiting, ticket)
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else now + timeout
+        return ticket, deadline
+
+    def _get_wait(self, ticket, deadline):
+        """
+        Под замком: пропустить запрос и вернуть 0,
+        либо вернуть, сколько ему ещё ждать.
+        """
+        endpoint, now = ticket[2], self.clock()
+        delay = self._get_delay(ticket, *self.store.get_tokens(now))
+        if not delay:
+            if self.store.take(endpoint, now):
+                self.waiting.remove(ticket)
+                self.statistics[endpoint].add(now - ticket[3])
+                self.condition.notify_all()
+                return 0
+            delay = self.poll_interval
+        if deadline is not None:
+            if now >= deadline:
+                self.statistics[endpoint].rejected += 1
+                raise RequestRejected(f'Request waited too long ({endpoint})')
+            delay = min(delay, deadline - now)
+        return delay
+
+    def _discard(self, ticket):
+        if ticket in self.waiting:
+            self.waiting.remove(ticket)
+            self.condition.notify_all()
+
+    def _get_delay(self, ticket, total, tokens):
+        # Готовые запросы впереди заберут токены раньше: ждём, пока
+        # хватит и на них, и на этот
+        ahead, ready = 0, {}
+        for other in self.waiting:
+            endpoint = other[2]
+            position = ready.get(endpoint, 0) + 1
+            delay = get_delay(
+                tokens[endpoint], self.rates[endpoint][0], position
+            )
+            if other == ticket:
+                return max(
+                    get_delay(total, self.total_rate[0], ahead + 1), delay
+                )
+            if not delay:
+                ready[endpoint] = position
+                ahead += 1
+
+    def get_statistics(self):
+        with self.condition:
+            total, tokens = self.store.get_tokens(self.clock())
+            waiting = {}
+            for ticket in self.waiting:
+                waiting[ticket[2]] = waiting.get(ticket[2], 0) + 1
+            statistics = {
+                'store': type(self.store).__name__,
+                'waiting': len(self.waiting),
+                'tokens': total,
+                'endpoints': {
+                    endpoint: dict(
+                        statistics.as_dict(),
+                        waiting=waiting.get(endpoint, 0),
+                        tokens=tokens[endpoint],
+                    )
+                    for endpoint, statistics in self.statistics.items()
+                },
+            }
+        return statistics
+
+
+def create_scheduler():
+    """
+    Если задан STEAM_SCHEDULER_REDIS (адрес redis), токены общие для
+    всех сервисов с тем же адресом; иначе бюджет у процесса свой.
+    """
+    url = os.environ.get('STEAM_SCHEDULER_REDIS')
+    if not url:
+        return RequestScheduler()
+    import redis
+    store = RedisBuckets(redis.StrictRedis.from_url(url))
+    return RequestScheduler(store=store, clock=time.time)
+
+
+# Один планировщик на процесс: через него идут все запросы к Steam
+scheduler = create_scheduler()
@@ -0,0 +1,228 @@
+import time
+import asyncio
+from threading import Condition
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+def is_error_status(status_code):
+    # 429 — Steam просит сбавить темп, 5xx — ему плохо
+    return status_code == 429 or status_code >= 500
+
+
+class ConcurrencyWindow:
+    """
+    Сколько запросов к Steam может идти одновременно (AIMD): окно
+    растёт на increase за окно быстрых ответов и уменьшается в decrease
+    раз на ошибке. Ошибки запросов, начатых до прошлого уменьшения,
+    окно второй раз не уменьшают.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0,
+                 decrease=0.5, latency_limit=5.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_limit = latency_limit
+
+        self.in_flight = 0
+        self.decreased_at = None
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def is_full(self):
+        return self.in_flight >= int(self.limit)
+
+    def add_result(self, started_at, latency, failed, now):
+        if failed:
+            if self.decreased_at is None or started_at >= self.decreased_at:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.decreased_at = now
+                self.decreases += 1
+        elif latency <= self.latency_limit:
+            # +increase, когда пройдёт limit запросов подряд
+            limit = self.limit + self.increase / self.limit
+            self.limit = min(self.maximum, limit)
+            self.increases += 1
+
+    def as_dict(self):
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'increases': self.increases,
+            'decreases': self.decreases,
+        }
+
+
+class CircuitBreaker:
+    """
+    Размыкается после failures_limit ошибок подряд и не пускает запросы
+    backoff секунд; каждое следующее размыкание подряд вдвое дольше,
+    но не больше max_backoff. Потом пропускает один пробный запрос:
+    удачный замыкает цепь, неудачный снова её размыкает.
+    """
+
+    def __init__(self, failures_limit=5, backoff=10.0, max_backoff=600.0):
+        self.failures_limit = failures_limit
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = None
+        self.probing = False
+
+    @property
+    def backoff(self):
+        backoff = self.base_backoff * 2 ** max(self.trips - 1, 0)
+        return min(self.max_backoff, backoff)
+
+    def get_retry_after(self, now):
+        """0, если запрос можно отправить, иначе сколько ждать."""
+        if self.state == OPEN:
+            return max(self.opened_until - now, 0)
+        if self.state == HALF_OPEN and self.probing:
+            return self.backoff
+        return 0
+
+    def start(self, now):
+        if self.state == OPEN and now >= self.opened_until:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            self.probing = True
+
+    def cancel(self):
+        """Запрос ушёл без результата: пробный можно отправить снова."""
+        if self.state == HALF_OPEN:
+            self.probing = False
+
+    def add_result(self, failed, now):
+        if self.state == OPEN:
+            # Ответы на запросы, начатые до размыкания
+            return
+        if self.state == HALF_OPEN:
+            self.probing = False
+        if not failed:
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failures_limit:
+            self.trips += 1
+            self.state = OPEN
+            self.opened_until = now + self.backoff
+
+    def as_dict(self, now):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'backoff': self.backoff,
+            'retry_after': self.get_retry_after(now),
+        }
+
+
+class Throttle:
+    """
+    Окно одновременных запросов на весь процесс и предохранитель
+    на каждый метод Steam. Запрос сначала берёт место в окне
+    (acquire или acquire_async), потом сообщает результат (release).
+    Ошибка — это 429, 5xx, таймаут или обрыв соединения; запрос,
+    отменённый или упавший по другой причине, освобождает место
+    с failed=None и не меняет ни окно, ни предохранитель.
+    """
+
+    def __init__(self, window=None, breaker_options=None, poll_interval=0.05,
+                 clock=time.monotonic):
+        self.window = window or ConcurrencyWindow()
+        self.breaker_options = breaker_options or {}
+        self.breakers = {}
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.condition = Condition()
+
+    def get_breaker(self, endpoint):
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(**self.breaker_options)
+            self.breakers[endpoint] = breaker
+        return breaker
+
+    def check(self, endpoint):
+        """Бросить CircuitOpen, если метод сейчас закрыт."""
+        with self.condition:
+            self._check(endpoint, self.clock())
+
+    def _check(self, endpoint, now):
+        retry_after = self.get_breaker(endpoint).get_retry_after(now)
+        if retry_after:
+            raise CircuitOpen(
+                f'Circuit for {endpoint} is open, retry in {retry_after:.1f}s'
+            )
+
+    def _try_start(self, endpoint):
+        now = self.clock()
+        self._check(endpoint, now)
+        if self.window.is_full:
+            return None
+        self.get_breaker(endpoint).start(now)
+        self.window.in_flight += 1
+        return now
+
+    def acquire(self, endpoint):
+        """Дождаться места в окне; вернуть время начала запроса."""
+        with self.condition:
+            while True:
+                started_at = self._try_start(endpoint)
+                if started_at is not None:
+                    return started_at
+                self.condition.wait(self.poll_interval)
+
+    async def acquire_async(self, endpoint):
+        while True:
+            with self.condition:
+                started_at = self._try_start(endpoint)
+            if started_at is not None:
+                return started_at
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self, endpoint, started_at, failed):
+        with self.condition:
+            now = self.clock()
+            self.window.in_flight -= 1
+            if failed is None:
+                self.get_breaker(endpoint).cancel()
+            else:
+                self.window.add_result(
+                    started_at, now - started_at, failed, now
+                )
+                self.get_breaker(endpoint).add_result(failed, now)
+            self.condition.notify_all()
+
+    def get_statistics(self):
+        with self.condition:
+            now = self.clock()
+            statistics = {
+                'window': self.window.as_dict(),
+                'breakers': {
+                    endpoint: breaker.as_dict(now)
+                    for endpoint, breaker in self.breakers.items()
+                },
+            }
+        return statistics
+
+
+# Одно окно на процесс: Steam ограничивает запросы с одного адреса
+throttle = Throttle()
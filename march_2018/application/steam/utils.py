@@ -1,9 +1,11 @@
 from struct import unpack
+from functools import wraps
 
 
 def login_required(func):
+    @wraps(func)
     def func_wrapper(self, *args, **kwargs):
-        if self.is_logged_in:
+        if not self.is_logged_in:
             raise PermissionError('Login required')
         else:
             return func(self, *args, **kwargs)
@@ -11,6 +13,18 @@ def login_required(func):
     return func_wrapper
 
 
+def async_login_required(func):
+    """login_required для корутин: is_logged_in тоже корутина."""
+    @wraps(func)
+    async def func_wrapper(self, *args, **kwargs):
+        if not await self.is_logged_in():
+            raise PermissionError('Login required')
+        else:
+            return await func(self, *args, **kwargs)
+
+    return func_wrapper
+
+
 def steam_id_to_account_id(steam_id):
     if isinstance(steam_id, str):
         steam_id = int(steam_id)
@@ -0,0 +1,63 @@
+# Клиенты AsyncSteamAPI для тестов против FakeSteam
+import asyncio
+
+from aiohttp.test_utils import TestServer
+
+from steam.aio import AsyncSteamAPI
+from steam.caching import ResponseCache
+from steam.throttling import Throttle
+from steam.coalescing import SingleFlight
+from steam.scheduling import RequestScheduler, RATES
+
+
+USERNAME = 'trader'
+COOKIES = {'sessionid': 'session-1'}
+
+
+def get_permissive_scheduler():
+    rates = {endpoint: (1000.0, 1000) for endpoint in RATES}
+    return RequestScheduler(rates, (1000.0, 1000))
+
+
+def make_api(server, cookies=None, **options):
+    """Клиент FakeSteam без лимитов; options заменяют кэш и прочее."""
+    options = dict({
+        'request_scheduler': get_permissive_scheduler(),
+        'request_throttle': Throttle(),
+        'response_cache': ResponseCache(),
+        'single_flight': SingleFlight(),
+    }, **options)
+    return AsyncSteamAPI(
+        credentials={'username': USERNAME},
+        base_url=str(server.make_url('')).rstrip('/'),
+        cookies=cookies, **options
+    )
+
+
+def serve(steam, server_function):
+    """Поднять FakeSteam и выполнить server_function(server)."""
+    async def run():
+        server = TestServer(steam.create_application())
+        await server.start_server()
+        try:
+            return await server_function(server)
+        finally:
+            await server.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def run_against_fake(steam, client_function, cookies=None,
+                     response_cache=None):
+    """Выполнить client_function(api) с одним клиентом FakeSteam."""
+    async def run(server):
+        async with make_api(
+                server, cookies,
+                response_cache=response_cache or ResponseCache()) as api:
+            return await client_function(api)
+
+    return serve(steam, run)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# Пакет steam импортируется из папки приложения, рядом с папкой tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
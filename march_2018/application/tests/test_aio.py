@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from steam.fake import FakeSteam
+from steam.caching import ResponseCache
+from steam.coalescing import SingleFlight
+from clients import USERNAME, COOKIES, make_api, serve, run_against_fake
+
+
+def test_market_get_methods():
+    async def call(api):
+        return await asyncio.gather(
+            api.market.get_price_history('WANDERER CRATE'),
+            api.market.get_price_overview('WANDERER CRATE'),
+            api.market.get_price_histogram(175910545),
+        )
+
+    history, overview, histogram = run_against_fake(FakeSteam(), call)
+    assert 'var line1=' in history.text
+    assert overview.json()['success'] is True
+    assert histogram.json()['lowest_sell_order'] == '61'
+
+
+def test_order_methods_when_logged_in():
+    steam = FakeSteam(username=USERNAME)
+
+    async def call(api):
+        market = api.market
+        assert await market.is_logged_in()
+        return [
+            await market.create_buy_order('WANDERER CRATE', 1, 58),
+            await market.create_sell_order(1234, 61),
+            await market.cancel_sell_order(5678),
+            await market.cancel_buy_order(9012),
+        ]
+
+    responses = run_against_fake(steam, call, COOKIES)
+    assert [response.json()['success'] for response in responses] == [1] * 4
+    assert [path for path, data in steam.orders] == [
+        '/market/createbuyorder/', '/market/sellitem/',
+        '/market/removelisting/5678', '/market/cancelbuyorder/',
+    ]
+    assert steam.orders[0][1]['market_hash_name'] == 'WANDERER CRATE'
+    assert all(data['sessionid'] == 'session-1' for path, data in steam.orders)
+
+
+@pytest.mark.parametrize('username, cookies', [
+    (USERNAME, None),
+    (None, COOKIES),
+])
+def test_order_methods_require_login(username, cookies):
+    steam = FakeSteam(username=username)
+
+    async def call(api):
+        with pytest.raises(PermissionError):
+            await api.market.create_buy_order('WANDERER CRATE', 1, 58)
+        with pytest.raises(PermissionError):
+            await api.market.cancel_buy_order(9012)
+
+    run_against_fake(steam, call, cookies)
+    assert steam.orders == []
+    assert all(method == 'GET' for method, path in steam.requests)
+
+
+class EvictingCache(ResponseCache):
+    """Кэш, который теряет ответ сразу после того, как отдал ETag."""
+
+    def get(self, endpoint, key, now=None):
+        response, validators = super().get(endpoint, key, now)
+        with self.lock:
+            self.entries.pop(key, None)
+        return response, validators
+
+
+@pytest.mark.parametrize('cache_class, listings_count', [
+    (ResponseCache, 2),
+    (EvictingCache, 3),
+])
+def test_price_history_after_revalidation(cache_class, listings_count):
+    # Нулевой срок жизни: каждый повторный запрос идёт с If-None-Match
+    steam = FakeSteam()
+
+    async def call(api):
+        first = await api.market.get_price_history('WANDERER CRATE')
+        second = await api.market.get_price_history('WANDERER CRATE')
+        return first, second
+
+    first, second = run_against_fake(
+        steam, call, response_cache=cache_class({'listings': 0})
+    )
+    assert second.status_code == 200
+    assert second.text == first.text
+    assert len(steam.requests) == listings_count
+
+
+def test_only_public_market_requests_are_coalesced():
+    # Медленные ответы: запросы двух клиентов идут одновременно
+    steam = FakeSteam(delay=0.1, username=USERNAME)
+    flights = SingleFlight()
+
+    async def call(server):
+        guest = make_api(server, single_flight=flights)
+        trader = make_api(server, COOKIES, single_flight=flights)
+        async with guest, trader:
+            return await asyncio.gather(
+                guest.is_logged_in(), trader.is_logged_in(),
+                guest.market.get_price_overview('WANDERER CRATE'),
+                trader.market.get_price_overview('WANDERER CRATE'),
+            )
+
+    guest_logged_in, trader_logged_in, first, second = serve(steam, call)
+    assert (guest_logged_in, trader_logged_in) == (False, True)
+    assert first.json() == second.json()
+    paths = [path.split('?')[0] for method, path in steam.requests]
+    assert sorted(paths) == ['/', '/', '/market/priceoverview/']
+    assert flights.get_statistics()['coalesced'] == 1
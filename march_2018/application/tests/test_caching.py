@@ -0,0 +1,80 @@
+import os
+
+import requests
+
+from steam.api import SteamAPI
+from steam.caching import Response, ResponseCache
+from clients import get_permissive_scheduler
+
+
+def make_response(text, status_code=200):
+    return Response('https://steamcommunity.com/', status_code,
+                    {'ETag': f'"{text}"'}, text)
+
+
+def store(cache, name, now=0):
+    key = cache.make_key(f'https://steamcommunity.com/market/listings/{name}')
+    cache.update('listings', key, make_response(name), now)
+    return key
+
+
+def get_files(path):
+    return sorted(name for name in os.listdir(path) if name.endswith('.json'))
+
+
+def test_disk_store_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(path=str(tmp_path), max_size=2)
+    first, second = store(cache, 'a'), store(cache, 'b')
+
+    # Свежий кэш читает a с диска: теперь вытесняется b
+    reader = ResponseCache(path=str(tmp_path), max_size=2)
+    assert reader.get('listings', first, now=1)[0].text == 'a'
+    third = store(reader, 'c')
+    assert len(get_files(tmp_path)) == 2
+    assert not os.path.exists(reader.get_file_path(second))
+    for key in (first, third):
+        assert os.path.exists(reader.get_file_path(key))
+
+
+def test_disk_store_trims_files_of_previous_runs(tmp_path):
+    cache = ResponseCache(path=str(tmp_path))
+    keys = [store(cache, name) for name in 'abc']
+    for moment, key in enumerate(keys):
+        os.utime(cache.get_file_path(key), (moment, moment))
+
+    ResponseCache(path=str(tmp_path), max_size=1)
+    assert get_files(tmp_path) == [
+        os.path.basename(cache.get_file_path(keys[-1]))
+    ]
+
+
+class Session:
+    """Сессия requests, которая отвечает заготовленной страницей."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls.append(url)
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200
+        response.headers['ETag'] = '"listings-1"'
+        response._content = b'<script>var line1=[];</script>'
+        return response
+
+
+def test_sync_client_returns_one_response_type():
+    api = SteamAPI(
+        None, {'guard': None},
+        request_scheduler=get_permissive_scheduler(),
+        response_cache=ResponseCache(),
+    )
+    api.session = Session()
+    miss = api.market.get_price_history('WANDERER CRATE')
+    hit = api.market.get_price_history('WANDERER CRATE')
+
+    assert len(api.session.calls) == 1
+    assert type(miss) is type(hit) is Response
+    assert (hit.status_code, hit.text, hit.headers) == \
+        (miss.status_code, miss.text, miss.headers)
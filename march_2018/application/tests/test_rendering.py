@@ -0,0 +1,89 @@
+from math import floor
+
+import numpy
+import pandas
+import pytest
+
+from core.rendering import lttb, downsample, render_items
+
+
+def lttb_with_loop(x, y, threshold):
+    """Largest-Triangle-Three-Buckets по описанию Стейнарссона, циклами."""
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return list(range(length))
+    every = (length - 2) / (threshold - 2)
+    selected = 0
+    indexes = [0]
+    for bucket in range(threshold - 2):
+        average_start = floor((bucket + 1) * every) + 1
+        average_end = min(floor((bucket + 2) * every) + 1, length)
+        count = average_end - average_start
+        average_x = sum(x[average_start:average_end]) / count
+        average_y = sum(y[average_start:average_end]) / count
+
+        max_area = -1
+        for index in range(floor(bucket * every) + 1,
+                           floor((bucket + 1) * every) + 1):
+            area = abs(
+                (x[selected] - average_x) * (y[index] - y[selected]) -
+                (x[selected] - x[index]) * (average_y - y[selected])
+            ) / 2
+            if area > max_area:
+                max_area, chosen = area, index
+        selected = chosen
+        indexes.append(selected)
+    indexes.append(length - 1)
+    return indexes
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('length, threshold', [
+    (10, 3), (100, 7), (1000, 100), (5000, 999), (50, 50), (50, 2),
+])
+def test_lttb_matches_loop(seed, length, threshold):
+    random = numpy.random.RandomState(seed)
+    x = numpy.cumsum(random.randint(1, 100, length)).astype(numpy.float64)
+    y = numpy.cumsum(random.normal(size=length))
+    result = lttb(x, y, threshold)
+    assert result.tolist() == lttb_with_loop(x.tolist(), y.tolist(), threshold)
+
+
+def generate_frame(size, seed=0):
+    random = numpy.random.RandomState(seed)
+    index = pandas.date_range('2018-03-13', periods=size, freq='60min')
+    price = numpy.abs(numpy.cumsum(random.normal(size=size))) + 1
+    price[random.rand(size) < 0.01] = numpy.nan
+    return pandas.DataFrame({'price': price, 'count': random.randint(1, 99, size)},
+                            index=index)
+
+
+def test_downsample_drops_gaps():
+    frame = generate_frame(10000)
+    series = downsample(frame['price'], 200)
+    assert len(series) == 200
+    assert not series.isnull().any()
+    assert series.index.is_monotonic_increasing
+
+
+@pytest.mark.parametrize('extension, magic', [
+    ('png', b'\x89PNG'), ('svg', b'<?xml'),
+])
+def test_render_items_headless(tmp_path, extension, magic):
+    pickle_path = str(tmp_path / 'frame.pickle')
+    generate_frame(3000, seed=1).to_pickle(pickle_path)
+    items = [
+        ('WANDERER CRATE', generate_frame(5000)),
+        ('Desert/Box (red)', pickle_path),
+    ]
+    paths = render_items(
+        items, str(tmp_path / 'charts'), extension, workers=2,
+        columns=('price', 'count'), size=(4, 2), dpi=50
+    )
+    assert [path.rsplit('/', 1)[1] for path in paths] == [
+        f'WANDERER%20CRATE.{extension}',
+        f'Desert%2FBox%20%28red%29.{extension}',
+    ]
+    for path in paths:
+        with open(path, 'rb') as file:
+            assert file.read(len(magic)) == magic
@@ -0,0 +1,217 @@
+import os
+import asyncio
+
+import pytest
+
+from steam.scheduling import (
+    PRIORITY_ORDER, PRIORITY_DEFAULT, PRIORITY_BACKGROUND,
+    RequestScheduler, RequestRejected, MemoryBuckets, RedisBuckets,
+)
+
+
+RATES = {
+    'listings': (1.0, 1),
+    'histogram': (1.0, 1),
+    'other': (1.0, 1),
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(clock, total_rate=(1.0, 1), **options):
+    return RequestScheduler(
+        RATES, total_rate, clock=clock, poll_interval=0, **options
+    )
+
+
+async def start(scheduler, endpoint, priority, order=None, name=None):
+    """Поставить запрос в очередь; после выдачи токена дописать name."""
+    async def request():
+        wait = await scheduler.acquire_async(endpoint, priority)
+        if order is not None:
+            order.append(name)
+        return wait
+
+    task = asyncio.ensure_future(request())
+    await asyncio.sleep(0)
+    return task
+
+
+async def advance(clock, tasks, step=0.25, limit=100):
+    """Двигать часы, пока не выполнятся все tasks."""
+    for _ in range(limit):
+        if all(task.done() for task in tasks):
+            return await asyncio.gather(*tasks)
+        clock.now += step
+        for _ in range(len(tasks) + 1):
+            await asyncio.sleep(0)
+    raise AssertionError('Requests are still waiting')
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_priority_preempts_earlier_requests():
+    clock = Clock()
+    scheduler = make_scheduler(clock)
+    scheduler.acquire('other')
+
+    async def main():
+        order = []
+        tasks = [
+            await start(scheduler, 'listings', PRIORITY_BACKGROUND,
+                        order, 'background'),
+            await start(scheduler, 'histogram', PRIORITY_DEFAULT,
+                        order, 'default'),
+            await start(scheduler, 'other', PRIORITY_ORDER, order, 'order'),
+        ]
+        await advance(clock, tasks)
+        return order
+
+    assert run(main()) == ['order', 'default', 'background']
+
+
+def test_request_at_its_endpoint_limit_does_not_block_others():
+    clock = Clock()
+    scheduler = make_scheduler(clock, total_rate=(10.0, 10))
+    scheduler.acquire('listings')
+
+    async def main():
+        order = []
+        tasks = [
+            await start(scheduler, 'listings', PRIORITY_ORDER, order, 'order'),
+            await start(scheduler, 'histogram', PRIORITY_BACKGROUND,
+                        order, 'background'),
+        ]
+        await advance(clock, tasks)
+        return order
+
+    assert run(main()) == ['background', 'order']
+
+
+def test_full_queue_rejects():
+    clock = Clock()
+    scheduler = make_scheduler(clock, max_queue=1)
+    scheduler.acquire('listings')
+
+    async def main():
+        task = await start(scheduler, 'listings', PRIORITY_DEFAULT)
+        with pytest.raises(RequestRejected):
+            await scheduler.acquire_async('histogram')
+        await advance(clock, [task])
+
+    run(main())
+    endpoints = scheduler.get_statistics()['endpoints']
+    assert endpoints['histogram']['rejected'] == 1
+    assert endpoints['histogram']['granted'] == 0
+    assert endpoints['listings']['granted'] == 2
+
+
+def test_timeout_rejects_and_leaves_the_queue():
+    clock = Clock()
+    scheduler = make_scheduler(clock)
+    scheduler.acquire('listings')
+
+    async def main():
+        task = asyncio.ensure_future(
+            scheduler.acquire_async('listings', PRIORITY_DEFAULT, timeout=0.5)
+        )
+        await asyncio.sleep(0)
+        assert scheduler.get_statistics()['waiting'] == 1
+        clock.now += 0.75
+        with pytest.raises(RequestRejected):
+            await task
+
+    run(main())
+    statistics = scheduler.get_statistics()
+    assert statistics['waiting'] == 0
+    assert statistics['endpoints']['listings']['rejected'] == 1
+
+
+def test_statistics_counters():
+    clock = Clock()
+    scheduler = make_scheduler(clock, total_rate=(10.0, 10))
+
+    async def main():
+        tasks = [
+            await start(scheduler, 'listings', PRIORITY_DEFAULT)
+            for _ in range(3)
+        ]
+        listings = scheduler.get_statistics()['endpoints']['listings']
+        assert listings['waiting'] == 2
+        return await advance(clock, tasks, step=0.5)
+
+    assert run(main()) == [0, 1.0, 2.0]
+    statistics = scheduler.get_statistics()
+    listings = statistics['endpoints']['listings']
+    assert statistics['store'] == 'MemoryBuckets'
+    assert statistics['waiting'] == 0
+    assert listings['granted'] == 3
+    assert listings['rejected'] == 0
+    assert listings['waiting'] == 0
+    assert listings['mean_wait'] == 1.0
+    assert listings['max_wait'] == 2.0
+    assert listings['p50_wait'] == 1.0
+    assert listings['tokens'] == 0
+    assert statistics['endpoints']['histogram']['granted'] == 0
+
+
+def check_shared_budget(clock, store):
+    """Два планировщика с одним store не превышают общий бюджет."""
+    first = RequestScheduler(clock=clock, poll_interval=0, store=store)
+    second = RequestScheduler(clock=clock, poll_interval=0, store=store)
+    first.acquire('other')
+
+    async def main():
+        task = await start(second, 'other', PRIORITY_ORDER)
+        assert not task.done()
+        return await advance(clock, [task])
+
+    assert run(main()) == [1.0]
+    assert first.get_statistics()['tokens'] == \
+        second.get_statistics()['tokens']
+
+
+def test_schedulers_share_memory_budget():
+    clock = Clock()
+    check_shared_budget(clock, MemoryBuckets(RATES, (1.0, 1), clock()))
+
+
+@pytest.fixture
+def redis_client():
+    url = os.environ.get('STEAM_SCHEDULER_REDIS')
+    if url:
+        redis = pytest.importorskip('redis')
+        client = redis.StrictRedis.from_url(url)
+    else:
+        fakeredis = pytest.importorskip('fakeredis')
+        pytest.importorskip('lupa')
+        client = fakeredis.FakeStrictRedis()
+    yield client
+    for key in client.keys('test:scheduler:*'):
+        client.delete(key)
+
+
+def test_schedulers_share_redis_budget(redis_client):
+    clock = Clock()
+    store = RedisBuckets(
+        redis_client, RATES, (1.0, 1), prefix='test:scheduler:'
+    )
+    check_shared_budget(clock, store)
+    assert store.get_tokens(clock()) == (0, {
+        'listings': 1, 'histogram': 1, 'other': 0
+    })
+    assert not store.take('other', clock())
+    clock.now += 1.0
+    assert store.take('other', clock())
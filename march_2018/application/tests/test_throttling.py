@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from steam.fake import FakeSteam
+from steam.caching import ResponseCache
+from steam.throttling import (
+    CLOSED, OPEN, CircuitOpen, ConcurrencyWindow, Throttle
+)
+from clients import make_api, serve
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_with_throttle(steam, throttle, client_function):
+    """client_function(api) без кэша: каждый вызов идёт в FakeSteam."""
+    async def run(server):
+        api = make_api(
+            server, request_throttle=throttle, response_cache=ResponseCache({})
+        )
+        async with api:
+            return await client_function(api)
+
+    return serve(steam, run)
+
+
+def get_overview(api):
+    return api.market.get_price_overview('WANDERER CRATE')
+
+
+def get_breaker(throttle, endpoint='overview'):
+    return throttle.get_statistics()['breakers'][endpoint]
+
+
+def test_window_grows_additively():
+    throttle = Throttle(ConcurrencyWindow(initial=2))
+
+    async def call(api):
+        for _ in range(20):
+            await get_overview(api)
+
+    run_with_throttle(FakeSteam(), throttle, call)
+    # За каждый быстрый ответ +1/limit: +1 за окно ответов
+    limit = 2.0
+    for _ in range(20):
+        limit += 1 / limit
+    window = throttle.get_statistics()['window']
+    assert window['limit'] == pytest.approx(limit)
+    assert (window['increases'], window['decreases']) == (20, 0)
+    assert window['in_flight'] == 0
+
+
+def test_window_halves_once_per_burst_of_failures():
+    steam = FakeSteam(delay=0.05, status=429)
+    throttle = Throttle(ConcurrencyWindow(initial=8))
+
+    async def call(api):
+        # Четыре запроса начаты до уменьшения: окно уменьшается один раз
+        await asyncio.gather(*[get_overview(api) for _ in range(4)])
+        window = throttle.get_statistics()['window']
+        assert (window['limit'], window['decreases']) == (4, 1)
+        # Следующая ошибка уже после уменьшения
+        await get_overview(api)
+
+    run_with_throttle(steam, throttle, call)
+    window = throttle.get_statistics()['window']
+    assert (window['limit'], window['decreases']) == (2, 2)
+
+
+def test_breaker_opens_half_opens_and_closes():
+    steam = FakeSteam(status=500)
+    clock = Clock()
+    throttle = Throttle(
+        breaker_options={'failures_limit': 2, 'backoff': 10.0}, clock=clock
+    )
+
+    async def call(api):
+        for _ in range(2):
+            assert (await get_overview(api)).status_code == 500
+        assert get_breaker(throttle)['state'] == OPEN
+        with pytest.raises(CircuitOpen):
+            await get_overview(api)
+        requests_count = len(steam.requests)
+
+        # После backoff пробный запрос; удачный замыкает цепь
+        clock.now += 10
+        steam.status = None
+        assert (await get_overview(api)).status_code == 200
+        assert len(steam.requests) == requests_count + 1
+        return get_breaker(throttle)
+
+    breaker = run_with_throttle(steam, throttle, call)
+    assert (breaker['state'], breaker['failures'], breaker['trips']) == \
+        (CLOSED, 0, 0)
+
+
+def test_breaker_backoff_doubles_after_failed_probes():
+    steam = FakeSteam(status=503)
+    clock = Clock()
+    throttle = Throttle(
+        breaker_options={'failures_limit': 1, 'backoff': 10.0,
+                         'max_backoff': 30.0},
+        clock=clock
+    )
+
+    async def call(api):
+        backoffs = []
+        await get_overview(api)
+        for _ in range(3):
+            breaker = get_breaker(throttle)
+            assert breaker['state'] == OPEN
+            assert breaker['retry_after'] == breaker['backoff']
+            backoffs.append(breaker['backoff'])
+            clock.now += breaker['backoff']
+            # Пробный запрос снова неудачный
+            await get_overview(api)
+        return backoffs
+
+    assert run_with_throttle(steam, throttle, call) == [10, 20, 30]
+
+
+def test_cancelled_request_is_not_a_failure():
+    steam = FakeSteam(delay=1.0)
+    clock = Clock()
+    throttle = Throttle(
+        ConcurrencyWindow(initial=4),
+        breaker_options={'failures_limit': 1, 'backoff': 10.0}, clock=clock
+    )
+
+    # Главная страница не склеивается с другими запросами:
+    # отмена вызывающего отменяет и сам запрос
+    async def cancel_request(api):
+        task = asyncio.ensure_future(api.get('/'))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    async def call(api):
+        await cancel_request(api)
+        window = throttle.get_statistics()['window']
+        assert (window['limit'], window['decreases']) == (4, 0)
+        assert window['in_flight'] == 0
+        assert get_breaker(throttle, 'other')['failures'] == 0
+
+        # Отменённый пробный запрос не держит цепь полуоткрытой
+        steam.delay, steam.status = 0.0, 500
+        await api.get('/')
+        clock.now += 10
+        steam.delay, steam.status = 1.0, None
+        await cancel_request(api)
+        steam.delay = 0.0
+        assert (await api.get('/')).status_code == 200
+        return get_breaker(throttle, 'other')
+
+    assert run_with_throttle(steam, throttle, call)['state'] == CLOSED
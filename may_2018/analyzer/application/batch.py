@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta
+
+import numpy
+
+from graph import BaseGraph
+from extremas import round_ties
+from parsing import epoch_to_wall
+from trend import split_derivative
+from utils import DAY, get_seconds, get_wall_seconds
+
+
+def align_histories(datas):
+    """
+    Выровнять истории нескольких предметов по общей сетке времени.
+    Вернуть сетку (наивное локальное время в секундах), матрицу цен
+    размером (предметы x сетка) и маску наличия точек.
+    """
+    walls = [
+        epoch_to_wall(numpy.asarray(data['date'], dtype=numpy.int64))
+        for data in datas
+    ]
+    grid = numpy.unique(numpy.concatenate(walls))
+
+    prices = numpy.full((len(datas), len(grid)), numpy.nan)
+    mask = numpy.zeros((len(datas), len(grid)), dtype=bool)
+    for row, (wall, data) in enumerate(zip(walls, datas)):
+        columns = numpy.searchsorted(grid, wall)
+        prices[row, columns] = data['price']
+        mask[row, columns] = True
+    return grid, prices, mask
+
+
+def resample_daily(grid, prices, mask):
+    """
+    Аналог resample('D').mean() для всех предметов сразу.
+    Дни без точек внутри диапазона предмета остаются NaN,
+    in_range отмечает дни от первой до последней точки предмета.
+    """
+    items_count = prices.shape[0]
+    if not grid.size:
+        empty = numpy.empty((items_count, 0))
+        return grid, empty, empty.astype(bool), empty.astype(bool)
+
+    days = grid // DAY
+    first_day = days[0]
+    days_count = int(days[-1] - first_day) + 1
+    daily_grid = (first_day + numpy.arange(days_count)) * DAY
+
+    rows, columns = numpy.nonzero(mask)
+    buckets = rows * days_count + (days[columns] - first_day)
+    size = items_count * days_count
+    sums = numpy.bincount(buckets, prices[rows, columns], minlength=size)
+    counts = numpy.bincount(buckets, minlength=size)
+    sums = sums.reshape(items_count, days_count)
+    counts = counts.reshape(items_count, days_count)
+
+    daily_mask = counts > 0
+    daily = numpy.full(sums.shape, numpy.nan)
+    daily[daily_mask] = sums[daily_mask] / counts[daily_mask]
+
+    # От первого дня с точками до последнего включительно
+    filled = daily_mask.cumsum(axis=1)
+    in_range = (filled > 0) & (filled < filled[:, -1:] + daily_mask)
+    return daily_grid, daily, daily_mask, in_range
+
+
+def rolling_windows(grid, values, mask, interval):
+    """
+    Суммы, суммы квадратов и количества точек в окнах (t - interval, t]
+    для всех предметов сразу: одна searchsorted на окно и cumsum
+    по строкам. Значения центрируются по строке для точности дисперсии.
+    """
+    starts = numpy.searchsorted(grid, grid - get_seconds(interval), 'right')
+    ends = numpy.arange(1, len(grid) + 1)
+
+    centers = numpy.nan_to_num(get_row_means(values, mask))[:, None]
+    centered = numpy.where(mask, values - centers, 0.0)
+
+    windows = []
+    for column in (centered, centered ** 2, mask.astype(numpy.int64)):
+        cumulative = numpy.zeros((column.shape[0], column.shape[1] + 1),
+                                 dtype=column.dtype)
+        column.cumsum(axis=1, out=cumulative[:, 1:])
+        windows.append(cumulative[:, ends] - cumulative[:, starts])
+    sums, squares, counts = windows
+    return centers, sums, squares, counts
+
+
+def rolling_mean(grid, values, mask, evaluate, interval):
+    centers, sums, squares, counts = rolling_windows(
+        grid, values, mask, interval
+    )
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts + centers
+    return numpy.where(evaluate & (counts > 0), means, numpy.nan)
+
+
+def rolling_std(grid, values, mask, evaluate, interval):
+    centers, sums, squares, counts = rolling_windows(
+        grid, values, mask, interval
+    )
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        variances = (squares - sums ** 2 / counts) / (counts - 1)
+    deviations = numpy.sqrt(variances.clip(min=0))
+    return numpy.where(evaluate & (counts > 1), deviations, numpy.nan)
+
+
+def get_row_means(values, mask):
+    """Среднее по строке без NaN и точек вне маски; NaN для пустых строк."""
+    mask = mask & ~numpy.isnan(values)
+    counts = mask.sum(axis=1)
+    sums = numpy.where(mask, values, 0.0).sum(axis=1)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        return numpy.where(counts > 0, sums / counts, numpy.nan)
+
+
+def pack(values, mask):
+    """
+    Сдвинуть точки каждого предмета влево, чтобы позиционные операции
+    (тренд, экстремумы) работали по строкам. Вернуть матрицу и длины.
+    """
+    lengths = mask.sum(axis=1)
+    width = lengths.max() if lengths.size else 0
+    packed = numpy.full((values.shape[0], width), numpy.nan)
+    rows, columns = numpy.nonzero(mask)
+    positions = mask.cumsum(axis=1)[rows, columns] - 1
+    packed[rows, positions] = values[rows, columns]
+    return packed, lengths
+
+
+def get_trends(packed, lengths):
+    """trend.get_trend для каждой строки упакованной матрицы."""
+    rows = numpy.arange(packed.shape[0])
+    if not packed.shape[1]:
+        return numpy.zeros(len(rows)), numpy.zeros(len(rows))
+
+    dfdx = numpy.full(packed.shape, numpy.nan)
+    if packed.shape[1] > 2:
+        slopes = numpy.diff(packed, axis=1)
+        dfdx[:, 1:-1] = (slopes[:, 1:] + slopes[:, :-1]) / 2
+
+    long_rows = rows[lengths > 2]
+    last = lengths[long_rows] - 1
+    dfdx[long_rows, 0] = dfdx[long_rows, 1]
+    dfdx[long_rows, last] = dfdx[long_rows, last - 1]
+    dfdx[lengths <= 2] = numpy.nan
+
+    results = []
+    last = numpy.maximum(lengths - 1, 0)
+    for part in split_derivative(dfdx):
+        edges = (part[rows, 0] + part[rows, last]) / 2
+        integrals = part.sum(axis=1) - edges
+        results.append(numpy.where(lengths > 1, integrals, 0.0))
+    return results
+
+
+def get_extremas(packed, lengths, comparator, order=3):
+    """argrelextrema(..., order, mode='clip') для каждой строки."""
+    packed = round_ties(packed)
+    rows = numpy.arange(packed.shape[0])[:, None]
+    positions = numpy.arange(packed.shape[1])[None, :]
+    last = numpy.maximum(lengths - 1, 0)[:, None]
+
+    results = positions <= last
+    with numpy.errstate(invalid='ignore'):
+        for shift in range(1, order + 1):
+            for neighbours in (positions + shift, positions - shift):
+                neighbours = numpy.minimum(numpy.maximum(neighbours, 0), last)
+                results &= comparator(packed, packed[rows, neighbours])
+    return [numpy.nonzero(row)[0] for row in results]
+
+
+def analyze_trends(grid, values, mask, evaluate, interval):
+    column = f'price_mean_{interval}'
+    means = rolling_mean(grid, values, mask, evaluate, interval)
+    s_dfdx_pos, s_dfdx_neg = get_trends(*pack(means, evaluate))
+    return [
+        BaseGraph.get_trend_statistics(column, positive, negative)
+        for positive, negative in zip(s_dfdx_pos, s_dfdx_neg)
+    ]
+
+
+def analyze_batch(datas, now=None):
+    """
+    Проанализировать истории нескольких предметов за несколько
+    векторных проходов по общей матрице. Для каждой истории
+    вернуть пару (statistics, shortcuts) такую же, как после
+    History.analyze().
+    """
+    if not datas:
+        return []
+
+    now = now or datetime.now()
+    grid, prices, mask = align_histories(datas)
+    results = [
+        ({'daily': {}, 'month': {}, 'week': {}},
+         {'daily': {}, 'month': {}, 'week': {}})
+        for _ in datas
+    ]
+
+    daily_grid, daily, daily_mask, in_range = resample_daily(
+        grid, prices, mask
+    )
+    trends = analyze_trends(daily_grid, daily, daily_mask, in_range, '168h')
+    for (statistics, shortcuts), stats in zip(results, trends):
+        statistics['daily'].update(stats)
+
+    for frame_name, days_count in (('month', 31), ('week', 7)):
+        border = get_wall_seconds(now - timedelta(days=days_count))
+        cropped = mask & (grid >= border)
+        trends = analyze_trends(grid, prices, cropped, cropped, '168h')
+        for (statistics, shortcuts), stats in zip(results, trends):
+            statistics[frame_name].update(stats)
+
+        if frame_name != 'month':
+            continue
+
+        means = rolling_mean(grid, prices, cropped, cropped, '4h')
+        packed, lengths = pack(means, cropped)
+        minimas = get_extremas(packed, lengths, numpy.less)
+        maximas = get_extremas(packed, lengths, numpy.greater)
+
+        deviations = rolling_std(grid, prices, cropped, cropped, '24h')
+        deviations = get_row_means(deviations, cropped)
+
+        for row, (statistics, shortcuts) in enumerate(results):
+            statistics['month']['price_mean_4h_argrelextrema_extrema'] = {
+                'minimas': minimas[row],
+                'maximas': maximas[row],
+            }
+            statistics['month']['price_std_24h'] = deviations[row]
+
+    for statistics, shortcuts in results:
+        for frame_name in ('daily', 'month', 'week'):
+            trend = statistics[frame_name]['price_mean_168h_trend']
+            shortcuts[frame_name]['trend'] = trend
+    return results
@@ -0,0 +1,702 @@
+import json
+import random
+import argparse
+import platform
+import resource
+import warnings
+import tracemalloc
+import multiprocessing
+from timeit import default_timer
+from datetime import datetime, timedelta
+
+import numpy
+import pandas
+
+from utils import get_text_between
+from parsing import parse_price_history
+from trend import get_trend
+from graph import BaseGraph
+from resampling import Resampler, get_walls
+from pyramid import Pyramid
+from cache import LRUCache
+from extremas import METHODS, ExtremaFinder
+from profiling import profiler
+from history import History, PIPELINES
+from external.peakdetect import peakdetect
+
+
+def generate_response_text(points_count, seed=0):
+    random.seed(seed)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    price = 1.0
+    rows = []
+    for index in range(points_count, 0, -1):
+        date = now - timedelta(hours=index)
+        price = max(0.03, price + random.gauss(0, 0.02))
+        count = random.randint(1, 500)
+        rows.append((date, price, count))
+    return format_response_text(rows)
+
+
+def format_response_text(rows):
+    """Страница предмета с историей из строк (datetime, цена, продажи)."""
+    rows = [
+        f'["{date.strftime("%b %d %Y %H")}: +0",{price:.3f},"{count}"]'
+        for date, price, count in rows
+    ]
+    return (
+        '<script type="text/javascript">\n'
+        f'\t\tvar line1=[{",".join(rows)}];\n'
+        '\t\tg_timePriceHistoryEarliest = new Date();\n'
+        '</script>'
+    )
+
+
+def generate_steam_history(points_count, seed=0, gap_every=500):
+    """
+    История, как на странице предмета: старые точки раз в день
+    (в 01 час), последние — раз в час, с выпавшими часами, пропусками
+    на 12-48 часов и всплесками цены и продаж. Вернуть строки
+    (datetime, цена, продажи).
+    """
+    state = numpy.random.RandomState(seed)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    daily_count = min(points_count // 4, 2000)
+    hourly_count = points_count - daily_count
+
+    hours = numpy.arange(int(hourly_count * 1.25) + 1, 0, -1)
+    kept = state.rand(len(hours)) > 0.05
+    for start in range(0, len(hours), gap_every):
+        start += state.randint(gap_every)
+        kept[start:start + state.randint(12, 49)] = False
+    hours = hours[kept][-hourly_count:] if hourly_count else hours[:0]
+    dates = [now - timedelta(hours=int(hour)) for hour in hours]
+    last_day = (dates[0] if dates else now).replace(hour=1)
+    dates = [
+        last_day - timedelta(days=day)
+        for day in range(daily_count, 0, -1)
+    ] + dates
+
+    log_prices = numpy.cumsum(state.normal(0, 0.02, len(dates)))
+    counts = state.poisson(20, len(dates)) + 1.0
+    for start in numpy.flatnonzero(state.rand(len(dates)) < 1 / 300):
+        decay = numpy.exp(-numpy.arange(min(24, len(dates) - start)) / 6)
+        log_prices[start:start + len(decay)] += state.uniform(0.2, 0.4) * decay
+        counts[start:start + len(decay)] *= 1 + 9 * decay
+    prices = numpy.maximum(numpy.exp(log_prices), 0.03)
+    return list(zip(dates, prices.tolist(), counts.astype(int).tolist()))
+
+
+def parse_response_with_eval(response_text):
+    history = eval(get_text_between(response_text, 'var line1=', ';'))
+    pattern = '%b %d %Y %H: +0'
+    data = {'date': [], 'price': [], 'count': []}
+    for date, price, count in history:
+        timestamp = datetime.strptime(date, pattern).timestamp()
+        data['date'].append(timestamp)
+        data['price'].append(price)
+        data['count'].append(int(count))
+    return data
+
+
+def generate_prices(points_count, seed=0):
+    state = numpy.random.RandomState(seed)
+    prices = 1.0 + numpy.cumsum(state.normal(0, 0.02, points_count))
+    return numpy.abs(prices) + 0.03
+
+
+def generate_history(points_count, seed=0):
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = int((now - timedelta(hours=points_count)).timestamp())
+    dates = start + 3600 * numpy.arange(points_count, dtype=numpy.int64)
+    return dates, generate_prices(points_count, seed)
+
+
+def get_trend_with_quad(y):
+    from scipy.misc import derivative
+    import scipy.integrate as integrate
+    from scipy.interpolate import interp1d
+
+    x = range(len(y))
+    f = interp1d(x, y, bounds_error=False)
+
+    x_fake = numpy.arange(0.0, len(x), 1.0)
+    dfdx = derivative(f, x_fake, dx=1e-6)
+    dfdx[0] = dfdx[1]
+    dfdx[-1] = dfdx[-2]
+
+    dfdx_pos = []
+    dfdx_neg = []
+    for value in dfdx:
+        if value > 0:
+            dfdx_pos.append(value)
+            dfdx_neg.append(0)
+        elif value < 0:
+            dfdx_pos.append(0)
+            dfdx_neg.append(abs(value))
+        else:
+            dfdx_pos.append(0)
+            dfdx_neg.append(0)
+
+    f_dfdx_pos = interp1d(x, dfdx_pos, bounds_error=False)
+    f_dfdx_neg = interp1d(x, dfdx_neg, bounds_error=False)
+
+    with warnings.catch_warnings():
+        # quad hits its subdivision limit on long series
+        warnings.simplefilter('ignore', integrate.IntegrationWarning)
+        s_dfdx_pos, error = integrate.quad(f_dfdx_pos, x[0], x[-1])
+        s_dfdx_neg, error = integrate.quad(f_dfdx_neg, x[0], x[-1])
+
+    result = {
+        'dfdx': dfdx,
+        'dfdx_pos': numpy.array(dfdx_pos),
+        'dfdx_neg': numpy.array(dfdx_neg),
+        's_dfdx_pos': s_dfdx_pos,
+        's_dfdx_neg': s_dfdx_neg,
+    }
+    return result
+
+
+def peakdetect_with_loop(y_axis, lookahead=200, delta=0):
+    """peakdetect до векторизации, для сверки."""
+    max_peaks = []
+    min_peaks = []
+    dump = []
+    y_axis = numpy.array(y_axis)
+    x_axis = numpy.arange(len(y_axis))
+    length = len(y_axis)
+    mn, mx = numpy.inf, -numpy.inf
+
+    for index, (x, y) in enumerate(zip(x_axis[:-lookahead],
+                                       y_axis[:-lookahead])):
+        if y > mx:
+            mx = y
+            mxpos = x
+        if y < mn:
+            mn = y
+            mnpos = x
+
+        if y < mx - delta and mx != numpy.inf:
+            if y_axis[index:index + lookahead].max() < mx:
+                max_peaks.append([mxpos, mx])
+                dump.append(True)
+                mx = numpy.inf
+                mn = numpy.inf
+                if index + lookahead >= length:
+                    break
+                continue
+
+        if y > mn + delta and mn != -numpy.inf:
+            if y_axis[index:index + lookahead].min() > mn:
+                min_peaks.append([mnpos, mn])
+                dump.append(False)
+                mn = -numpy.inf
+                mx = -numpy.inf
+                if index + lookahead >= length:
+                    break
+
+    try:
+        if dump[0]:
+            max_peaks.pop(0)
+        else:
+            min_peaks.pop(0)
+    except IndexError:
+        pass
+    return [max_peaks, min_peaks]
+
+
+def measure(function, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started_at = default_timer()
+        result = function(*args)
+        timings.append(default_timer() - started_at)
+    return min(timings), result
+
+
+def benchmark_parsing(sizes, repeat):
+    for size in sizes:
+        response_text = generate_response_text(size)
+        old_time, data = measure(
+            parse_response_with_eval, response_text, repeat=repeat
+        )
+        new_time, (dates, prices, counts) = measure(
+            parse_price_history, response_text, repeat=repeat
+        )
+        print(
+            f'parse {size:>7} points: '
+            f'eval {old_time * 1000:9.2f} ms, '
+            f'numpy {new_time * 1000:9.2f} ms, '
+            f'x{old_time / new_time:.1f}'
+        )
+
+
+def benchmark_trend(sizes, repeat):
+    for size in sizes:
+        y = generate_prices(size)
+        old_time, expected = measure(get_trend_with_quad, y, repeat=repeat)
+        new_time, result = measure(get_trend, y, repeat=repeat)
+        error = max(
+            abs(result[key] - expected[key]) / max(abs(expected[key]), 1e-9)
+            for key in ('s_dfdx_pos', 's_dfdx_neg')
+        )
+        print(
+            f'trend {size:>7} points: '
+            f'quad {old_time * 1000:9.2f} ms, '
+            f'numpy {new_time * 1000:9.2f} ms, '
+            f'x{old_time / new_time:.1f}, '
+            f'quad relative error {error:.1e}'
+        )
+
+
+def benchmark_peakdetect(sizes, repeat):
+    # lookahead=2, delta=2 как в BaseGraph.analyze_extremas
+    parameters = [(2, 2), (20, 0.1)]
+    for size in sizes:
+        y = generate_prices(size) * 10
+        for lookahead, delta in parameters:
+            old_time, expected = measure(
+                peakdetect_with_loop, y, lookahead, delta, repeat=repeat
+            )
+            new_time, result = measure(
+                peakdetect, y, None, lookahead, delta, repeat=repeat
+            )
+            print(
+                f'peakdetect {size:>7} points, lookahead {lookahead:>3}: '
+                f'loop {old_time * 1000:9.2f} ms, '
+                f'numpy {new_time * 1000:9.2f} ms, '
+                f'x{old_time / new_time:.1f}, '
+                f'{len(result[0]) + len(result[1])} peaks'
+            )
+
+
+def replay(history, pages):
+    """Обновить историю страницами по очереди, как при повторных запросах."""
+    for response_text in pages:
+        history.update(response_text)
+    return history
+
+
+def analyze_page(response_text):
+    history = History(730, 'item', response_text)
+    history.analyze()
+    return history
+
+
+def benchmark_incremental(sizes, repeat, updates_count=24):
+    for size in sizes:
+        rows = generate_steam_history(size)
+        known = len(rows) - updates_count
+        # Страницы по часу, каждая целиком: готовятся до замера
+        pages = [
+            format_response_text(rows[:index])
+            for index in range(known, len(rows) + 1)
+        ]
+        history = History(730, 'item', pages[0])
+        history.update(pages[0])
+        update_time, history = measure(replay, history, pages[1:], repeat=1)
+        update_time /= updates_count
+
+        full_time, _ = measure(analyze_page, pages[-1], repeat=repeat)
+        print(
+            f'update {size:>6} points: '
+            f'History.analyze {full_time * 1000:9.2f} ms, '
+            f'History.update {update_time * 1000:9.2f} ms per update, '
+            f'x{full_time / update_time:.1f}'
+        )
+
+
+def analyze_with_calls(frame, indicators):
+    """Показатели по очереди через BaseGraph.analyze_*, как до Pipeline."""
+    statistics = {}
+    for kind, column, parameter in indicators:
+        analyze = getattr(BaseGraph, f'analyze_{kind}')
+        if parameter is None:
+            frame, stats = analyze(frame, column)
+        else:
+            frame, stats = analyze(frame, column, parameter)
+        statistics.update(stats)
+    return frame, statistics
+
+
+def benchmark_pipeline(sizes, repeat):
+    indicators = PIPELINES['month'].indicators
+    for size in sizes:
+        dates, prices = generate_history(size)
+        prices[::97] = numpy.nan
+        index = [datetime.fromtimestamp(date) for date in dates]
+        frame = pandas.DataFrame({'price': prices}, index=index)
+
+        old_time, _ = measure(
+            analyze_with_calls, frame.copy(), indicators, repeat=repeat
+        )
+        new_time, _ = measure(
+            PIPELINES['month'].run, frame.copy(), repeat=repeat
+        )
+        print(
+            f'pipeline {size:>7} points: '
+            f'calls {old_time * 1000:9.2f} ms, '
+            f'fused {new_time * 1000:9.2f} ms, '
+            f'x{old_time / new_time:.1f}'
+        )
+
+
+def resample_with_pandas(frame, interval):
+    resample = frame.resample(interval)
+    result = resample['price'].ohlc()
+    result['mean'] = resample['price'].mean()
+    result['count'] = resample['count'].sum()
+    turnovers = (frame['price'] * frame['count']).resample(interval).sum()
+    volumes = frame['count'].where(frame['price'].notnull())
+    result['vwap'] = turnovers / volumes.resample(interval).sum()
+    return result
+
+
+def resample_with_numpy(walls, prices, counts, interval):
+    resampler = Resampler(walls, interval)
+    result = resampler.ohlc(prices)
+    result['mean'] = resampler.mean(prices)
+    result['count'] = resampler.sum(counts)
+    result['vwap'] = resampler.vwap(prices, counts)
+    return resampler.index, result
+
+
+def generate_sales(size):
+    """Фрейм цен и продаж с пропусками и NaN; его стены, цены и продажи."""
+    dates, prices = generate_history(size)
+    prices[::97] = numpy.nan
+    # Пропуски в несколько часов, как у редко продаваемых предметов
+    kept = numpy.random.RandomState(0).rand(size) > 0.3
+    dates, prices = dates[kept], prices[kept]
+    counts = numpy.random.RandomState(1).randint(1, 500, len(dates))
+    index = [datetime.fromtimestamp(date) for date in dates]
+    frame = pandas.DataFrame({'price': prices, 'count': counts}, index)
+    return frame, get_walls(frame.index), prices, counts
+
+
+def benchmark_resample(sizes, repeat):
+    for size in sizes:
+        frame, walls, prices, counts = generate_sales(size)
+        for interval in ('1h', '4h', '1D', '7D'):
+            old_time, _ = measure(
+                resample_with_pandas, frame, interval, repeat=repeat
+            )
+            new_time, _ = measure(
+                resample_with_numpy, walls, prices, counts, interval,
+                repeat=repeat
+            )
+            print(
+                f'resample {size:>7} points, {interval:>2}: '
+                f'pandas {old_time * 1000:9.2f} ms, '
+                f'numpy {new_time * 1000:9.2f} ms, '
+                f'x{old_time / new_time:.1f}'
+            )
+
+
+def replay_pyramid(pyramid, walls, prices, counts, updates_count):
+    """Дописывать по точке, повторяя прошлую, как при повторном запросе."""
+    for index in range(len(walls) - updates_count, len(walls)):
+        pyramid.extend(
+            walls[index - 1:index + 1],
+            prices[index - 1:index + 1],
+            counts[index - 1:index + 1],
+        )
+
+
+def benchmark_pyramid(sizes, repeat, updates_count=24):
+    for size in sizes:
+        frame, walls, prices, counts = generate_sales(size)
+
+        pyramid = Pyramid()
+        known = len(walls) - updates_count
+        pyramid.extend(walls[:known], prices[:known], counts[:known])
+        update_time, _ = measure(
+            replay_pyramid, pyramid, walls, prices, counts, updates_count,
+            repeat=1
+        )
+        update_time /= updates_count
+
+        full_time, _ = measure(
+            resample_with_pandas, frame, '1D', repeat=repeat
+        )
+        read_time, _ = measure(pyramid.get_frame, '1D', repeat=repeat)
+        print(
+            f'pyramid {size:>7} points: '
+            f'pandas daily {full_time * 1000:9.2f} ms, '
+            f'update {update_time * 1000:7.2f} ms, '
+            f'read daily {read_time * 1000:7.2f} ms'
+        )
+
+
+def find_extremas_separately(values):
+    """Четыре метода по очереди, как BaseGraph.analyze_extremas до кэша."""
+    import peakutils
+    from scipy.signal import argrelextrema, find_peaks_cwt
+
+    results = {}
+    for method, parameters in METHODS:
+        y = numpy.array(values)
+        if method == 'argrelextrema':
+            minimas = argrelextrema(y, numpy.less, order=3)[0]
+            maximas = argrelextrema(y, numpy.greater, order=3)[0]
+        elif method == 'peakutils':
+            maximas = peakutils.peak.indexes(y, thres=0.15, min_dist=4)
+            minimas = peakutils.peak.indexes(-1 * y, thres=0.15, min_dist=4)
+        elif method == 'cwt':
+            maximas = find_peaks_cwt(y, numpy.arange(1, 5))
+            minimas = find_peaks_cwt(-1 * y, numpy.arange(1, 5))
+        elif method == 'peakdetect':
+            peaks = peakdetect(y, lookahead=2, delta=2)
+            maximas = [index for index, value in peaks[0]]
+            minimas = [index for index, value in peaks[1]]
+        results[method] = {'minimas': minimas, 'maximas': maximas}
+    return results
+
+
+def find_extremas_together(values, cache):
+    return ExtremaFinder(values, cache).find_all()
+
+
+def benchmark_extremas(sizes, repeat):
+    for size in sizes:
+        values = generate_prices(size) * 10
+        old_time, _ = measure(
+            find_extremas_separately, values, repeat=repeat
+        )
+        new_time, _ = measure(
+            lambda: find_extremas_together(values, LRUCache()),
+            repeat=repeat
+        )
+        cache = LRUCache()
+        find_extremas_together(values, cache)
+        cached_time, _ = measure(
+            find_extremas_together, values, cache, repeat=repeat
+        )
+        print(
+            f'extremas {size:>7} points: '
+            f'separately {old_time * 1000:9.2f} ms, '
+            f'together {new_time * 1000:9.2f} ms, '
+            f'cached {cached_time * 1000:7.2f} ms, '
+            f'x{old_time / new_time:.1f}'
+        )
+
+
+def analyze_response_text(response_text):
+    history = History(730, 'item', response_text)
+    history.analyze()
+    history.update(response_text)
+    return history
+
+
+def benchmark_profiling(sizes, repeat):
+    for size in sizes:
+        response_text = generate_response_text(size)
+        timings = []
+        for enable in (None, False, True):
+            if enable is not None:
+                profiler.enable(trace_memory=enable)
+            timings.append(measure(
+                analyze_response_text, response_text, repeat=repeat
+            )[0])
+            profiler.disable()
+        stages = profiler.get_statistics()['stages']
+        print(
+            f'profiling {size:>7} points: '
+            f'disabled {timings[0] * 1000:9.2f} ms, '
+            f'timers {timings[1] * 1000:9.2f} ms, '
+            f'timers and memory {timings[2] * 1000:9.2f} ms, '
+            f'{len(stages)} stages'
+        )
+
+
+def measure_step(setup, function, repeat=5):
+    """
+    Лучшее время function(setup()) из repeat запусков (подготовка
+    не замеряется) и пиковая память отдельного запуска под tracemalloc.
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = setup()
+        started_at = default_timer()
+        function(argument)
+        timings.append(default_timer() - started_at)
+
+    argument = setup()
+    tracemalloc.start()
+    try:
+        function(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def get_suite_steps(response_text):
+    """Шаги анализа: (имя, подготовка, замеряемая функция)."""
+    def create_history():
+        return History(730, 'item', response_text)
+
+    def get_month_frame():
+        return create_history().frames['month']
+
+    def get_month_means():
+        frame, stats = BaseGraph.analyze_mean(get_month_frame(), 'price', '4h')
+        return numpy.array(frame['price_mean_4h'])
+
+    steps = [
+        ('History.__init__', lambda: response_text,
+         lambda text: History(730, 'item', text)),
+        ('History.analyze', create_history,
+         lambda history: history.analyze()),
+        ('History.update', create_history,
+         lambda history: history.update(response_text)),
+        ('BaseGraph.analyze_mean', get_month_frame,
+         lambda frame: BaseGraph.analyze_mean(frame, 'price', '4h')),
+        ('BaseGraph.analyze_deviation', get_month_frame,
+         lambda frame: BaseGraph.analyze_deviation(frame, 'price', '24h')),
+        ('BaseGraph.analyze_trend', get_month_frame,
+         lambda frame: BaseGraph.analyze_trend(frame, 'price')),
+    ]
+    for method, parameters in METHODS:
+        steps.append((
+            f'ExtremaFinder.find_{method}', get_month_means,
+            # Свежий кэш: замеряется поиск, а не попадание в кэш
+            lambda y, method=method: ExtremaFinder(y, LRUCache()).find(
+                method
+            ),
+        ))
+    return steps
+
+
+def benchmark_suite(sizes, repeat, output=None, compare=None):
+    """
+    Шаги анализа на синтетических историях. Результаты сохраняются
+    в JSON (output) и сравниваются с прошлым запуском (compare).
+    """
+    previous = {}
+    if compare:
+        with open(compare) as file:
+            for result in json.load(file)['results']:
+                previous[(result['size'], result['step'])] = result
+
+    results = []
+    for size in sizes:
+        rows = generate_steam_history(size)
+        response_text = format_response_text(rows)
+        for name, setup, function in get_suite_steps(response_text):
+            seconds, peak = measure_step(setup, function, repeat=repeat)
+            results.append({
+                'size': size,
+                'points': len(rows),
+                'step': name,
+                'time': seconds,
+                'peak_memory': peak,
+            })
+            line = (
+                f'suite {size:>7} points, {name:<32} '
+                f'{seconds * 1000:9.2f} ms, peak {peak / 1024:10.1f} KB'
+            )
+            if (size, name) in previous:
+                before = previous[(size, name)]
+                line += (
+                    f', time x{before["time"] / seconds:.2f}, '
+                    f'memory x{before["peak_memory"] / max(peak, 1):.2f}'
+                )
+            print(line)
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'repeat': repeat,
+        'versions': {
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'pandas': pandas.__version__,
+        },
+        'results': results,
+    }
+    if output:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+class CopyingHistory(History):
+    """History, которая копирует окна, как до FrameView."""
+
+    def get_daily_frame(self):
+        return self.frames['original'].resample('D').mean()
+
+    def get_window_frame(self, days_count):
+        border = datetime.now() - timedelta(days=days_count)
+        return self.frames['original'].loc[border:].copy()
+
+    def get_view(self, frame_name):
+        if frame_name not in self.statistics:
+            self.frames[frame_name] = self.frames[frame_name].copy()
+        return super().get_view(frame_name)
+
+
+def get_peak_rss(history_class, items_count, points_count):
+    """Пиковый RSS процесса (КБ) до и после анализа items_count историй."""
+    texts = (
+        generate_response_text(points_count, seed)
+        for seed in range(items_count)
+    )
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    histories = []
+    for seed, response_text in enumerate(texts):
+        history = history_class(730, f'item {seed}', response_text)
+        history.analyze()
+        histories.append(history)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return before, after
+
+
+def benchmark_memory(sizes, repeat, items_count=1000, points_count=2000):
+    # Каждый вариант в отдельном процессе: ru_maxrss только растёт
+    context = multiprocessing.get_context('spawn')
+    for history_class in (CopyingHistory, History):
+        with context.Pool(1) as pool:
+            before, after = pool.apply(
+                get_peak_rss, (history_class, items_count, points_count)
+            )
+        print(
+            f'memory {items_count} items x {points_count} points: '
+            f'{history_class.__name__:>14} peak RSS {after / 1024:8.1f} MB, '
+            f'analysis {(after - before) / 1024:8.1f} MB'
+        )
+
+
+BENCHMARKS = {
+    'extremas': benchmark_extremas,
+    'incremental': benchmark_incremental,
+    'memory': benchmark_memory,
+    'peakdetect': benchmark_peakdetect,
+    'pipeline': benchmark_pipeline,
+    'profiling': benchmark_profiling,
+    'pyramid': benchmark_pyramid,
+    'resample': benchmark_resample,
+    'suite': benchmark_suite,
+    'parse': benchmark_parsing,
+    'trend': benchmark_trend,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='')
+    parser.add_argument('names', nargs='*')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1000, 10000, 100000]
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='suite: сохранить результаты в JSON')
+    parser.add_argument('--compare', help='suite: JSON прошлого запуска')
+    namespace = parser.parse_args()
+
+    options = {
+        'suite': {'output': namespace.output, 'compare': namespace.compare},
+    }
+    for name in namespace.names or sorted(BENCHMARKS):
+        BENCHMARKS[name](
+            namespace.sizes, namespace.repeat, **options.get(name, {})
+        )
@@ -0,0 +1,162 @@
+import time
+import hashlib
+from threading import Lock
+from collections import OrderedDict
+
+import numpy
+
+from parsing import get_history_key
+
+
+def hash_values(*arrays):
+    """Отпечаток числовых рядов."""
+    digest = hashlib.sha1()
+    for values in arrays:
+        digest.update(numpy.asarray(values, dtype=numpy.float64).tobytes())
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    Словарь не больше чем на max_size значений: при переполнении
+    вытесняется давно не использованное.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self._set(key, value)
+
+    def setdefault(self, key, value):
+        """Значение по ключу; если его нет, запомнить value."""
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+            self._set(key, value)
+            return value
+
+    def _set(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get_statistics(self):
+        with self.lock:
+            requests_count = self.hits + self.misses
+            statistics = {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests_count if requests_count else None,
+            }
+            return statistics
+
+
+class ResultCache:
+    """
+    Кэш результатов анализа с ключом
+    (market_hash_name, отпечаток страницы истории, параметры анализа).
+    Размер ограничен (вытесняется давно не использованный результат),
+    записи живут ttl секунд: Steam дописывает точки истории раз в час.
+    """
+
+    def __init__(self, max_size=1024, ttl=60 * 60, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.latest = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def make_key(market_hash_name, response_text, parameters):
+        # Ключ считается до разбора страницы: на попадании история
+        # не разбирается и не обновляется
+        return market_hash_name, get_history_key(response_text), parameters
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            self._delete(key)
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def get_recent(self, market_hash_name, parameters):
+        """
+        Последний результат по предмету, если он ещё не устарел:
+        тогда страницу предмета можно не загружать.
+        """
+        with self.lock:
+            key = self.latest.get((market_hash_name, parameters))
+            value = key and self._get(key)
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def get(self, key):
+        with self.lock:
+            value = self._get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            market_hash_name, history_key, parameters = key
+            self.entries[key] = (self.clock() + self.ttl, value)
+            self.entries.move_to_end(key)
+            self.latest[(market_hash_name, parameters)] = key
+            while len(self.entries) > self.max_size:
+                self._delete(next(iter(self.entries)))
+
+    def _delete(self, key):
+        # Вместе с записью уходит и указатель на неё в latest
+        market_hash_name, history_key, parameters = key
+        del self.entries[key]
+        if self.latest.get((market_hash_name, parameters)) == key:
+            del self.latest[(market_hash_name, parameters)]
+
+    def get_statistics(self):
+        with self.lock:
+            requests_count = self.hits + self.misses
+            statistics = {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests_count if requests_count else None,
+            }
+            return statistics
@@ -21,6 +21,7 @@ import pylab
 from scipy import fft, ifft
 from scipy.optimize import curve_fit
 from scipy.signal import cspline1d_eval, cspline1d
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
 
 __all__ = [
         "peakdetect",
@@ -38,7 +39,7 @@ __all__ = [
 
 def _datacheck_peakdetect(x_axis, y_axis):
     if x_axis is None:
-        x_axis = range(len(y_axis))
+        x_axis = np.arange(len(y_axis))
 
     if len(y_axis) != len(x_axis):
         raise ValueError(
@@ -176,12 +177,9 @@ def peakdetect(y_axis, x_axis = None, lookahead = 200, delta=0):
         results to unpack one of the lists into x, y coordinates do:
         x, y = zip(*max_peaks)
     """
-    max_peaks = []
-    min_peaks = []
-    dump = []   #Used to pop the first hit which almost always is false
-
     # check input data
     x_axis, y_axis = _datacheck_peakdetect(x_axis, y_axis)
+    signal = y_axis.astype(np.float64)
     # store data length for later use
     length = len(y_axis)
 
@@ -192,70 +190,99 @@ def peakdetect(y_axis, x_axis = None, lookahead = 200, delta=0):
     if not (np.isscalar(delta) and delta >= 0):
         raise ValueError("delta must be a positive number")
 
-    #maxima and minima candidates are temporarily stored in
-    #mx and mn respectively
-    mn, mx = np.Inf, -np.Inf
-
     #Only detect peak if there is 'lookahead' amount of points after it
-    for index, (x, y) in enumerate(zip(x_axis[:-lookahead],
-                                        y_axis[:-lookahead])):
-        if y > mx:
-            mx = y
-            mxpos = x
-        if y < mn:
-            mn = y
-            mnpos = x
-
-        ####look for max####
-        if y < mx-delta and mx != np.Inf:
-            #Maxima peak candidate found
-            #look ahead in signal to ensure that this is a peak and not jitter
-            if y_axis[index:index+lookahead].max() < mx:
-                max_peaks.append([mxpos, mx])
-                dump.append(True)
-                #set algorithm to only find minima now
-                mx = np.Inf
-                mn = np.Inf
-                if index+lookahead >= length:
-                    #end is within lookahead no more peaks can be found
-                    break
-                continue
-            #else:  #slows shit down this does
-            #    mx = ahead
-            #    mxpos = x_axis[np.where(y_axis[index:index+lookahead]==mx)]
-
-        ####look for min####
-        if y > mn+delta and mn != -np.Inf:
-            #Minima peak candidate found
-            #look ahead in signal to ensure that this is a peak and not jitter
-            if y_axis[index:index+lookahead].min() > mn:
-                min_peaks.append([mnpos, mn])
-                dump.append(False)
-                #set algorithm to only find maxima now
-                mn = -np.Inf
-                mx = -np.Inf
-                if index+lookahead >= length:
-                    #end is within lookahead no more peaks can be found
-                    break
-            #else:  #slows shit down this does
-            #    mn = ahead
-            #    mnpos = x_axis[np.where(y_axis[index:index+lookahead]==mn)]
-
+    stop = max(length - lookahead, 0)
+    ahead_max, ahead_min = _lookahead_extremes(signal, lookahead)
+    #minima are maxima of the negated signal
+    searches = {
+        True: (signal, ahead_max),
+        False: (-signal, -ahead_min),
+    }
+
+    #The loop is replaced by phases: while looking for a maxima the
+    #running max is tracked until the signal falls delta below it and the
+    #lookahead window stays below it, then the search switches to minima.
+    #A phase is found with vectorized scans instead of a Python loop.
+    found = []
+    max_found = _find_peak(*searches[True], 0, stop, delta, lookahead)
+    min_stop = stop if max_found is None else max_found[0]
+    min_found = _find_peak(*searches[False], 0, min_stop, delta, lookahead)
+    is_max = min_found is None or (
+        max_found is not None and max_found[0] <= min_found[0])
+    peak = max_found if is_max else min_found
+
+    while peak is not None:
+        index, position = peak
+        found.append((is_max, position))
+        #set algorithm to look for the other kind of peak now
+        is_max = not is_max
+        peak = _find_peak(*searches[is_max], index + 1, stop, delta,
+                          lookahead)
 
     #Remove the false hit on the first value of the y_axis
-    try:
-        if dump[0]:
-            max_peaks.pop(0)
-        else:
-            min_peaks.pop(0)
-        del dump
-    except IndexError:
-        #no peaks were found, should the function return empty lists?
-        pass
+    max_peaks = [[x_axis[position], y_axis[position]]
+                 for is_max, position in found[1:] if is_max]
+    min_peaks = [[x_axis[position], y_axis[position]]
+                 for is_max, position in found[1:] if not is_max]
 
     return [max_peaks, min_peaks]
 
 
+def _lookahead_extremes(y_axis, lookahead):
+    """
+    Max and min of y_axis[index:index+lookahead] for every index, as
+    sliding window filters. Windows holding a NaN give NaN, like
+    ndarray.max() does.
+    """
+    origin = -(lookahead // 2)
+    missing = np.isnan(y_axis)
+    #the filters do not handle NaN, so it is masked out and put back
+    ahead_max = maximum_filter1d(np.where(missing, -np.inf, y_axis),
+                                 lookahead, origin=origin)
+    ahead_min = minimum_filter1d(np.where(missing, np.inf, y_axis),
+                                 lookahead, origin=origin)
+    if missing.any():
+        missing = maximum_filter1d(missing.view(np.int8), lookahead,
+                                   origin=origin).astype(bool)
+        ahead_max[missing] = np.nan
+        ahead_min[missing] = np.nan
+    return ahead_max, ahead_min
+
+
+def _find_peak(y_axis, ahead_max, start, stop, delta, lookahead):
+    """
+    Look for a maxima starting at start, in the same way as the original
+    loop: track the running max (NaN is skipped) and stop at the first
+    index where the signal is more than delta below it and the lookahead
+    window is below it too. Minima are found by passing the negated signal.
+
+    return: (index where the peak was confirmed, position of the peak)
+        or None
+    """
+    phase_start = start
+    best = -np.inf
+    size = max(8 * lookahead, 128)
+    while start < stop:
+        end = min(start + size, stop)
+        chunk = y_axis[start:end]
+        current = np.fmax(np.fmax.accumulate(chunk), best)
+        with np.errstate(invalid='ignore'):
+            confirmed = (chunk < current - delta) & \
+                (ahead_max[start:end] < current)
+
+        hits = np.flatnonzero(confirmed)
+        if hits.size:
+            index = start + hits[0]
+            #the first occurrence of the running max, as in the loop
+            peak = y_axis[phase_start:index + 1] == current[hits[0]]
+            return index, phase_start + peak.argmax()
+        best = current[-1]
+        start = end
+        #long phases are scanned in growing chunks
+        size *= 2
+    return None
+
+
 def peakdetect_fft(y_axis, x_axis, pad_len = 20):
     """
     Performs a FFT calculation on the data and zero-pads the results to
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+import numpy
+import peakutils
+from scipy.signal import argrelextrema, cwt, ricker
+
+from cache import LRUCache, hash_values
+from external.peakdetect import peakdetect
+from external.ridgelines import identify_ridge_lines, filter_ridge_lines
+from utils import get_wall_seconds
+
+
+# Методы поиска экстремумов и их параметры
+METHODS = (
+    ('argrelextrema', (('order', 3),)),
+    ('peakutils', (('threshold', 0.15), ('distance', 4))),
+    ('cwt', (('widths', (1, 2, 3, 4)),)),
+    ('peakdetect', (('lookahead', 2), ('delta', 2))),
+)
+
+# Знаков после запятой при сравнении соседей в argrelextrema.
+# Равные средние цен разные движки (History.analyze, инкрементальный
+# анализ, analyze_batch) считают с разной ошибкой округления; после
+# округления они снова равны, а равный соседу — не экстремум
+TIE_DECIMALS = 9
+
+# Результат зависит только от ряда и параметров, поэтому не устаревает
+extremas_cache = LRUCache(max_size=4096)
+
+
+def round_ties(values):
+    return numpy.round(values, TIE_DECIMALS)
+
+
+def find_ridge_peaks(matrix, widths):
+    """find_peaks_cwt с параметрами по умолчанию по готовой матрице cwt."""
+    ridge_lines = identify_ridge_lines(
+        matrix, widths / 4.0, numpy.ceil(widths[0])
+    )
+    filtered = filter_ridge_lines(matrix, ridge_lines)
+    peaks = numpy.asarray([line[1][0] for line in filtered])
+    peaks.sort()
+    return peaks
+
+
+class ExtremaFinder:
+    """
+    Минимумы и максимумы одного ряда методами из METHODS.
+    Ряд приводится к массиву и отражается один раз на все методы,
+    вейвлет-преобразование для cwt считается один раз на минимумы
+    и максимумы. Результаты кэшируются с ключом
+    (метод, отпечаток ряда, параметры).
+    """
+
+    def __init__(self, values, cache=extremas_cache):
+        self.y = numpy.array(values, dtype=numpy.float64)
+        self.hash = hash_values(self.y)
+        self.cache = cache
+        self._negated = None
+
+    @property
+    def negated(self):
+        if self._negated is None:
+            self._negated = -1 * self.y
+        return self._negated
+
+    def find(self, method, parameters=None):
+        if parameters is None:
+            parameters = dict(METHODS)[method]
+        key = (method, self.hash, parameters)
+        extremas = self.cache.get(key)
+        if extremas is None:
+            search = getattr(self, f'find_{method}')
+            minimas, maximas = search(**dict(parameters))
+            extremas = {'minimas': minimas, 'maximas': maximas}
+            self.cache.set(key, extremas)
+        return extremas
+
+    def find_all(self):
+        return {
+            method: self.find(method, parameters)
+            for method, parameters in METHODS
+        }
+
+    def find_argrelextrema(self, order):
+        y = round_ties(self.y)
+        minimas = argrelextrema(y, numpy.less, order=order)[0]
+        maximas = argrelextrema(y, numpy.greater, order=order)[0]
+        return minimas, maximas
+
+    def find_peakutils(self, threshold, distance):
+        maximas = peakutils.peak.indexes(
+            self.y, thres=threshold, min_dist=distance
+        )
+        minimas = peakutils.peak.indexes(
+            self.negated, thres=threshold, min_dist=distance
+        )
+        return minimas, maximas
+
+    def find_cwt(self, widths):
+        widths = numpy.asarray(widths)
+        matrix = cwt(self.y, ricker, widths)
+        # Преобразование линейно: для -y та же матрица с обратным знаком
+        return find_ridge_peaks(-matrix, widths), \
+            find_ridge_peaks(matrix, widths)
+
+    def find_peakdetect(self, lookahead, delta):
+        peaks = peakdetect(self.y, lookahead=lookahead, delta=delta)
+        maximas = [index for index, value in peaks[0]]
+        minimas = [index for index, value in peaks[1]]
+        return minimas, maximas
+
+
+class ExtremaIndex:
+    """
+    Минимумы и максимумы окна истории, упорядоченные по времени.
+    Выборка за последние N дней — один searchsorted и срез.
+    """
+
+    def __init__(self, walls, prices, extremas):
+        self.walls = {}
+        self.prices = {}
+        for kind in ('minimas', 'maximas'):
+            indexes = numpy.asarray(extremas[kind], dtype=numpy.int64)
+            self.walls[kind] = walls[indexes]
+            self.prices[kind] = prices[indexes]
+
+    def get_prices(self, kind, days_count, now=None):
+        """Цены экстремумов kind за последние days_count дней."""
+        now = now or datetime.now()
+        border = get_wall_seconds(now - timedelta(days=days_count))
+        start = numpy.searchsorted(self.walls[kind], border)
+        return self.prices[kind][start:]
+
+    def get_statistics(self, kind, days_count, now=None):
+        prices = self.get_prices(kind, days_count, now)
+        statistics = {'count': len(prices)}
+        for name, function in (('mean', numpy.mean),
+                               ('min', numpy.min),
+                               ('max', numpy.max)):
+            # Пустое окно: цены нет, а не деление на ноль
+            statistics[name] = float(function(prices)) if len(prices) else None
+        return statistics
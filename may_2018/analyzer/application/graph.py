@@ -4,17 +4,14 @@ from datetime import datetime, timedelta
 
 import numpy
 import pandas
-import peakutils
-from scipy.misc import derivative
-import scipy.integrate as integrate
-from scipy.interpolate import interp1d
-from scipy.signal import argrelextrema
-from scipy.signal import find_peaks_cwt
 from matplotlib import pyplot
 import matplotlib.dates as mdates
 from matplotlib.finance import candlestick_ohlc
 
-from external.peakdetect import peakdetect
+from trend import get_trend
+from extremas import ExtremaFinder
+from resampling import Resampler, get_walls
+from profiling import profile
 
 
 class TrendSignals(IntEnum):
@@ -29,6 +26,56 @@ class ExtremaSignals(IntEnum):
     MAX = 1
 
 
+class LazyFrames(dict):
+    """Фреймы, которые строятся при первом обращении по имени."""
+
+    def __init__(self, build):
+        super().__init__()
+        self.build = build
+
+    def __missing__(self, frame_name):
+        frame = self.build(frame_name)
+        self[frame_name] = frame
+        return frame
+
+
+class FrameView:
+    """
+    Окно фрейма без копирования: срез общего фрейма по позициям
+    и отдельная таблица производных колонок этого окна.
+    Исходный фрейм не меняется, окна разной длины делят его данные.
+    """
+
+    def __init__(self, frame, start=0):
+        self.frame = frame.iloc[start:]
+        self.columns = {}
+
+    @property
+    def index(self):
+        return self.frame.index
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, column):
+        return column in self.columns or column in self.frame
+
+    def __getitem__(self, column):
+        if column in self.columns:
+            return self.columns[column]
+        return self.frame[column]
+
+    def __setitem__(self, column, values):
+        if not isinstance(values, pandas.Series):
+            values = pandas.Series(values, index=self.index)
+        self.columns[column] = values
+
+    def to_frame(self):
+        """Собрать окно и его колонки в обычный DataFrame (копия)."""
+        columns = pandas.DataFrame(self.columns, index=self.index)
+        return pandas.concat([self.frame, columns], axis=1)
+
+
 class BaseGraph:
     def __init__(self):
         self.frames = {}
@@ -50,43 +97,28 @@ class BaseGraph:
     @staticmethod
     def crop(frame, days_count):
         border = datetime.now() - timedelta(days=days_count)
-        return frame.loc[border:].copy()
+        return FrameView(frame, frame.index.searchsorted(border))
 
     # --- Analyze --- #
 
     @staticmethod
+    @profile()
     def analyze_trend(frame, column):
-        y = frame[column]
-        x = range(len(y))
-        f = interp1d(x, y, bounds_error=False)
-
-        x_fake = numpy.arange(0.0, len(x), 1.0)
-        dfdx = derivative(f, x_fake, dx=1e-6)
-        dfdx[0] = dfdx[1]
-        dfdx[-1] = dfdx[-2]
-
-        dfdx_pos = []
-        dfdx_neg = []
-        for value in dfdx:
-            if value > 0:
-                dfdx_pos.append(value)
-                dfdx_neg.append(0)
-            elif value < 0:
-                dfdx_pos.append(0)
-                dfdx_neg.append(abs(value))
-            else:
-                dfdx_pos.append(0)
-                dfdx_neg.append(0)
-
-        f_dfdx_pos = interp1d(x, dfdx_pos, bounds_error=False)
-        f_dfdx_neg = interp1d(x, dfdx_neg, bounds_error=False)
-
-        s_dfdx_pos, error = integrate.quad(f_dfdx_pos, x[0], x[-1])
-        s_dfdx_neg, error = integrate.quad(f_dfdx_neg, x[0], x[-1])
+        trend = get_trend(frame[column].values)
+        dfdx = trend['dfdx']
+        dfdx_pos = trend['dfdx_pos']
+        dfdx_neg = trend['dfdx_neg']
+        s_dfdx_pos = trend['s_dfdx_pos']
+        s_dfdx_neg = trend['s_dfdx_neg']
 
         frame[f'{column}_dfdx'] = dfdx
         frame[f'{column}_dfdx_pos'] = dfdx_pos
         frame[f'{column}_dfdx_neg'] = dfdx_neg
+        stats = BaseGraph.get_trend_statistics(column, s_dfdx_pos, s_dfdx_neg)
+        return frame, stats
+
+    @staticmethod
+    def get_trend_statistics(column, s_dfdx_pos, s_dfdx_neg):
         stats = {}
         if s_dfdx_pos > s_dfdx_neg:
             stats[f'{column}_s_dfdx_diff'] = s_dfdx_pos - s_dfdx_neg
@@ -97,41 +129,25 @@ class BaseGraph:
         else:
             stats[f'{column}_s_dfdx_diff'] = 0
             stats[f'{column}_trend'] = TrendSignals.NO
-
-        return frame, stats
+        return stats
 
     @staticmethod
+    @profile()
     def analyze_extremas(frame, column, method):
-        y = numpy.array(frame[column])
-
-        if method == 'argrelextrema':
-            minimas = argrelextrema(y, numpy.less, order=3)[0]
-            maximas = argrelextrema(y, numpy.greater, order=3)[0]
-
-        elif method == 'peakutils':
-            threshold = 0.15
-            distance = 4
-            maximas = peakutils.peak.indexes(
-                y, thres=threshold, min_dist=distance
-            )
-            minimas = peakutils.peak.indexes(
-                -1 * y, thres=threshold, min_dist=distance
-            )
-
-        elif method == 'cwt':
-            maximas = find_peaks_cwt(y, numpy.arange(1, 5))
-            minimas = find_peaks_cwt(-1 * y, numpy.arange(1, 5))
-
-        elif method == 'peakdetect':
-            peaks = peakdetect(y, lookahead=2, delta=2)
-            maximas = [index for index, value in peaks[0]]
-            minimas = [index for index, value in peaks[1]]
-
-        label = f'{column}_{method}_extrema'
-        stats = {label: {'minimas': minimas, 'maximas': maximas}}
+        """method — один из extremas.METHODS или all: все методы сразу."""
+        finder = ExtremaFinder(frame[column])
+        if method == 'all':
+            results = finder.find_all()
+        else:
+            results = {method: finder.find(method)}
+        stats = {
+            f'{column}_{name}_extrema': extremas
+            for name, extremas in results.items()
+        }
         return frame, stats
 
     @staticmethod
+    @profile()
     def analyze_deviation(frame, column, interval):
         rolling = frame[column].rolling(interval)
         label = f'{column}_std_{interval}'
@@ -140,6 +156,7 @@ class BaseGraph:
         return frame, stats
 
     @staticmethod
+    @profile()
     def analyze_mean(frame, column, interval):
         rolling = frame[column].rolling(interval)
         label = f'{column}_mean_{interval}'
@@ -168,12 +185,22 @@ class BaseGraph:
         axis.set_title(title)
 
     @staticmethod
-    def plot_candlestick(axis, frame, label, title=None):
-        frame_ohlc = frame[label].resample('D').ohlc()
-        frame_ohlc.reset_index(inplace=True)
-        frame_ohlc['index'] = frame_ohlc['index'].map(mdates.date2num)
+    def plot_candlestick(axis, frame, label=None, title=None):
+        """
+        Свечи по дням: frame — исходный фрейм и колонка label
+        или уже готовые дневные бары (Pyramid.get_frame('1D')).
+        """
+        if label is None:
+            ohlc, index = frame, frame.index
+        else:
+            resampler = Resampler(get_walls(frame.index), '1D')
+            ohlc, index = resampler.ohlc(frame[label]), resampler.index
+        dates = mdates.date2num(index.to_pydatetime())
+        quotes = numpy.column_stack([dates] + [
+            ohlc[name] for name in ('open', 'high', 'low', 'close')
+        ])
         axis.xaxis_date()
-        candlestick_ohlc(axis, frame_ohlc.values, colorup='green')
+        candlestick_ohlc(axis, quotes, colorup='green')
         axis.set_title(title)
 
     def plot_extremas_helper(self, axis, column, frame_name, method):
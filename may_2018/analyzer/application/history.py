@@ -1,12 +1,48 @@
 import pickle
+from bisect import bisect_left
 from datetime import datetime, timedelta
 
 import numpy
 import pandas
 from flask_rest.database import orm
 
-from utils import get_text_between
-from graph import BaseGraph
+from parsing import parse_price_history, epoch_to_wall
+from graph import BaseGraph, FrameView, LazyFrames
+from pipeline import Pipeline
+from pyramid import Pyramid
+from resampling import get_walls
+from incremental import IncrementalAnalysis
+from extremas import ExtremaIndex
+from profiling import profile
+from utils import DAY
+
+
+# Окна, которые обрезают историю до последних дней
+WINDOWS = {'month': 31, 'week': 7}
+
+# Steam сворачивает часовые точки старше месяца в дневные: при обновлении
+# известные точки за столько последних дней сверяются со страницей
+OVERLAP_DAYS = 35
+
+# Показатели фреймов: (вид, колонка, параметр), см. Pipeline
+PIPELINES = {
+    'daily': Pipeline([
+        ('mean', 'price', '168h'),
+        # TODO: Поискать хороший показатель для rolling
+        ('trend', 'price_mean_168h', None),
+    ]),
+    'month': Pipeline([
+        ('mean', 'price', '168h'),
+        ('trend', 'price_mean_168h', None),
+        ('mean', 'price', '4h'),
+        ('extremas', 'price_mean_4h', 'argrelextrema'),
+        ('deviation', 'price', '24h'),
+    ]),
+    'window': Pipeline([
+        ('mean', 'price', '168h'),
+        ('trend', 'price_mean_168h', None),
+    ]),
+}
 
 
 class History(orm.Model, BaseGraph):
@@ -22,40 +58,42 @@ class History(orm.Model, BaseGraph):
         self.market_hash_name = market_hash_name
 
         self.data = self.parse_response_to_data(response_text)
-        self.frames = {'original': self.parse_data_to_frame(self.data)}
-        self.frames['daily'] = self.get_daily_frame()
-        self.frames['month'] = self.get_month_frame()
-        self.frames['week'] = self.get_week_frame()
+        self.frames = LazyFrames(self.get_frame)
 
-        self.statistics = {key: {} for key in ['daily', 'month', 'week']}
-        self.shortcuts = {key: {} for key in ['daily', 'month', 'week']}
+        self.statistics = {}
+        self.shortcuts = {}
+        self.incremental = None
+        self.pyramid = None
         self.created_at = datetime.now()
 
     @property
     def url(self):
-        name = self.market_hash_name
+        return self.get_url(self.app_id, self.market_hash_name)
+
+    @staticmethod
+    def get_url(app_id, market_hash_name):
+        name = market_hash_name
         replace = [(' ', '%20'), ("'", '%27'), ('(', '%28'), (')', '%29')]
         for before, after in replace:
             name = name.replace(before, after)
         url = f'https://steamcommunity.com/' \
-            f'market/listings/{self.app_id}/{name}'
+            f'market/listings/{app_id}/{name}'
         return url
 
     @staticmethod
+    @profile()
     def parse_response_to_data(response_text):
         # TODO: try/except
-        history = eval(get_text_between(response_text, 'var line1=', ';'))
-        #
-        pattern = '%b %d %Y %H: +0'
-        data = {'date': [], 'price': [], 'count': []}
-        for date, price, count in history:
-            timestamp = datetime.strptime(date, pattern).timestamp()
-            data['date'].append(timestamp)
-            data['price'].append(price)
-            data['count'].append(int(count))
+        dates, prices, counts = parse_price_history(response_text)
+        data = {
+            'date': dates.tolist(),
+            'price': prices.tolist(),
+            'count': counts.tolist(),
+        }
         return data
 
     @staticmethod
+    @profile()
     def parse_data_to_frame(data):
         data_copy = data.copy()
         index = data_copy.pop('date')
@@ -63,82 +101,167 @@ class History(orm.Model, BaseGraph):
         frame = pandas.DataFrame(data_copy, index=index)
         return frame
 
-    def get_daily_frame(self):
-        return self.frames['original'].resample('D').mean()
-
-    def get_month_frame(self):
-        return self.crop(self.frames['original'], days_count=31)
-
-    def get_week_frame(self):
-        return self.crop(self.frames['original'], days_count=7)
+    def get_frame(self, frame_name):
+        """
+        Построить фрейм по имени: original, daily, month, week
+        или произвольное окно вида 14d (последние 14 дней).
+        """
+        if frame_name == 'original':
+            return self.parse_data_to_frame(self.data)
+        if frame_name == 'daily':
+            return self.get_daily_frame()
+        return self.get_window_frame(self.get_days_count(frame_name))
 
+    @staticmethod
+    def get_days_count(frame_name):
+        if frame_name in WINDOWS:
+            return WINDOWS[frame_name]
+        if frame_name.endswith('d') and frame_name[:-1].isdigit():
+            return int(frame_name[:-1])
+        raise KeyError(frame_name)
+
+    @profile()
+    def get_daily_frame(self):
+        frame = self.get_pyramid().get_frame('1D')
+        return FrameView(frame[['price', 'count']])
+
+    def get_pyramid(self):
+        """
+        Бары истории в разрешениях 1h, 4h, 1D и 7D. Строятся по точкам
+        истории при первом обращении, дальше update дописывает только
+        новые точки.
+        """
+        if getattr(self, 'pyramid', None) is None:
+            self.pyramid = Pyramid()
+            dates = numpy.asarray(self.data['date'], dtype=numpy.int64)
+            self.pyramid.extend(
+                epoch_to_wall(dates), self.data['price'], self.data['count']
+            )
+        return self.pyramid
+
+    @profile()
+    def get_window_frame(self, days_count):
+        return self.crop(self.frames['original'], days_count=days_count)
+
+    def get_view(self, frame_name):
+        """
+        Фрейм и его статистика. Анализируется только запрошенный фрейм
+        и только при первом обращении. После update фреймы строятся
+        заново, и их производные колонки считаются при обращении.
+        """
+        if frame_name not in self.statistics or frame_name not in self.frames:
+            analyze = getattr(self, f'analyze_{frame_name}_frame', None)
+            if analyze:
+                analyze()
+            else:
+                self.analyze_window_frame(frame_name)
+        return self.frames[frame_name], self.statistics[frame_name]
+
+    @profile()
     def analyze_daily_frame(self):
-        frame_name = 'daily'
-        frame = self.frames[frame_name].copy()
-        statistics = self.statistics[frame_name].copy()
-
-        frame, stats = self.analyze_mean(frame, 'price', '168h')
-        statistics.update(stats)
-
-        # TODO: Поискать хороший показатель для rolling
-        frame, stats = self.analyze_trend(frame, 'price_mean_168h')
-        statistics.update(stats)
-
-        self.frames[frame_name] = frame
-        self.statistics[frame_name].update(statistics)
-        trend = self.statistics[frame_name]['price_mean_168h_trend']
-        self.shortcuts[frame_name]['trend'] = trend
+        self.analyze_frame('daily', PIPELINES['daily'])
 
+    @profile()
     def analyze_month_frame(self):
-        frame_name = 'month'
-        frame = self.frames[frame_name].copy()
-        statistics = self.statistics[frame_name].copy()
-
-        frame, stats = self.analyze_mean(frame, 'price', '168h')
-        statistics.update(stats)
-
-        frame, stats = self.analyze_trend(frame, 'price_mean_168h')
-        statistics.update(stats)
-
-        frame, stats = self.analyze_mean(frame, 'price', '4h')
-        statistics.update(stats)
-
-        frame, stats = self.analyze_extremas(
-            frame, 'price_mean_4h', 'argrelextrema'
-        )
-        statistics.update(stats)
-
-        frame, stats = self.analyze_deviation(frame, 'price', '24h')
-        statistics.update(stats)
-
-        self.frames[frame_name] = frame
-        self.statistics[frame_name].update(statistics)
-        trend = self.statistics[frame_name]['price_mean_168h_trend']
-        self.shortcuts[frame_name]['trend'] = trend
+        self.analyze_frame('month', PIPELINES['month'])
 
     def analyze_week_frame(self):
-        frame_name = 'week'
-        frame = self.frames[frame_name].copy()
-        statistics = self.statistics[frame_name].copy()
+        self.analyze_window_frame('week')
 
-        frame, stats = self.analyze_mean(frame, 'price', '168h')
-        statistics.update(stats)
-
-        # TODO: Поискать хороший показатель для rolling
-        frame, stats = self.analyze_trend(frame, 'price_mean_168h')
-        statistics.update(stats)
+    @profile()
+    def analyze_window_frame(self, frame_name):
+        self.analyze_frame(frame_name, PIPELINES['window'])
 
-        self.frames[frame_name] = frame
-        self.statistics[frame_name].update(statistics)
+    def analyze_frame(self, frame_name, pipeline):
+        frame, statistics = pipeline.run(self.frames[frame_name])
+        self.statistics[frame_name] = statistics
         trend = self.statistics[frame_name]['price_mean_168h_trend']
-        self.shortcuts[frame_name]['trend'] = trend
+        self.shortcuts[frame_name] = {'trend': trend}
 
     def analyze(self):
-        self.analyze_daily_frame()
-        self.analyze_month_frame()
-        self.analyze_week_frame()
+        for frame_name in ('daily', 'month', 'week'):
+            self.get_view(frame_name)
+
+        self.days_count = len(self.frames['daily'])
+        frame, statistics = self.get_view('month')
+        self.extremas = ExtremaIndex(
+            get_walls(frame.index), numpy.asarray(frame['price']),
+            statistics['price_mean_4h_argrelextrema_extrema']
+        )
+
+        self.daily_trend = self.shortcuts['daily']['trend']
+        self.month_trend = self.shortcuts['month']['trend']
+        self.week_trend = self.shortcuts['week']['trend']
 
-        self.days_count = self.frames['daily'].shape[0]
+    def get_new_points(self, response_text):
+        """
+        Точки страницы начиная с последней известной. None, если
+        известные точки последних OVERLAP_DAYS дней разошлись
+        со страницей, например Steam свернул часы в один день.
+        """
+        known = self.data['date']
+        if not known:
+            return parse_price_history(response_text)
+        start = bisect_left(known, known[-1] - OVERLAP_DAYS * DAY)
+        dates, prices, counts = parse_price_history(response_text, known[start])
+
+        # Цена и продажи последней точки ещё меняются: Steam дописывает час
+        size = len(known) - start
+        same = numpy.array_equal(dates[:size], known[start:]) and all(
+            numpy.array_equal(values[:size - 1], self.data[key][start:-1])
+            for key, values in (('price', prices), ('count', counts))
+        )
+        if not same:
+            return None
+        return dates[size - 1:], prices[size - 1:], counts[size - 1:]
+
+    def rebuild(self, response_text):
+        """Разобрать страницу заново и сбросить накопленное состояние."""
+        self.data = self.parse_response_to_data(response_text)
+        self.frames = LazyFrames(self.get_frame)
+        self.statistics = {}
+        self.shortcuts = {}
+        self.incremental = None
+        self.pyramid = None
+
+    @profile()
+    def update(self, response_text, now=None):
+        """
+        Дописать точки со страницы, которые новее последней известной,
+        и обновить статистику инкрементально, без пересборки фреймов.
+        Фреймы сбрасываются и при обращении строятся заново. Если старые
+        точки на странице изменились, история строится заново.
+        """
+        points = self.get_new_points(response_text)
+        if points is None:
+            self.rebuild(response_text)
+            points = self.get_new_points(response_text)
+
+        if getattr(self, 'incremental', None) is None:
+            self.incremental = IncrementalAnalysis()
+            self.incremental.extend(self.data['date'], self.data['price'], now)
+
+        pyramid = self.get_pyramid()
+        dates, prices, counts = points
+        if len(dates):
+            # Точки дописываются на месте: работа по числу новых точек
+            if self.data['date'] and self.data['date'][-1] == dates[0]:
+                # Steam дописывает текущий час: последняя точка меняется
+                for values in self.data.values():
+                    values.pop()
+            self.data['date'].extend(dates.tolist())
+            self.data['price'].extend(prices.tolist())
+            self.data['count'].extend(counts.tolist())
+            self.frames = LazyFrames(self.get_frame)
+        self.incremental.extend(dates, prices, now)
+        pyramid.extend(epoch_to_wall(dates), prices, counts)
+
+        self.statistics, self.shortcuts = self.incremental.get_statistics()
+        self.days_count = len(self.incremental.days)
+        self.extremas = ExtremaIndex(
+            *self.incremental.get_points('month'),
+            self.statistics['month']['price_mean_4h_argrelextrema_extrema']
+        )
 
         self.daily_trend = self.shortcuts['daily']['trend']
         self.month_trend = self.shortcuts['month']['trend']
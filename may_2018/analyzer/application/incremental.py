@@ -0,0 +1,437 @@
+from datetime import datetime, timedelta
+
+import numpy
+
+from graph import BaseGraph
+from extremas import round_ties
+from parsing import epoch_to_wall
+from trend import split_derivative
+from utils import DAY, get_seconds, get_wall_seconds
+
+
+class Buffer:
+    """Массив с запасом по размеру: дописывание в конец за O(1) в среднем."""
+
+    def __init__(self, dtype, values=()):
+        self.data = numpy.empty(max(len(values), 16), dtype=dtype)
+        self.size = 0
+        self.extend(values)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def values(self):
+        return self.data[:self.size]
+
+    def reserve(self, size):
+        if size > len(self.data):
+            data = numpy.empty(max(size, 2 * len(self.data)), self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+    def extend(self, values):
+        values = numpy.asarray(values, dtype=self.data.dtype)
+        size = self.size + len(values)
+        self.reserve(size)
+        self.data[self.size:size] = values
+        self.size = size
+
+    def truncate(self, size):
+        self.size = min(self.size, size)
+
+    def resize(self, size, fill):
+        if size > self.size:
+            self.reserve(size)
+            self.data[self.size:size] = fill
+        self.size = size
+
+
+class Series:
+    """
+    Ряд точек (время, значение) с префиксными суммами значений,
+    их квадратов и количества. NaN считается пропуском.
+    """
+
+    def __init__(self):
+        self.walls = Buffer(numpy.int64)
+        self.values = Buffer(numpy.float64)
+        self.sums = Buffer(numpy.float64, [0.0])
+        self.squares = Buffer(numpy.float64, [0.0])
+        self.counts = Buffer(numpy.int64, [0])
+        self.reference = None
+
+    def __len__(self):
+        return len(self.walls)
+
+    def truncate(self, size):
+        self.walls.truncate(size)
+        self.values.truncate(size)
+        for prefix in (self.sums, self.squares, self.counts):
+            prefix.truncate(size + 1)
+
+    def extend(self, walls, values):
+        values = numpy.asarray(values, dtype=numpy.float64)
+        valid = ~numpy.isnan(values)
+        if self.reference is None and valid.any():
+            # Суммы считаются от первого значения, чтобы не терять
+            # точность дисперсии на больших ценах
+            self.reference = values[valid][0]
+        centered = numpy.where(valid, values - (self.reference or 0.0), 0.0)
+
+        self.walls.extend(walls)
+        self.values.extend(values)
+        for prefix, column in ((self.sums, centered),
+                               (self.squares, centered ** 2),
+                               (self.counts, valid)):
+            prefix.extend(prefix.values[-1] + numpy.cumsum(column))
+
+    def get_windows(self, positions, interval, start):
+        """Суммы по окнам (t - interval, t], обрезанным слева по start."""
+        walls = self.walls.values
+        lows = numpy.searchsorted(walls, walls[positions] - interval, 'right')
+        lows = numpy.maximum(lows, start)
+        highs = positions + 1
+        return [
+            prefix.values[highs] - prefix.values[lows]
+            for prefix in (self.sums, self.squares, self.counts)
+        ]
+
+    def get_means(self, positions, interval, start):
+        sums, squares, counts = self.get_windows(positions, interval, start)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts + (self.reference or 0.0)
+        return numpy.where(counts > 0, means, numpy.nan)
+
+    def get_deviations(self, positions, interval, start):
+        sums, squares, counts = self.get_windows(positions, interval, start)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            variances = (squares - sums ** 2 / counts) / (counts - 1)
+        deviations = numpy.sqrt(variances.clip(min=0))
+        return numpy.where(counts > 1, deviations, numpy.nan)
+
+
+class RangeSum:
+    """
+    Сумма вкладов позиций из диапазона [low, high).
+    При обновлении пересчитываются только изменённые позиции
+    и позиции, вошедшие в диапазон или покинувшие его.
+    """
+
+    def __init__(self):
+        self.contributions = Buffer(numpy.float64)
+        self.low = self.high = 0
+        self.total = 0.0
+
+    def update(self, low, high, dirty, values):
+        high = max(low, high)
+        self.contributions.resize(
+            max(high, len(self.contributions)), 0.0
+        )
+        contributions = self.contributions.values
+
+        leaving = numpy.concatenate([
+            numpy.arange(self.low, min(low, self.high)),
+            numpy.arange(max(high, self.low), self.high),
+        ])
+        kept = dirty[(dirty >= max(low, self.low)) &
+                     (dirty < min(high, self.high))]
+        self.total -= contributions[leaving].sum() + \
+            contributions[kept].sum()
+
+        contributions[dirty] = values
+        kept = dirty[(dirty >= max(low, self.low)) &
+                     (dirty < min(high, self.high))]
+        entering = numpy.concatenate([
+            numpy.arange(low, min(high, self.low)),
+            numpy.arange(max(low, self.high), high),
+        ])
+        self.total += contributions[kept].sum() + \
+            contributions[entering].sum()
+        self.low, self.high = low, high
+
+
+class RollingColumn:
+    """Колонка price_mean_<interval> или price_std_<interval> окна."""
+
+    def __init__(self, window, kind, interval):
+        self.window = window
+        self.kind = kind
+        self.label = f'price_{kind}_{interval}'
+        self.interval = get_seconds(interval)
+        self.values = Buffer(numpy.float64)
+
+    def refresh(self, old_start, dirty_from):
+        series = self.window.series
+        start, end = self.window.start, self.window.end
+        self.values.resize(end, numpy.nan)
+
+        dirty = [numpy.arange(max(dirty_from, start), end)]
+        pivot = max(start, old_start)
+        if start != old_start and pivot:
+            # Окна точек у левой границы обрезаются по-новому
+            walls = series.walls.values
+            border = walls[pivot - 1] + self.interval
+            front_end = numpy.searchsorted(walls, border)
+            dirty.append(numpy.arange(start, min(front_end, end)))
+        dirty = numpy.unique(numpy.concatenate(dirty))
+
+        if self.kind == 'mean':
+            values = series.get_means(dirty, self.interval, start)
+        else:
+            values = series.get_deviations(dirty, self.interval, start)
+        self.values.values[dirty] = values
+        return dirty
+
+
+def expand(positions, distance, low, high):
+    """Позиции на расстоянии не больше distance, в пределах [low, high)."""
+    shifts = numpy.arange(-distance, distance + 1)
+    expanded = numpy.unique((positions[:, None] + shifts).ravel())
+    return expanded[(expanded >= low) & (expanded < high)]
+
+
+class TrendTracker:
+    """Интегралы trend.get_trend по колонке окна."""
+
+    def __init__(self, column):
+        self.column = column
+        self.positive = RangeSum()
+        self.negative = RangeSum()
+
+    def refresh(self, dirty, old_start, old_end):
+        start, end = self.column.window.start, self.column.window.end
+        dirty = expand(dirty, 1, start + 1, end - 1)
+
+        values = self.column.values.values
+        slopes_before = values[dirty] - values[dirty - 1]
+        slopes_after = values[dirty + 1] - values[dirty]
+        dfdx_pos, dfdx_neg = split_derivative(
+            (slopes_after + slopes_before) / 2
+        )
+        self.positive.update(start + 1, end - 1, dirty, dfdx_pos)
+        self.negative.update(start + 1, end - 1, dirty, dfdx_neg)
+
+    def get_statistics(self):
+        start, end = self.column.window.start, self.column.window.end
+        integrals = [0.0, 0.0]
+        if end - start > 2:
+            # Крайние точки повторяют производную соседей
+            for index, part in enumerate((self.positive, self.negative)):
+                edges = part.contributions.values[[start + 1, end - 2]]
+                integrals[index] = part.total + edges.sum() / 2
+        return BaseGraph.get_trend_statistics(self.column.label, *integrals)
+
+
+class ExtremaTracker:
+    """
+    argrelextrema(..., order, mode='clip') по колонке окна,
+    с округлением соседей как в ExtremaFinder.
+    """
+
+    def __init__(self, column, order=3):
+        self.column = column
+        self.order = order
+        self.label = f'{column.label}_argrelextrema_extrema'
+        self.minimas = Buffer(bool)
+        self.maximas = Buffer(bool)
+
+    def refresh(self, dirty, old_start, old_end):
+        start, end = self.column.window.start, self.column.window.end
+        self.minimas.resize(end, False)
+        self.maximas.resize(end, False)
+
+        # Кандидаты у краёв окна сравнивались с обрезанными соседями
+        candidates = numpy.concatenate([
+            dirty,
+            numpy.arange(start, start + self.order),
+            numpy.arange(old_end - self.order - 1, end),
+        ])
+        dirty = expand(candidates, self.order, start, end)
+
+        values = self.column.values.values
+        centers = round_ties(values[dirty])
+        minimas = numpy.ones(len(dirty), dtype=bool)
+        maximas = numpy.ones(len(dirty), dtype=bool)
+        with numpy.errstate(invalid='ignore'):
+            for shift in range(1, self.order + 1):
+                for neighbours in (dirty + shift, dirty - shift):
+                    neighbours = neighbours.clip(start, max(end - 1, start))
+                    neighbours = round_ties(values[neighbours])
+                    minimas &= centers < neighbours
+                    maximas &= centers > neighbours
+        self.minimas.values[dirty] = minimas
+        self.maximas.values[dirty] = maximas
+
+    def get_statistics(self):
+        start, end = self.column.window.start, self.column.window.end
+        extremas = {
+            'minimas': numpy.nonzero(self.minimas.values[start:end])[0],
+            'maximas': numpy.nonzero(self.maximas.values[start:end])[0],
+        }
+        return {self.label: extremas}
+
+
+class AverageTracker:
+    """Среднее колонки по окну без NaN, как frame[label].mean()."""
+
+    def __init__(self, column):
+        self.column = column
+        self.sums = RangeSum()
+        self.counts = RangeSum()
+
+    def refresh(self, dirty, old_start, old_end):
+        start, end = self.column.window.start, self.column.window.end
+        values = self.column.values.values[dirty]
+        valid = ~numpy.isnan(values)
+        self.sums.update(start, end, dirty, numpy.where(valid, values, 0.0))
+        self.counts.update(start, end, dirty, valid)
+
+    def get_statistics(self):
+        mean = numpy.nan
+        if round(self.counts.total):
+            mean = self.sums.total / round(self.counts.total)
+        return {self.column.label: mean}
+
+
+class Window:
+    """
+    Окно ряда: весь ряд или последние days_count дней,
+    как BaseGraph.crop. Колонки и статистики окна обновляются
+    только для изменившихся позиций.
+    """
+
+    def __init__(self, series, days_count=None):
+        self.series = series
+        self.days_count = days_count
+        self.start = self.end = 0
+        self.columns = []
+        self.trackers = []
+
+    def add_column(self, kind, interval):
+        column = RollingColumn(self, kind, interval)
+        self.columns.append(column)
+        return column
+
+    def add_tracker(self, tracker):
+        self.trackers.append(tracker)
+
+    def update(self, dirty_from, now):
+        old_start, old_end = self.start, self.end
+        self.end = len(self.series)
+        if self.days_count:
+            border = get_wall_seconds(now - timedelta(days=self.days_count))
+            walls = self.series.walls.values
+            self.start = int(numpy.searchsorted(walls, border))
+        if self.start < old_start:
+            dirty_from = old_start = self.start
+
+        for column in self.columns:
+            dirty = column.refresh(old_start, dirty_from)
+            for tracker in self.trackers:
+                if tracker.column is column:
+                    tracker.refresh(dirty, old_start, old_end)
+
+    def get_points(self):
+        start, end = self.start, self.end
+        return (
+            self.series.walls.values[start:end],
+            self.series.values.values[start:end],
+        )
+
+    def get_statistics(self):
+        statistics = {}
+        for tracker in self.trackers:
+            statistics.update(tracker.get_statistics())
+        return statistics
+
+
+class IncrementalAnalysis:
+    """
+    Состояние анализа одной истории, как после History.analyze().
+    Новые точки добавляются через extend, и статистика обновляется
+    за время, пропорциональное новым данным и ширине окон.
+    """
+
+    def __init__(self):
+        self.points = Series()
+        self.days = Series()
+        self.first_day = None
+        self.last_date = None
+
+        self.windows = {
+            'daily': Window(self.days),
+            'month': Window(self.points, days_count=31),
+            'week': Window(self.points, days_count=7),
+        }
+        for window in self.windows.values():
+            column = window.add_column('mean', '168h')
+            window.add_tracker(TrendTracker(column))
+
+        month = self.windows['month']
+        month.add_tracker(ExtremaTracker(month.add_column('mean', '4h')))
+        month.add_tracker(AverageTracker(month.add_column('std', '24h')))
+
+    def extend(self, dates, prices, now=None):
+        """
+        Добавить точки не старше последней. Точка с той же датой,
+        что и последняя, заменяет её: Steam дописывает текущий час.
+        """
+        now = now or datetime.now()
+        dates = numpy.asarray(dates, dtype=numpy.int64)
+        prices = numpy.asarray(prices, dtype=numpy.float64)
+        if self.last_date is not None:
+            recent = dates >= self.last_date
+            dates, prices = dates[recent], prices[recent]
+
+        position = len(self.points)
+        if len(dates):
+            if dates[0] == self.last_date:
+                position -= 1
+            self.points.truncate(position)
+            self.points.extend(epoch_to_wall(dates), prices)
+            self.last_date = int(dates[-1])
+
+        day_position = self.update_days(position)
+        self.windows['daily'].update(day_position, now)
+        self.windows['month'].update(position, now)
+        self.windows['week'].update(position, now)
+        return len(dates)
+
+    def update_days(self, position):
+        """Пересчитать средние за дни, в которые попали новые точки."""
+        if position >= len(self.points):
+            return len(self.days)
+
+        walls = self.points.walls.values
+        if self.first_day is None:
+            self.first_day = walls[0] // DAY
+        # Пустые дни между прошлой и новой точкой тоже дописываются
+        first = min(walls[position] // DAY, self.first_day + len(self.days))
+        days = numpy.arange(first, walls[-1] // DAY + 2)
+        bounds = numpy.searchsorted(walls, days * DAY)
+
+        sums, counts = [
+            numpy.diff(prefix.values[bounds])
+            for prefix in (self.points.sums, self.points.counts)
+        ]
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts + self.points.reference
+        means[counts == 0] = numpy.nan
+
+        day_position = int(days[0] - self.first_day)
+        self.days.truncate(day_position)
+        self.days.extend(days[:-1] * DAY, means)
+        return day_position
+
+    def get_points(self, frame_name):
+        return self.windows[frame_name].get_points()
+
+    def get_statistics(self):
+        statistics = {}
+        shortcuts = {}
+        for frame_name, window in self.windows.items():
+            statistics[frame_name] = window.get_statistics()
+            trend = statistics[frame_name]['price_mean_168h_trend']
+            shortcuts[frame_name] = {'trend': trend}
+        return statistics, shortcuts
@@ -0,0 +1,113 @@
+import uuid
+from time import time
+from queue import Queue
+from threading import Thread, Lock
+from collections import deque
+
+
+class Job:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, function, args):
+        self.id = uuid.uuid4().hex
+        self.function = function
+        self.args = args
+        self.status = self.QUEUED
+        self.result = None
+        self.error = None
+
+        self.submitted_at = time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    @property
+    def queued_time(self):
+        return (self.started_at or time()) - self.submitted_at
+
+    @property
+    def running_time(self):
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time()) - self.started_at
+
+    def run(self):
+        self.started_at = time()
+        self.status = self.RUNNING
+        try:
+            self.result = self.function(*self.args)
+            self.status = self.DONE
+        except Exception as error:
+            self.error = repr(error)
+            self.status = self.FAILED
+        self.finished_at = time()
+
+    def as_dict(self):
+        result = {
+            'id': self.id,
+            'status': self.status,
+            'queued_time': self.queued_time,
+            'running_time': self.running_time,
+        }
+        return result
+
+
+class JobQueue:
+    """
+    Очередь задач с ограниченным размером и workers_count потоками.
+    Завершённые задачи хранятся, пока их не больше finished_size.
+    """
+
+    def __init__(self, workers_count=4, size=1000, finished_size=10000):
+        self.queue = Queue(maxsize=size)
+        self.jobs = {}
+        self.finished = deque()
+        self.finished_size = finished_size
+        self.lock = Lock()
+
+        self.workers = [
+            Thread(target=self.work, daemon=True)
+            for _ in range(workers_count)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, function, *args):
+        """Поставить задачу в очередь; queue.Full, если она заполнена."""
+        job = Job(function, args)
+        with self.lock:
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            job.run()
+            with self.lock:
+                self.finished.append(job.id)
+                while len(self.finished) > self.finished_size:
+                    del self.jobs[self.finished.popleft()]
+            self.queue.task_done()
+
+    def get_statistics(self):
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        statistics = {
+            'workers': len(self.workers),
+            'queue_size': self.queue.qsize(),
+            'queue_max_size': self.queue.maxsize,
+        }
+        for status in (Job.QUEUED, Job.RUNNING, Job.DONE, Job.FAILED):
+            statistics[status] = statuses.count(status)
+        return statistics
@@ -0,0 +1,125 @@
+import time
+
+import numpy
+
+from utils import get_text_between
+from profiling import profile
+
+
+MONTHS = (
+    'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec',
+)
+
+# ["Mar 13 2018 01: +0",0.63,"154"] -> 3 13 2018 01 +0 0.63 154
+ROW_WIDTH = 7
+SEPARATORS = str.maketrans('[]",:', '     ')
+
+
+def wall_to_epoch(seconds):
+    """
+    Перевести наивное время (секунды от 1970-01-01 без учёта зоны)
+    в timestamp так же, как это делает datetime.timestamp():
+    наивное время считается локальным.
+    """
+    if not len(seconds):
+        return seconds
+    bounds = (int(seconds.min()), int(seconds.max()))
+    offsets = {_get_local_offset(value) for value in bounds}
+    if not time.daylight and offsets == {time.timezone}:
+        return seconds + time.timezone
+
+    unique, inverse = numpy.unique(seconds, return_inverse=True)
+    epochs = [
+        value + _get_local_offset(value) for value in unique.tolist()
+    ]
+    return numpy.array(epochs, dtype=numpy.int64)[inverse]
+
+
+def epoch_to_wall(epochs):
+    """
+    Обратное к wall_to_epoch: вернуть наивное локальное время
+    в секундах, как у datetime.fromtimestamp().
+    """
+    if not len(epochs):
+        return epochs
+    bounds = (int(epochs.min()), int(epochs.max()))
+    offsets = {time.localtime(value).tm_gmtoff for value in bounds}
+    if not time.daylight and offsets == {-time.timezone}:
+        return epochs - time.timezone
+
+    unique, inverse = numpy.unique(epochs, return_inverse=True)
+    walls = [
+        value + time.localtime(value).tm_gmtoff for value in unique.tolist()
+    ]
+    return numpy.array(walls, dtype=numpy.int64)[inverse]
+
+
+def _get_local_offset(seconds):
+    fields = time.gmtime(seconds)[:8] + (-1,)
+    return int(time.mktime(fields)) - seconds
+
+
+def get_date_label(epoch):
+    """Вернуть дату точки в формате line1: Mar 13 2018 01: +0."""
+    wall = epoch_to_wall(numpy.array([epoch], dtype=numpy.int64))[0]
+    moment = time.gmtime(wall)
+    return f'{MONTHS[moment.tm_mon - 1]} {moment.tm_mday:02d} ' \
+        f'{moment.tm_year} {moment.tm_hour:02d}: +0'
+
+
+def get_history_key(response_text):
+    """
+    Дешёвый отпечаток истории на странице без разбора точек: их число
+    и последняя точка текстом. Меняется, когда Steam дописывает час
+    или сворачивает часы в день.
+    """
+    chunk = get_text_between(response_text, 'var line1=', ';')
+    return chunk.count('["'), chunk[chunk.rfind('["'):]
+
+
+@profile()
+def parse_price_history(response_text, since=None):
+    """
+    Разобрать массив line1 со страницы предмета за один проход.
+    Вернуть три numpy-массива: timestamp (int64), цену (float64)
+    и количество продаж (int32).
+    Если задан since, разобрать только точки начиная с этого timestamp:
+    хвост массива ищется по дате точки since.
+    """
+    chunk = get_text_between(response_text, 'var line1=', ';')
+    if since is not None:
+        position = chunk.rfind('["' + get_date_label(since))
+        if position >= 0:
+            chunk = '[' + chunk[position:]
+
+    length = chunk.count('["')
+
+    dates = numpy.empty(length, dtype=numpy.int64)
+    prices = numpy.empty(length, dtype=numpy.float64)
+    counts = numpy.empty(length, dtype=numpy.int32)
+    if not length:
+        return dates, prices, counts
+
+    for number, name in enumerate(MONTHS, 1):
+        chunk = chunk.replace(name, str(number))
+    values = numpy.fromstring(chunk.translate(SEPARATORS), sep=' ')
+    if values.size != length * ROW_WIDTH:
+        raise ValueError('Unexpected price history format')
+
+    rows = values.reshape(length, ROW_WIDTH)
+    months, days, years, hours, offsets = rows[:, :5].astype(numpy.int64).T
+    if (months < 1).any() or (months > 12).any() or offsets.any():
+        raise ValueError('Unexpected date format in price history')
+
+    months = (years - 1970) * 12 + months - 1
+    days += months.astype('datetime64[M]').astype('datetime64[D]') \
+        .astype(numpy.int64) - 1
+
+    dates[:] = wall_to_epoch(days * 86400 + hours * 3600)
+    prices[:] = rows[:, 5]
+    counts[:] = rows[:, 6]
+    if since is not None:
+        recent = dates >= since
+        return dates[recent], prices[recent], counts[recent]
+    return dates, prices, counts
@@ -0,0 +1,97 @@
+import numpy
+
+from graph import BaseGraph
+from resampling import get_walls
+from profiling import profiler
+from utils import get_seconds
+
+
+class Pass:
+    """
+    Один проход по фрейму: границы окон (t - interval, t] и префиксные
+    суммы колонок считаются по разу и общие для всех показателей.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.walls = get_walls(frame.index)
+        self.ends = numpy.arange(1, len(self.walls) + 1)
+        self.starts = {}
+        self.prefixes = {}
+
+    def get_starts(self, interval):
+        if interval not in self.starts:
+            borders = self.walls - get_seconds(interval)
+            self.starts[interval] = numpy.searchsorted(
+                self.walls, borders, 'right'
+            )
+        return self.starts[interval]
+
+    def get_prefixes(self, column):
+        """Префиксные суммы значений, их квадратов и количества без NaN."""
+        if column not in self.prefixes:
+            values = numpy.asarray(self.frame[column], dtype=numpy.float64)
+            valid = ~numpy.isnan(values)
+            # Суммы считаются от первого значения, чтобы не терять
+            # точность дисперсии на больших ценах
+            reference = values[valid][0] if valid.any() else 0.0
+            centered = numpy.where(valid, values - reference, 0.0)
+            prefixes = []
+            for part in (centered, centered ** 2, valid.astype(numpy.int64)):
+                prefix = numpy.zeros(len(part) + 1, dtype=part.dtype)
+                numpy.cumsum(part, out=prefix[1:])
+                prefixes.append(prefix)
+            self.prefixes[column] = reference, prefixes
+        return self.prefixes[column]
+
+    def get_windows(self, column, interval):
+        reference, prefixes = self.get_prefixes(column)
+        starts = self.get_starts(interval)
+        windows = [prefix[self.ends] - prefix[starts] for prefix in prefixes]
+        return reference, windows
+
+    def mean(self, column, interval):
+        reference, (sums, squares, counts) = self.get_windows(column, interval)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts + reference
+        label = f'{column}_mean_{interval}'
+        self.frame[label] = numpy.where(counts > 0, means, numpy.nan)
+        return {}
+
+    def deviation(self, column, interval):
+        reference, (sums, squares, counts) = self.get_windows(column, interval)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            variances = (squares - sums ** 2 / counts) / (counts - 1)
+        deviations = numpy.sqrt(variances.clip(min=0))
+        label = f'{column}_std_{interval}'
+        self.frame[label] = numpy.where(counts > 1, deviations, numpy.nan)
+        return {label: self.frame[label].mean()}
+
+    def trend(self, column, parameter=None):
+        frame, stats = BaseGraph.analyze_trend(self.frame, column)
+        return stats
+
+    def extremas(self, column, method):
+        frame, stats = BaseGraph.analyze_extremas(self.frame, column, method)
+        return stats
+
+
+class Pipeline:
+    """
+    Анализ фрейма, объявленный списком показателей
+    (вид, колонка, параметр), где вид — mean, deviation, trend
+    или extremas, как у методов BaseGraph.analyze_*.
+    Скользящие показатели делят границы окон и префиксные суммы,
+    поэтому ряд не сканируется заново для каждого из них.
+    """
+
+    def __init__(self, indicators):
+        self.indicators = tuple(indicators)
+
+    def run(self, frame):
+        fused = Pass(frame)
+        statistics = {}
+        for kind, column, parameter in self.indicators:
+            with profiler.stage(f'Pipeline.{kind}'):
+                statistics.update(getattr(fused, kind)(column, parameter))
+        return frame, statistics
@@ -0,0 +1,148 @@
+import tracemalloc
+from functools import wraps
+from threading import Lock
+from timeit import default_timer
+from contextlib import contextmanager
+from collections import deque
+
+import numpy
+
+
+# Границы корзин гистограмм: время в секундах и память в байтах
+# (отрицательные изменения памяти попадают в первую корзину)
+TIME_BOUNDS = tuple(10.0 ** power for power in range(-5, 2))
+SIZE_BOUNDS = tuple(4 ** power for power in range(5, 16))
+
+
+def summarize(values, bounds):
+    """Среднее, перцентили и гистограмма по корзинам bounds."""
+    counts = numpy.bincount(
+        numpy.searchsorted(bounds, values, 'right'),
+        minlength=len(bounds) + 1
+    )
+    labels = [f'<{bound}' for bound in bounds] + [f'>={bounds[-1]}']
+    p50, p90, p99 = numpy.percentile(values, [50, 90, 99]).tolist()
+    summary = {
+        'mean': float(values.mean()),
+        'p50': p50,
+        'p90': p90,
+        'p99': p99,
+        'max': float(values.max()),
+        'histogram': dict(zip(labels, counts.tolist())),
+    }
+    return summary
+
+
+class Stage:
+    """Последние size замеров этапа: время и изменение занятой памяти."""
+
+    def __init__(self, size=1000):
+        self.times = deque(maxlen=size)
+        self.memory_deltas = deque(maxlen=size)
+        self.count = 0
+        self.total_time = 0.0
+
+    def add(self, seconds, memory_delta=None):
+        self.count += 1
+        self.total_time += seconds
+        self.times.append(seconds)
+        if memory_delta is not None:
+            self.memory_deltas.append(memory_delta)
+
+    def get_statistics(self):
+        statistics = {
+            'count': self.count,
+            'total_time': self.total_time,
+            'recent_count': len(self.times),
+        }
+        if self.times:
+            statistics['time'] = summarize(
+                numpy.array(self.times), TIME_BOUNDS
+            )
+        if self.memory_deltas:
+            statistics['memory_delta'] = summarize(
+                numpy.array(self.memory_deltas), SIZE_BOUNDS
+            )
+        return statistics
+
+
+class Profiler:
+    """
+    Время и память этапов анализа. Выключенный профайлер стоит одной
+    проверки флага на вызов. Если включён trace_memory, для этапа
+    пишется memory_delta: насколько изменилась занятая память
+    по tracemalloc. Это не объём выделенного: память, выделенная
+    и освобождённая внутри этапа, не видна, а выделенная другими
+    потоками за это время учитывается. tracemalloc замедляет весь
+    процесс, поэтому память по умолчанию не отслеживается.
+    """
+
+    def __init__(self, size=1000):
+        self.enabled = False
+        self.size = size
+        self.stages = {}
+        self.lock = Lock()
+
+    def enable(self, trace_memory=False):
+        self.enabled = True
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def record(self, name, seconds, memory_delta=None):
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = Stage(self.size)
+            stage.add(seconds, memory_delta)
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        started_at = default_timer()
+        try:
+            yield
+        finally:
+            seconds = default_timer() - started_at
+            memory_delta = None
+            if tracing and tracemalloc.is_tracing():
+                memory_delta = tracemalloc.get_traced_memory()[0] - before
+            self.record(name, seconds, memory_delta)
+
+    def profile(self, name=None):
+        """Декоратор: замерять каждый вызов функции как этап name."""
+        def decorate(function):
+            stage_name = name or function.__qualname__
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.stage(stage_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def get_statistics(self):
+        with self.lock:
+            stages = list(self.stages.items())
+            statistics = {
+                'enabled': self.enabled,
+                'memory': tracemalloc.is_tracing(),
+                'stages': {
+                    name: stage.get_statistics() for name, stage in stages
+                },
+            }
+        return statistics
+
+
+profiler = Profiler()
+profile = profiler.profile
@@ -0,0 +1,213 @@
+import numpy
+import pandas
+
+from incremental import Buffer
+from resampling import Resampler
+from utils import DAY, get_seconds
+
+
+LEVELS = ('1h', '4h', '1D', '7D')
+
+# Открытие, максимум, минимум и закрытие считаются по барам с ценой
+PRICES = ('open', 'high', 'low', 'close')
+# Суммы складываются: volume — проданные предметы, sum и points — сумма
+# и количество цен, rows — точки, turnover и traded — оборот и продажи
+# по точкам с ценой
+SUMS = ('volume', 'sum', 'points', 'rows', 'turnover', 'traded')
+
+
+def get_point_columns(prices, counts):
+    """Точки истории как бары из одной точки."""
+    prices = numpy.asarray(prices, dtype=numpy.float64)
+    counts = numpy.asarray(counts, dtype=numpy.float64)
+    valid = ~numpy.isnan(prices)
+    traded = numpy.where(valid, counts, 0.0)
+    columns = {name: prices for name in PRICES}
+    columns.update({
+        'volume': counts,
+        'sum': numpy.where(valid, prices, 0.0),
+        'points': valid.astype(numpy.float64),
+        'rows': numpy.ones(len(prices)),
+        'turnover': numpy.where(valid, prices, 0.0) * traded,
+        'traded': traded,
+    })
+    return columns
+
+
+def aggregate(buckets, columns, count):
+    """
+    Свернуть бары в count более крупных баров. buckets — номера
+    крупных баров, не убывают. Пустые бары: NaN цены и нулевые суммы.
+    """
+    result = {
+        name: numpy.bincount(buckets, columns[name], minlength=count)
+        for name in SUMS
+    }
+    valid = columns['points'] > 0
+    buckets = buckets[valid]
+    for name in PRICES:
+        result[name] = numpy.full(count, numpy.nan)
+    if not len(buckets):
+        return result
+
+    starts = numpy.flatnonzero(
+        numpy.concatenate([[True], buckets[1:] != buckets[:-1]])
+    )
+    ends = numpy.concatenate([starts[1:], [len(buckets)]])
+    present = buckets[starts]
+    result['open'][present] = columns['open'][valid][starts]
+    result['high'][present] = numpy.maximum.reduceat(
+        columns['high'][valid], starts
+    )
+    result['low'][present] = numpy.minimum.reduceat(
+        columns['low'][valid], starts
+    )
+    result['close'][present] = columns['close'][valid][ends - 1]
+    return result
+
+
+class Bars:
+    """Бары одного разрешения: по Buffer на поле."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.size = get_seconds(interval)
+        self.fields = {
+            name: Buffer(numpy.float64) for name in PRICES + SUMS
+        }
+
+    def __len__(self):
+        return len(self.fields['rows'])
+
+    def get_columns(self, start=0):
+        return {
+            name: buffer.values[start:] for name, buffer in self.fields.items()
+        }
+
+    def replace(self, start, columns):
+        """Заменить бары начиная с номера start."""
+        for name, buffer in self.fields.items():
+            buffer.truncate(start)
+            buffer.extend(columns[name])
+
+
+class Pyramid:
+    """
+    Бары OHLCV истории в нескольких разрешениях (1h, 4h, 1D, 7D).
+    Сетка отсчитывается от полуночи дня первой точки, как у Resampler.
+    Новые точки пересчитывают только последние бары каждого уровня:
+    часовые — из точек, остальные — из баров предыдущего уровня.
+    Пирамида живёт в памяти вместе с History. Из неё строится только
+    дневной фрейм (уровень 1D). Тренд и разброс месячного и недельного
+    окон считаются скользящими окнами по самим точкам, а не по барам.
+    """
+
+    def __init__(self, levels=LEVELS):
+        self.levels = [Bars(interval) for interval in levels]
+        for child, parent in zip(self.levels, self.levels[1:]):
+            if parent.size % child.size:
+                raise ValueError(
+                    f'{parent.interval} is not a multiple of {child.interval}'
+                )
+        self.origin = None
+        self.last_wall = None
+        # Точки последнего бара нижнего уровня: он ещё может измениться
+        self.tail = get_point_columns([], [])
+        self.tail_walls = numpy.empty(0, dtype=numpy.int64)
+
+    def extend(self, walls, prices, counts):
+        """
+        Добавить точки не старше последней (наивное время в секундах).
+        Точка с тем же временем, что и последняя, заменяет её.
+        """
+        walls = numpy.asarray(walls, dtype=numpy.int64)
+        columns = get_point_columns(prices, counts)
+        if self.last_wall is not None:
+            recent = walls >= self.last_wall
+            walls = walls[recent]
+            columns = {
+                name: values[recent] for name, values in columns.items()
+            }
+        if not len(walls):
+            return 0
+        if self.origin is None:
+            self.origin = walls[0] // DAY * DAY
+
+        bottom = self.levels[0]
+        tail_walls, tail = self.tail_walls, self.tail
+        if walls[0] == self.last_wall:
+            tail_walls = tail_walls[:-1]
+            tail = {name: values[:-1] for name, values in tail.items()}
+        # Точки бара, в который попала первая новая точка
+        first = (walls[0] - self.origin) // bottom.size
+        kept = (tail_walls - self.origin) // bottom.size == first
+        walls = numpy.concatenate([tail_walls[kept], walls])
+        columns = {
+            name: numpy.concatenate([tail[name][kept], values])
+            for name, values in columns.items()
+        }
+
+        buckets = (walls - self.origin) // bottom.size
+        last = buckets[-1]
+        # Пустые бары между прошлой и новой точкой тоже дописываются
+        first = min(first, len(bottom))
+        bottom.replace(first, aggregate(buckets - first, columns,
+                                        last - first + 1))
+        recent = buckets == last
+        self.tail_walls = walls[recent]
+        self.tail = {name: values[recent] for name, values in columns.items()}
+        self.last_wall = int(walls[-1])
+
+        for child, parent in zip(self.levels, self.levels[1:]):
+            first = min(first * child.size // parent.size, len(parent))
+            start = first * parent.size // child.size
+            positions = numpy.arange(start, len(child))
+            buckets = positions * child.size // parent.size - first
+            parent.replace(first, aggregate(
+                buckets, child.get_columns(start), buckets[-1] + 1
+            ))
+        return len(walls)
+
+    def get_bars(self, interval):
+        """Самый крупный уровень, из баров которого складывается interval."""
+        size = get_seconds(interval)
+        for bars in reversed(self.levels):
+            if not size % bars.size:
+                return bars
+        raise ValueError(f'{interval} is not a multiple of any level')
+
+    def get_frame(self, interval):
+        """
+        Бары interval как DataFrame: open, high, low, close, volume, vwap,
+        price (средняя цена) и count (среднее продаж на точку), как
+        resample(interval) по исходному фрейму.
+        """
+        bars = self.get_bars(interval)
+        columns = bars.get_columns()
+        walls = numpy.empty(0, dtype=numpy.int64)
+        if len(bars):
+            # Часы до первой точки в resample не попадают
+            start = int(numpy.argmax(columns['rows'] > 0))
+            columns = bars.get_columns(start)
+            walls = self.origin + bars.size * numpy.arange(start, len(bars))
+        if get_seconds(interval) != bars.size and len(walls):
+            resampler = Resampler(walls, interval)
+            columns = aggregate(resampler.buckets, columns, resampler.count)
+            walls = resampler.walls
+
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            data = {
+                'price': columns['sum'] / columns['points'],
+                'count': columns['volume'] / columns['rows'],
+                'vwap': columns['turnover'] / columns['traded'],
+            }
+        for name, total in (('price', 'points'), ('count', 'rows'),
+                            ('vwap', 'traded')):
+            data[name][columns[total] == 0] = numpy.nan
+        for name in PRICES + ('volume',):
+            data[name] = columns[name]
+
+        index = pandas.DatetimeIndex(
+            walls.astype('datetime64[s]').astype('datetime64[ns]')
+        )
+        return pandas.DataFrame(data, index=index)
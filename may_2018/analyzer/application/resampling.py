@@ -0,0 +1,98 @@
+import numpy
+import pandas
+
+from utils import DAY, get_seconds
+
+
+def get_walls(index):
+    """Наивное время DatetimeIndex в секундах от 1970-01-01."""
+    return index.values.astype('datetime64[s]').astype(numpy.int64)
+
+
+class Resampler:
+    """
+    Разбиение упорядоченного по времени ряда на интервалы длины
+    interval ('1h', '4h', '1D', '7D'), как frame.resample(interval):
+    сетка интервалов отсчитывается от полуночи дня первой точки, метка
+    интервала — его начало, пустые интервалы внутри ряда сохраняются.
+    Номер интервала точки — целочисленное деление, свёртки —
+    numpy.bincount и ufunc.reduceat вместо groupby.
+    """
+
+    def __init__(self, walls, interval):
+        self.interval = interval
+        self.size = get_seconds(interval)
+        walls = numpy.asarray(walls, dtype=numpy.int64)
+        origin = 0
+        if len(walls):
+            # Сетка от полуночи, первый интервал — тот, где первая точка
+            midnight = walls[0] // DAY * DAY
+            origin = midnight + (walls[0] - midnight) // self.size * self.size
+        self.buckets = (walls - origin) // self.size
+        self.count = int(self.buckets[-1]) + 1 if len(walls) else 0
+        self.walls = origin + self.size * numpy.arange(self.count)
+
+    @property
+    def index(self):
+        return pandas.DatetimeIndex(
+            self.walls.astype('datetime64[s]').astype('datetime64[ns]'),
+            freq=self.interval
+        )
+
+    def _get_valid(self, values):
+        values = numpy.asarray(values, dtype=numpy.float64)
+        valid = ~numpy.isnan(values)
+        return self.buckets[valid], values[valid]
+
+    def mean(self, values):
+        buckets, values = self._get_valid(values)
+        sums = numpy.bincount(buckets, values, minlength=self.count)
+        counts = numpy.bincount(buckets, minlength=self.count)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return numpy.where(counts > 0, sums / counts, numpy.nan)
+
+    def sum(self, values):
+        """Сумма по интервалу, 0 для пустых; целые остаются целыми."""
+        values = numpy.asarray(values)
+        if values.dtype.kind in 'iub':
+            sums = numpy.bincount(self.buckets, values, minlength=self.count)
+            return sums.astype(numpy.int64)
+        buckets, values = self._get_valid(values)
+        return numpy.bincount(buckets, values, minlength=self.count)
+
+    def ohlc(self, values):
+        """Первое, максимальное, минимальное и последнее значение без NaN."""
+        buckets, values = self._get_valid(values)
+        result = {
+            name: numpy.full(self.count, numpy.nan)
+            for name in ('open', 'high', 'low', 'close')
+        }
+        if not len(values):
+            return result
+
+        starts = numpy.flatnonzero(
+            numpy.concatenate([[True], buckets[1:] != buckets[:-1]])
+        )
+        ends = numpy.concatenate([starts[1:], [len(values)]])
+        present = buckets[starts]
+        result['open'][present] = values[starts]
+        result['high'][present] = numpy.maximum.reduceat(values, starts)
+        result['low'][present] = numpy.minimum.reduceat(values, starts)
+        result['close'][present] = values[ends - 1]
+        return result
+
+    def vwap(self, prices, volumes):
+        """Средняя цена, взвешенная по количеству проданных предметов."""
+        prices = numpy.asarray(prices, dtype=numpy.float64)
+        volumes = numpy.asarray(volumes, dtype=numpy.float64)
+        valid = ~numpy.isnan(prices) & ~numpy.isnan(volumes)
+        buckets = self.buckets[valid]
+        turnovers = numpy.bincount(
+            buckets, prices[valid] * volumes[valid], minlength=self.count
+        )
+        totals = numpy.bincount(buckets, volumes[valid], minlength=self.count)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return numpy.where(totals > 0, turnovers / totals, numpy.nan)
+
+    def to_frame(self, columns):
+        return pandas.DataFrame(columns, index=self.index)
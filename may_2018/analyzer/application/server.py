@@ -1,6 +1,15 @@
+import json
+from queue import Full
 from ast import literal_eval
+from threading import Lock
+from datetime import datetime, timedelta
+from concurrent.futures import (
+    ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+)
 
-from flask import Flask, request
+import numpy
+
+from flask import Flask, Response, request
 from flask_classy import FlaskView, route
 from flask_rest.views import BaseAPIViewSet
 from flask_rest.response import response
@@ -8,25 +17,241 @@ from flask_rest.request import get_parameters
 from flask_rest.application import initialize
 
 from steamapi.api import SteamAPI
-from history import History
+from history import History, WINDOWS
+from batch import analyze_batch
+from parsing import epoch_to_wall
+from extremas import ExtremaIndex
+from cache import LRUCache, ResultCache
+from jobs import JobQueue
+from profiling import profiler
+from scheduling import (
+    PRIORITY_DEFAULT, PRIORITY_BACKGROUND, RequestRejected, scheduler
+)
+from utils import get_wall_seconds
 
 
 application, orm = initialize()
 
 api = SteamAPI()
 
+# Истории по market_hash_name: повторный запрос дописывает только новые
+# точки. У каждой истории свой замок, давно не нужные вытесняются
+histories = LRUCache(
+    max_size=application.config.get('ANALYZER_HISTORIES_SIZE', 1024)
+)
+
+# Параметры, от которых зависит ответ analyze: часть ключа кэша
+ANALYSIS_PARAMETERS = (
+    ('deviation', 'price_std_24h'),
+    ('extremas', 'price_mean_4h_argrelextrema_extrema'),
+    ('profitable_days', 7),
+    ('trend', 'price_mean_168h_trend'),
+)
+results = ResultCache()
+
+# Загрузка страниц упирается в сеть и лимиты Steam, анализ — в процессор
+# и GIL. Страницы загружаются не чаще, чем пускает планировщик
+fetchers = ThreadPoolExecutor(max_workers=16)
+analyzers = ProcessPoolExecutor()
+
+# Сколько секунд загрузка ждёт своей очереди у планировщика: дольше —
+# RequestRejected, для пакета это строка с ошибкой по предмету
+FETCH_TIMEOUT = application.config.get('ANALYZER_FETCH_TIMEOUT', 60)
+
+# Загруженные для analyze_batch истории анализируются пачками такого размера
+BATCH_SIZE = application.config.get('ANALYZER_BATCH_SIZE', 64)
+
+jobs = JobQueue(
+    workers_count=application.config.get('ANALYZER_JOB_WORKERS', 4),
+    size=application.config.get('ANALYZER_JOB_QUEUE_SIZE', 1000),
+)
+
+# Замеры этапов анализа для /stats; выключенные почти ничего не стоят.
+# Память отслеживает tracemalloc во всём процессе: включать для отладки
+if application.config.get('ANALYZER_PROFILING', False):
+    profiler.enable(
+        trace_memory=application.config.get('ANALYZER_PROFILING_MEMORY', False)
+    )
+
+
+def fetch_price_history(market_hash_name, priority=PRIORITY_DEFAULT):
+    # Пакеты и задачи ждут за запросами /analyze
+    scheduler.acquire('listings', priority, FETCH_TIMEOUT)
+    with profiler.stage('SteamAPI.get_price_history'):
+        return api.get_price_history(market_hash_name)
+
+
+def analyze_stored_item(market_hash_name):
+    """
+    Анализ по хранимой истории предмета. Если страница не изменилась,
+    ответ берётся из кэша без разбора. Пока история обновляется
+    и анализируется, её замок держит только этот предмет.
+    """
+    xresponse = fetch_price_history(market_hash_name)
+    key = results.make_key(market_hash_name, xresponse.text, ANALYSIS_PARAMETERS)
+    data = results.get(key)
+    if data is not None:
+        return data
 
-def find_profitable_price(history, mode):
-    from datetime import datetime, timedelta
+    entry = histories.setdefault(
+        market_hash_name, {'lock': Lock(), 'history': None}
+    )
+    with entry['lock']:
+        history = entry['history']
+        if history is None:
+            history = History(api.market['app_id'], market_hash_name, xresponse.text)
+            entry['history'] = history
+        history.update(xresponse.text)
+        data = analyze_history(history)
+        results.set(key, data)
+    return data
+
+
+def find_profitable_price(extremas, mode):
+    # Средняя цена экстремумов за последние дни; None, если их не было
+    parameters = dict(ANALYSIS_PARAMETERS)
+    statistics = extremas.get_statistics(mode, parameters['profitable_days'])
+    return statistics['mean']
+
+
+def summarize(url, statistics, extremas):
+    parameters = dict(ANALYSIS_PARAMETERS)
+    data = {
+        'trend': statistics['daily'][parameters['trend']].value,
+        'deviation': statistics['month'][parameters['deviation']],
+        'link': url,
+        'buy_price': find_profitable_price(extremas, 'minimas'),
+        'sell_price': find_profitable_price(extremas, 'maximas'),
+    }
+    return data
+
+
+def analyze_history(history):
+    return summarize(history.url, history.statistics, history.extremas)
+
+
+def analyze_chunk(app_id, market_hash_names, datas):
+    """Анализ нескольких историй одним analyze_batch в процессе пула."""
+    parameters = dict(ANALYSIS_PARAMETERS)
     now = datetime.now()
-    week_ago = now - timedelta(days=7)
-    recent_prices = []
-    for index in history.statistics['month']['price_mean_4h_argrelextrema_extrema'][mode][::-1]:
-        if history.frames['month'].index[index] < week_ago:
-            break
-        recent_prices.append(history.frames['month']['price'][index])
+    border = get_wall_seconds(now - timedelta(days=WINDOWS['month']))
+    summaries = []
+    for market_hash_name, data, (statistics, shortcuts) in zip(
+            market_hash_names, datas, analyze_batch(datas, now)):
+        # Индексы экстремумов — позиции точек месячного окна
+        walls = epoch_to_wall(numpy.asarray(data['date'], dtype=numpy.int64))
+        month = walls >= border
+        extremas = ExtremaIndex(
+            walls[month], numpy.asarray(data['price'])[month],
+            statistics['month'][parameters['extremas']]
+        )
+        url = History.get_url(app_id, market_hash_name)
+        summaries.append(summarize(url, statistics, extremas))
+    return summaries
+
+
+def analyze_response(app_id, market_hash_name, response_text):
+    """Анализ одной страницы в процессе пула."""
+    history = History(app_id, market_hash_name, response_text)
+    history.analyze()
+    return analyze_history(history)
 
-    return sum(recent_prices) / len(recent_prices)
+
+def analyze_item(item_name_id, market_hash_name):
+    data = results.get_recent(market_hash_name, ANALYSIS_PARAMETERS)
+    if data is None:
+        xresponse = fetch_price_history(market_hash_name, PRIORITY_BACKGROUND)
+        key = results.make_key(market_hash_name, xresponse.text, ANALYSIS_PARAMETERS)
+        data = results.get(key)
+        if data is None:
+            future = analyzers.submit(
+                analyze_response, api.market['app_id'], market_hash_name, xresponse.text
+            )
+            data = future.result()
+            results.set(key, data)
+    return dict(data, item_name_id=item_name_id, market_hash_name=market_hash_name)
+
+
+def prepare_item(market_hash_name):
+    """
+    Результат из кэша, если он есть, иначе None с ключом кэша
+    и разобранной историей для анализа.
+    """
+    data = results.get_recent(market_hash_name, ANALYSIS_PARAMETERS)
+    if data is not None:
+        return data, None, None
+    xresponse = fetch_price_history(market_hash_name, PRIORITY_BACKGROUND)
+    key = results.make_key(market_hash_name, xresponse.text, ANALYSIS_PARAMETERS)
+    data = results.get(key)
+    if data is not None:
+        return data, None, None
+    return None, key, History.parse_response_to_data(xresponse.text)
+
+
+def format_item(item, data=None, error=None):
+    item_name_id, market_hash_name = item
+    if error is not None:
+        data = {'error': repr(error)}
+    data = dict(data, item_name_id=item_name_id, market_hash_name=market_hash_name)
+    return json.dumps(data) + '\n'
+
+
+def submit_chunk(chunk, chunks):
+    future = analyzers.submit(
+        analyze_chunk, api.market['app_id'],
+        [item[1] for item, key, history_data in chunk],
+        [history_data for item, key, history_data in chunk],
+    )
+    chunks[future] = chunk
+    return future
+
+
+def analyze_items(items):
+    """
+    Результаты анализа строками JSON в порядке готовности. Страницы
+    загружаются параллельно, загруженные истории анализируются
+    пачками по BATCH_SIZE: analyze_batch в процессах пула.
+    """
+    fetches = {
+        fetchers.submit(prepare_item, item[1]): item for item in items
+    }
+    chunks = {}
+    chunk = []
+    pending = set(fetches)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future in chunks:
+                analyzed = chunks.pop(future)
+                try:
+                    summaries = future.result()
+                except Exception as error:
+                    for item, key, history_data in analyzed:
+                        yield format_item(item, error=error)
+                    continue
+                for (item, key, history_data), data in zip(analyzed, summaries):
+                    results.set(key, data)
+                    yield format_item(item, data)
+                continue
+
+            item = fetches.pop(future)
+            try:
+                data, key, history_data = future.result()
+            except Exception as error:
+                yield format_item(item, error=error)
+                continue
+            if data is not None:
+                yield format_item(item, data)
+                continue
+            chunk.append((item, key, history_data))
+            if len(chunk) >= BATCH_SIZE:
+                pending.add(submit_chunk(chunk, chunks))
+                chunk = []
+
+        # Неполная пачка уходит, когда загружать больше нечего
+        if chunk and not fetches:
+            pending.add(submit_chunk(chunk, chunks))
+            chunk = []
 
 
 class AnalyzerAPIViewSet(FlaskView):
@@ -37,17 +262,64 @@ class AnalyzerAPIViewSet(FlaskView):
         args = ('item_name_id', 'market_hash_name')
         parameters = get_parameters(args, args)
 
-        xresponse = api.get_price_history(parameters['market_hash_name'])
-        history = History(api.market['app_id'], parameters['market_hash_name'], xresponse.text)
-        history.analyze()
-        buy_price = find_profitable_price(history, 'minimas')
-        sell_price = find_profitable_price(history, 'maximas')
+        market_hash_name = parameters['market_hash_name']
+        data = results.get_recent(market_hash_name, ANALYSIS_PARAMETERS)
+        if data is None:
+            try:
+                data = analyze_stored_item(market_hash_name)
+            except RequestRejected:
+                return response(503, error='Steam request queue is full')
+        return response(200, data)
+
+    @route('/analyze_batch', methods=['POST'])
+    def analyze_batch(self):
+        # items=[(item_name_id, market_hash_name), ...]
+        parameters = get_parameters(('items',), ('items',))
+        items = literal_eval(parameters['items'])
+        return Response(analyze_items(items), mimetype='application/x-ndjson')
+
+    @route('/jobs/submit', methods=['POST'])
+    def submit_job(self):
+        args = ('item_name_id', 'market_hash_name')
+        parameters = get_parameters(args, args)
+        try:
+            job = jobs.submit(
+                analyze_item, parameters['item_name_id'], parameters['market_hash_name']
+            )
+        except Full:
+            return response(503, error='Job queue is full')
+        return response(202, job.as_dict())
+
+    @route('/jobs/<job_id>/status', methods=['GET'])
+    def job_status(self, job_id):
+        job = jobs.get(job_id)
+        if not job:
+            return response(404)
+        return response(200, job.as_dict())
+
+    @route('/jobs/<job_id>/result', methods=['GET'])
+    def job_result(self, job_id):
+        job = jobs.get(job_id)
+        if not job:
+            return response(404)
+        data = job.as_dict()
+        if not job.is_finished:
+            return response(202, data)
+        data['result'] = job.result
+        data['error'] = job.error
+        return response(200, data)
+
+    @route('/stats', methods=['GET'])
+    def stats(self):
+        return response(200, profiler.get_statistics())
+
+    @route('/status', methods=['GET'])
+    def status(self):
         data = {
-            'trend': history.statistics['daily']['price_mean_168h_trend'].value,
-            'deviation': history.statistics['month']['price_std_24h'],
-            'link': history.url,
-            'buy_price': buy_price,
-            'sell_price': sell_price,
+            'cache': results.get_statistics(),
+            'histories': histories.get_statistics(),
+            'jobs': jobs.get_statistics(),
+            'scheduler': scheduler.get_statistics(),
         }
         return response(200, data)
 
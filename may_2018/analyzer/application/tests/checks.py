@@ -0,0 +1,19 @@
+import numpy
+
+
+def assert_same_statistics(result, expected):
+    """Статистика фреймов совпадает: индексы, сигналы и числа."""
+    for frame_name, statistics in expected.items():
+        assert result[frame_name].keys() == statistics.keys(), frame_name
+        for key, value in statistics.items():
+            if isinstance(value, dict):
+                for name in value:
+                    assert numpy.array_equal(
+                        result[frame_name][key][name], value[name]
+                    ), (frame_name, key, name)
+            elif key.endswith('_trend'):
+                assert result[frame_name][key] == value, (frame_name, key)
+            else:
+                assert numpy.isclose(
+                    result[frame_name][key], value, equal_nan=True
+                ), (frame_name, key)
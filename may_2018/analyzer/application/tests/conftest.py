@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+
+# Модули приложения лежат плоско, рядом с папкой tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# scheduling.py общий с march_2018: в контейнер он монтируется
+# из docker-compose.yml, в тестах берётся оттуда же
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    *[os.pardir] * 4, 'march_2018', 'application', 'steam'
+))
+
+pytest.register_assert_rewrite('checks')
@@ -0,0 +1,29 @@
+import pytest
+
+from batch import analyze_batch
+from history import History
+from benchmark import generate_steam_history, format_response_text
+from checks import assert_same_statistics
+
+
+# Короткие и длинные истории, с разными первыми и последними днями
+SIZES = (1, 5, 60, 700, 3000)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_batch_matches_analyze_on_mixed_lengths(seed):
+    histories = []
+    for size in SIZES:
+        rows = generate_steam_history(size, seed=seed * len(SIZES) + size)
+        history = History(730, 'item', format_response_text(rows))
+        history.analyze()
+        histories.append(history)
+
+    results = analyze_batch([history.data for history in histories])
+    for history, (statistics, shortcuts) in zip(histories, results):
+        assert_same_statistics(statistics, history.statistics)
+        assert shortcuts == history.shortcuts
+
+
+def test_batch_of_nothing():
+    assert analyze_batch([]) == []
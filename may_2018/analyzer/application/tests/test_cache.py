@@ -0,0 +1,93 @@
+from cache import LRUCache, ResultCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_setdefault_keeps_existing_value():
+    cache = LRUCache(max_size=2)
+    first = cache.setdefault('a', {'lock': 1})
+    assert cache.setdefault('a', {'lock': 2}) is first
+    assert cache.get_statistics()['hits'] == 1
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_page(rows):
+    points = ','.join(f'["Mar {day:02d} 2018 01: +0",{price},"{count}"]'
+                      for day, price, count in rows)
+    return f'<script>var line1=[{points}];</script>'
+
+
+PARAMETERS = (('trend', 'price_mean_168h_trend'),)
+PAGE = make_page([(13, 0.63, 154), (14, 0.61, 98)])
+
+
+def test_result_cache_key_follows_page_tail():
+    key = ResultCache.make_key('item', PAGE, PARAMETERS)
+    # Старые точки в ключ не входят: их сверяет History.update
+    same_tail = make_page([(13, 0.5, 1), (14, 0.61, 98)])
+    assert key == ResultCache.make_key('item', same_tail, PARAMETERS)
+    for rows in ([(13, 0.63, 154), (14, 0.61, 99)],
+                 [(13, 0.63, 154), (14, 0.61, 98), (15, 0.6, 1)],
+                 [(14, 0.61, 98)]):
+        assert key != ResultCache.make_key('item', make_page(rows), PARAMETERS)
+
+
+def test_result_cache_expires_entries_and_latest():
+    clock = Clock()
+    cache = ResultCache(ttl=10, clock=clock)
+    key = cache.make_key('item', PAGE, PARAMETERS)
+    cache.set(key, {'trend': 1})
+    assert cache.get_recent('item', PARAMETERS) == {'trend': 1}
+
+    clock.now = 9.9
+    assert cache.get(key) == {'trend': 1}
+    clock.now = 10
+    assert cache.get_recent('item', PARAMETERS) is None
+    assert cache.get(key) is None
+    assert cache.entries == {} and cache.latest == {}
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_size=2)
+    keys = [
+        cache.make_key(name, PAGE, PARAMETERS) for name in ('a', 'b', 'c')
+    ]
+    cache.set(keys[0], 0)
+    cache.set(keys[1], 1)
+    assert cache.get(keys[0]) == 0
+    cache.set(keys[2], 2)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get_recent('b', PARAMETERS) is None
+    assert set(cache.latest) == {('a', PARAMETERS), ('c', PARAMETERS)}
+    assert cache.get_statistics()['size'] == 2
+
+
+def test_result_cache_get_recent_returns_latest_result():
+    cache = ResultCache()
+    old_key = cache.make_key('item', PAGE, PARAMETERS)
+    new_page = make_page([(13, 0.63, 154), (14, 0.61, 98), (15, 0.6, 1)])
+    new_key = cache.make_key('item', new_page, PARAMETERS)
+    cache.set(old_key, 'old')
+    cache.set(new_key, 'new')
+    assert cache.get_recent('item', PARAMETERS) == 'new'
+    assert cache.get_recent('item', (('trend', 'other'),)) is None
+    assert cache.get_recent('other', PARAMETERS) is None
+    assert cache.get(old_key) == 'old'
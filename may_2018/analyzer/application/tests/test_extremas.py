@@ -0,0 +1,29 @@
+import numpy
+import pytest
+
+from cache import LRUCache
+from extremas import METHODS, ExtremaFinder
+from benchmark import generate_prices, find_extremas_separately
+
+
+@pytest.mark.parametrize('size', [50, 1000, 5000])
+def test_finder_matches_separate_methods(size):
+    values = generate_prices(size) * 10
+    expected = find_extremas_separately(values)
+    cache = LRUCache()
+    # Второй проход отвечает из кэша
+    for extremas in (ExtremaFinder(values, cache).find_all(),
+                     ExtremaFinder(values, cache).find_all()):
+        for method, parameters in METHODS:
+            for kind in ('minimas', 'maximas'):
+                assert numpy.array_equal(
+                    extremas[method][kind], expected[method][kind]
+                ), (method, kind)
+    assert cache.get_statistics()['hits'] == len(METHODS)
+
+
+def test_argrelextrema_ignores_rounding_ties():
+    # 0.1 + 0.2 != 0.3, но для поиска экстремумов это ничья
+    values = [1.0, 1.0, 0.1 + 0.2, 0.3, 1.0, 1.0]
+    extremas = ExtremaFinder(values, LRUCache()).find('argrelextrema')
+    assert list(extremas['minimas']) == []
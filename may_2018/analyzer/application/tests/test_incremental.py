@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+import pytest
+
+from history import History
+from benchmark import generate_steam_history, format_response_text
+from checks import assert_same_statistics
+
+
+def replay(rows, updates_count):
+    """
+    История, дописанная по часу: каждый раз страница целиком,
+    как при повторном запросе.
+    """
+    known = len(rows) - updates_count
+    response_text = format_response_text(rows[:known])
+    history = History(730, 'item', response_text)
+    history.update(response_text)
+    for index in range(known + 1, len(rows) + 1):
+        history.update(format_response_text(rows[:index]))
+    return history
+
+
+# Цены округлены до 0.001, как на странице: равные скользящие средние
+# часто стоят рядом, и ничьи разрешаются одинаково (extremas.round_ties)
+@pytest.mark.parametrize('seed', range(12))
+def test_update_matches_analyze(seed):
+    rows = generate_steam_history(3000, seed=seed)
+    history = replay(rows, updates_count=24)
+
+    expected = History(730, 'item', format_response_text(rows))
+    expected.analyze()
+    assert history.data == expected.data
+    assert_same_statistics(history.statistics, expected.statistics)
+    assert history.shortcuts == expected.shortcuts
+    assert history.days_count == expected.days_count
+    for kind in ('minimas', 'maximas'):
+        assert (history.extremas.walls[kind] == expected.extremas.walls[kind]).all()
+        assert (history.extremas.prices[kind] == expected.extremas.prices[kind]).all()
+
+
+@pytest.mark.parametrize('size', [2, 30, 800])
+def test_update_matches_analyze_on_short_histories(size):
+    rows = generate_steam_history(size, seed=size)
+    history = replay(rows, updates_count=1)
+
+    expected = History(730, 'item', format_response_text(rows))
+    expected.analyze()
+    assert_same_statistics(history.statistics, expected.statistics)
+
+
+def collapse_hours(rows, first, last):
+    """
+    Свернуть часовые точки дней [first, last] в одну точку на день,
+    как Steam поступает с точками старше месяца.
+    """
+    collapsed = []
+    days = {}
+    for date, price, count in rows:
+        day = date.date()
+        if not first <= day <= last:
+            collapsed.append((date, price, count))
+            continue
+        if day not in days:
+            days[day] = [date.replace(hour=1), [], 0]
+            collapsed.append(days[day])
+        days[day][1].append(price)
+        days[day][2] += count
+    return [
+        (row[0], sum(row[1]) / len(row[1]), row[2]) if isinstance(row, list)
+        else row
+        for row in collapsed
+    ]
+
+
+def test_update_rebuilds_collapsed_hours():
+    rows = generate_steam_history(3000, seed=1)
+    history = replay(rows[:-1], updates_count=1)
+
+    # Час дописан, а часы месячной давности свёрнуты в дни
+    last = rows[-1][0].date() - timedelta(days=31)
+    collapsed = collapse_hours(rows, last - timedelta(days=2), last)
+    assert len(collapsed) < len(rows)
+    history.update(format_response_text(collapsed))
+
+    expected = History(730, 'item', format_response_text(collapsed))
+    expected.analyze()
+    assert history.data == expected.data
+    assert_same_statistics(history.statistics, expected.statistics)
+
+
+def test_update_appends_points_in_place():
+    rows = generate_steam_history(500, seed=3)
+    history = replay(rows, updates_count=1)
+    dates = history.data['date']
+    # Steam дописал текущий час, потом начал следующий
+    date, price, count = rows[-1]
+    rows = rows[:-1] + [(date, price, count + 1)]
+    history.update(format_response_text(rows))
+    rows = rows + [(date + timedelta(hours=1), price, 1)]
+    history.update(format_response_text(rows))
+    assert history.data['date'] is dates
+    assert len(dates) == len(rows)
+    assert history.data['count'][-2:] == [count + 1, 1]
+
+
+def test_views_after_update_have_derived_columns():
+    rows = generate_steam_history(3000, seed=2)
+    history = replay(rows, updates_count=3)
+
+    expected = History(730, 'item', format_response_text(rows))
+    expected.analyze()
+    for frame_name in ('daily', 'month', 'week', '14d'):
+        frame, statistics = history.get_view(frame_name)
+        expected_frame, expected_statistics = expected.get_view(frame_name)
+        for column in ('price_mean_168h', 'price_mean_168h_trend'):
+            if column in expected_frame:
+                assert column in frame, (frame_name, column)
+        assert_same_statistics(
+            {frame_name: statistics}, {frame_name: expected_statistics}
+        )
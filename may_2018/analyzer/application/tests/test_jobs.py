@@ -0,0 +1,103 @@
+import time
+from queue import Full
+from threading import Event
+
+import pytest
+
+import server
+from jobs import Job, JobQueue
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+class Gate:
+    """Задача, которая ждёт open(); started — что она началась."""
+
+    def __init__(self):
+        self.started = Event()
+        self.opened = Event()
+
+    def __call__(self, value):
+        self.started.set()
+        self.opened.wait(5)
+        if value is None:
+            raise ValueError('no value')
+        return value * 2
+
+
+def test_job_statuses_and_durations():
+    queue = JobQueue(workers_count=1, size=10)
+    gate = Gate()
+    running = queue.submit(gate, 21)
+    queued = queue.submit(gate, None)
+    gate.started.wait(5)
+
+    assert running.status == Job.RUNNING
+    assert queued.status == Job.QUEUED and queued.running_time is None
+    first_wait = queued.queued_time
+    time.sleep(0.02)
+    assert queued.queued_time > first_wait
+
+    gate.opened.set()
+    wait_for(lambda: queued.is_finished)
+    assert (running.status, running.result, running.error) == \
+        (Job.DONE, 42, None)
+    assert queued.status == Job.FAILED
+    assert queued.error == repr(ValueError('no value'))
+
+    # У завершённой задачи длительности больше не растут
+    durations = queued.as_dict()
+    time.sleep(0.02)
+    assert queued.as_dict() == durations
+    assert durations['queued_time'] >= running.running_time > 0
+    assert queue.get(running.id) is running
+    statistics = queue.get_statistics()
+    assert (statistics['done'], statistics['failed']) == (1, 1)
+
+
+def test_submit_raises_full():
+    queue = JobQueue(workers_count=1, size=1)
+    gate = Gate()
+    queue.submit(gate, 1)
+    gate.started.wait(5)
+    queue.submit(gate, 2)
+    with pytest.raises(Full):
+        queue.submit(gate, 3)
+    assert queue.get_statistics()['queue_size'] == 1
+    gate.opened.set()
+
+
+def test_finished_jobs_are_evicted():
+    queue = JobQueue(workers_count=1, size=10, finished_size=2)
+    jobs = [queue.submit(abs, -index) for index in range(4)]
+    wait_for(lambda: all(job.is_finished for job in jobs))
+    wait_for(lambda: len(queue.finished) == 2)
+    assert [queue.get(job.id) for job in jobs] == [None, None] + jobs[2:]
+    assert [job.result for job in jobs[2:]] == [2, 3]
+
+
+def test_submit_job_answers_503_when_queue_is_full(monkeypatch):
+    queue = JobQueue(workers_count=1, size=1)
+    gate = Gate()
+    queue.submit(gate, 1)
+    gate.started.wait(5)
+    queue.submit(gate, 2)
+    monkeypatch.setattr(server, 'jobs', queue)
+    monkeypatch.setattr(server, 'get_parameters', lambda names, required: {
+        'item_name_id': '1', 'market_hash_name': 'item',
+    })
+    monkeypatch.setattr(server, 'response', lambda code, data=None, **kwargs: (
+        code, data, kwargs
+    ))
+
+    view = server.AnalyzerAPIViewSet()
+    assert view.submit_job() == (503, None, {'error': 'Job queue is full'})
+    gate.opened.set()
+    wait_for(lambda: queue.get_statistics()['queue_size'] == 0)
+    code, data, kwargs = view.submit_job()
+    assert code == 202 and queue.get(data['id']) is not None
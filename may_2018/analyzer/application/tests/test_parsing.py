@@ -0,0 +1,25 @@
+import numpy
+import pytest
+
+from parsing import parse_price_history
+from benchmark import generate_response_text, parse_response_with_eval
+
+
+@pytest.mark.parametrize('size', [1, 24, 5000])
+def test_parse_matches_eval(size):
+    response_text = generate_response_text(size)
+    expected = parse_response_with_eval(response_text)
+    dates, prices, counts = parse_price_history(response_text)
+    assert numpy.array_equal(dates, expected['date'])
+    assert numpy.array_equal(prices, expected['price'])
+    assert numpy.array_equal(counts, expected['count'])
+
+
+def test_parse_since_returns_tail():
+    response_text = generate_response_text(100)
+    dates, prices, counts = parse_price_history(response_text)
+    since = int(dates[90])
+    tail = parse_price_history(response_text, since)
+    assert numpy.array_equal(tail[0], dates[90:])
+    assert numpy.array_equal(tail[1], prices[90:])
+    assert numpy.array_equal(tail[2], counts[90:])
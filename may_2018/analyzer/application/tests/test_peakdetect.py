@@ -0,0 +1,20 @@
+import numpy
+import pytest
+
+from external.peakdetect import peakdetect
+from benchmark import generate_prices, peakdetect_with_loop
+
+
+# lookahead=2, delta=2 как в BaseGraph.analyze_extremas
+PARAMETERS = [(2, 2), (2, 0), (5, 0.05), (20, 0.1), (200, 0)]
+
+
+@pytest.mark.parametrize('size', [10, 1000, 10000])
+@pytest.mark.parametrize('lookahead, delta', PARAMETERS)
+@pytest.mark.parametrize('gaps', [False, True])
+def test_peakdetect_matches_loop(size, lookahead, delta, gaps):
+    y = generate_prices(size) * 10
+    if gaps:
+        y[::97] = numpy.nan
+    expected = peakdetect_with_loop(y, lookahead, delta)
+    assert peakdetect(y, lookahead=lookahead, delta=delta) == expected
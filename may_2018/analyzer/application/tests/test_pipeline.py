@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import numpy
+import pandas
+import pytest
+
+from history import PIPELINES
+from benchmark import generate_history, analyze_with_calls
+from checks import assert_same_statistics
+
+
+@pytest.mark.parametrize('size', [10, 1000, 5000])
+def test_pipeline_matches_calls(size):
+    dates, prices = generate_history(size)
+    prices[::97] = numpy.nan
+    index = [datetime.fromtimestamp(date) for date in dates]
+    frame = pandas.DataFrame({'price': prices}, index=index)
+
+    indicators = PIPELINES['month'].indicators
+    expected_frame, expected = analyze_with_calls(frame.copy(), indicators)
+    result_frame, result = PIPELINES['month'].run(frame.copy())
+    for column in expected_frame:
+        assert numpy.allclose(
+            result_frame[column], expected_frame[column],
+            rtol=1e-6, atol=1e-9, equal_nan=True
+        ), column
+    assert_same_statistics({'month': result}, {'month': expected})
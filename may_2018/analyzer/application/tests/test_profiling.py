@@ -0,0 +1,33 @@
+import pytest
+
+from profiling import profiler
+from history import History
+from benchmark import generate_response_text
+
+
+@pytest.fixture
+def enabled_profiler():
+    stages = profiler.stages
+    profiler.stages = {}
+    yield profiler
+    profiler.disable()
+    profiler.stages = stages
+
+
+@pytest.mark.parametrize('trace_memory', [False, True])
+def test_profiler_records_analysis_stages(enabled_profiler, trace_memory):
+    enabled_profiler.enable(trace_memory=trace_memory)
+    history = History(730, 'item', generate_response_text(500))
+    history.analyze()
+
+    statistics = enabled_profiler.get_statistics()
+    assert statistics['memory'] is trace_memory
+    stage = statistics['stages']['History.analyze_month_frame']
+    assert stage['count'] == 1
+    assert ('memory_delta' in stage) is trace_memory
+
+
+def test_disabled_profiler_records_nothing(enabled_profiler):
+    history = History(730, 'item', generate_response_text(500))
+    history.analyze()
+    assert enabled_profiler.get_statistics()['stages'] == {}
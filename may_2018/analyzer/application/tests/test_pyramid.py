@@ -0,0 +1,32 @@
+import numpy
+import pytest
+
+from pyramid import Pyramid
+from benchmark import generate_sales, resample_with_pandas, replay_pyramid
+
+
+@pytest.mark.parametrize('size', [10, 1000, 5000])
+def test_pyramid_matches_pandas_after_updates(size):
+    frame, walls, prices, counts = generate_sales(size)
+    updates_count = min(24, len(walls) - 1)
+    known = len(walls) - updates_count
+    pyramid = Pyramid()
+    pyramid.extend(walls[:known], prices[:known], counts[:known])
+    replay_pyramid(pyramid, walls, prices, counts, updates_count)
+
+    for interval in ('1h', '4h', '1D', '7D'):
+        expected = resample_with_pandas(frame, interval)
+        means = frame.resample(interval).mean()
+        result = pyramid.get_frame(interval)
+        assert result.index.equals(expected.index), interval
+        for column in ('open', 'high', 'low', 'close', 'vwap'):
+            assert numpy.allclose(
+                result[column], expected[column],
+                rtol=1e-12, atol=0, equal_nan=True
+            ), (interval, column)
+        assert numpy.array_equal(result['volume'], expected['count'])
+        for column in ('price', 'count'):
+            assert numpy.allclose(
+                result[column], means[column],
+                rtol=1e-12, atol=0, equal_nan=True
+            ), (interval, column)
@@ -0,0 +1,18 @@
+import numpy
+import pytest
+
+from benchmark import generate_sales, resample_with_pandas, resample_with_numpy
+
+
+@pytest.mark.parametrize('size', [10, 1000, 5000])
+@pytest.mark.parametrize('interval', ['1h', '4h', '1D', '7D'])
+def test_resampler_matches_pandas(size, interval):
+    frame, walls, prices, counts = generate_sales(size)
+    expected = resample_with_pandas(frame, interval)
+    index, result = resample_with_numpy(walls, prices, counts, interval)
+    assert index.equals(expected.index)
+    for column in expected:
+        assert numpy.allclose(
+            result[column], expected[column],
+            rtol=1e-12, atol=0, equal_nan=True
+        ), column
@@ -0,0 +1,124 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import server
+from cache import LRUCache, ResultCache
+from scheduling import RequestScheduler, RATES
+from benchmark import generate_steam_history, format_response_text
+
+
+SIZES = [5, 60, 700, 1500, 3000]
+
+
+class Page:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeSteamAPI:
+    """Страницы истории из памяти вместо Steam."""
+
+    market = {'app_id': 730}
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get_price_history(self, market_hash_name):
+        self.calls.append(market_hash_name)
+        return Page(self.pages[market_hash_name])
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    pages = {
+        f'item {index}': format_response_text(
+            generate_steam_history(size, seed=index)
+        )
+        for index, size in enumerate(SIZES)
+    }
+    api = FakeSteamAPI(pages)
+    rates = {endpoint: (1000.0, 1000) for endpoint in RATES}
+    monkeypatch.setattr(server, 'api', api)
+    monkeypatch.setattr(server, 'results', ResultCache())
+    monkeypatch.setattr(server, 'histories', LRUCache())
+    monkeypatch.setattr(server, 'scheduler', RequestScheduler(rates))
+    monkeypatch.setattr(server, 'BATCH_SIZE', 2)
+
+    # Пачки анализируются в потоках: так видно, какие пачки ушли
+    api.chunks = []
+    analyze_chunk = server.analyze_chunk
+
+    def record_chunk(app_id, market_hash_names, datas):
+        api.chunks.append(market_hash_names)
+        return analyze_chunk(app_id, market_hash_names, datas)
+
+    monkeypatch.setattr(server, 'analyze_chunk', record_chunk)
+    analyzers = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(server, 'analyzers', analyzers)
+    yield api
+    analyzers.shutdown()
+
+
+def get_items(api):
+    return [(index, name) for index, name in enumerate(api.pages)]
+
+
+def analyze_items(items):
+    lines = list(server.analyze_items(items))
+    assert all(line.endswith('\n') for line in lines)
+    return {
+        data['market_hash_name']: data
+        for data in map(json.loads, lines)
+    }
+
+
+def test_analyze_items_matches_history_analyze(analyzer):
+    items = get_items(analyzer)
+    lines = analyze_items(items)
+
+    assert sorted(lines) == sorted(analyzer.pages)
+    assert all(len(chunk) <= 2 for chunk in analyzer.chunks)
+    assert sorted(sum(analyzer.chunks, [])) == sorted(analyzer.pages)
+    for item_name_id, market_hash_name in items:
+        data = lines[market_hash_name]
+        assert data['item_name_id'] == item_name_id
+        expected = server.analyze_response(
+            730, market_hash_name, analyzer.pages[market_hash_name]
+        )
+        for field, value in expected.items():
+            assert data[field] == pytest.approx(value, rel=1e-9), field
+
+
+def test_analyze_items_uses_cached_results(analyzer):
+    items = get_items(analyzer)
+    first = analyze_items(items)
+    calls_count = len(analyzer.calls)
+    chunks_count = len(analyzer.chunks)
+
+    assert analyze_items(items) == first
+    assert len(analyzer.calls) == calls_count
+    assert len(analyzer.chunks) == chunks_count
+
+
+def test_analyze_items_reports_errors_per_item(analyzer):
+    items = get_items(analyzer) + [(99, 'missing')]
+    lines = analyze_items(items)
+    assert 'KeyError' in lines['missing']['error']
+    assert all('error' not in lines[name] for name in analyzer.pages)
+
+
+def test_analyze_items_streams_rejected_fetches(analyzer, monkeypatch):
+    # Одна загрузка сразу, остальным токена не дождаться за FETCH_TIMEOUT
+    scheduler = RequestScheduler({'listings': (0.001, 1)}, (1000.0, 1000))
+    monkeypatch.setattr(server, 'scheduler', scheduler)
+    monkeypatch.setattr(server, 'FETCH_TIMEOUT', 0.05)
+
+    lines = analyze_items(get_items(analyzer))
+    assert len(lines) == len(SIZES)
+    errors = [data['error'] for data in lines.values() if 'error' in data]
+    assert len(errors) == len(SIZES) - 1
+    assert all(error.startswith('RequestRejected') for error in errors)
+    assert scheduler.get_statistics()['endpoints']['listings']['rejected'] == 4
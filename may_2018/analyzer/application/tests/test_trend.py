@@ -0,0 +1,23 @@
+import numpy
+import pytest
+
+from trend import get_trend
+from benchmark import generate_prices, get_trend_with_quad
+
+
+@pytest.mark.parametrize('size', [3, 50, 2000])
+def test_trend_matches_quad(size):
+    y = generate_prices(size)
+    expected = get_trend_with_quad(y)
+    result = get_trend(y)
+    for key in ('dfdx', 'dfdx_pos', 'dfdx_neg'):
+        assert numpy.allclose(
+            result[key], expected[key], rtol=1e-6, atol=1e-9
+        ), key
+    # Интегралы кусочно-линейной функции точно равны сумме трапеций;
+    # quad на длинных рядах упирается в лимит разбиений и ошибается
+    for key, part in (('s_dfdx_pos', 'dfdx_pos'), ('s_dfdx_neg', 'dfdx_neg')):
+        integral = (expected[part][1:] + expected[part][:-1]).sum() / 2
+        assert result[key] == pytest.approx(integral, rel=1e-6, abs=1e-9)
+        if size <= 50:
+            assert result[key] == pytest.approx(expected[key], rel=1e-3)
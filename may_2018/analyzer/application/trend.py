@@ -0,0 +1,46 @@
+import numpy
+
+
+def get_derivative(y):
+    """
+    Вернуть производную кусочно-линейной интерполяции y в точках 0..n-1.
+    В узле это среднее наклонов соседних отрезков, на краях
+    повторяются значения соседей. NaN распространяется так же,
+    как через interp1d.
+    """
+    y = numpy.asarray(y, dtype=numpy.float64)
+    dfdx = numpy.full(len(y), numpy.nan)
+    if len(y) > 2:
+        slopes = numpy.diff(y)
+        dfdx[1:-1] = (slopes[1:] + slopes[:-1]) / 2
+        dfdx[0] = dfdx[1]
+        dfdx[-1] = dfdx[-2]
+    return dfdx
+
+
+def split_derivative(dfdx):
+    """Разделить производную на положительную и отрицательную части."""
+    with numpy.errstate(invalid='ignore'):
+        dfdx_pos = numpy.where(dfdx > 0, dfdx, 0.0)
+        dfdx_neg = numpy.where(dfdx < 0, -dfdx, 0.0)
+    return dfdx_pos, dfdx_neg
+
+
+def integrate(y):
+    """Точный интеграл кусочно-линейной интерполяции y по [0, n-1]."""
+    if len(y) < 2:
+        return 0.0
+    return float(y.sum() - (y[0] + y[-1]) / 2)
+
+
+def get_trend(y):
+    dfdx = get_derivative(y)
+    dfdx_pos, dfdx_neg = split_derivative(dfdx)
+    result = {
+        'dfdx': dfdx,
+        'dfdx_pos': dfdx_pos,
+        'dfdx_neg': dfdx_neg,
+        's_dfdx_pos': integrate(dfdx_pos),
+        's_dfdx_neg': integrate(dfdx_neg),
+    }
+    return result
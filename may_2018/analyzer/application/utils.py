@@ -1,4 +1,20 @@
+from datetime import datetime
+
+import pandas
+
+
+DAY = 24 * 60 * 60
+
+
 def get_text_between(text, begin, end):
     start = text.index(begin) + len(begin)
     end = text.index(end, start)
     return text[start:end]
+
+
+def get_seconds(interval):
+    return int(pandas.Timedelta(interval).total_seconds())
+
+
+def get_wall_seconds(moment):
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
@@ -0,0 +1,161 @@
+from collections import deque
+
+
+class RollingMoments:
+    """
+    Среднее и дисперсия по окну (t - interval, t] без пересчёта окна:
+    алгоритм Уэлфорда с удалением ушедших из окна тиков.
+    Тики должны приходить в порядке времени.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval.total_seconds()
+        self.ticks = deque()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.squares = 0.0
+
+    def add(self, moment, value):
+        self.ticks.append((moment, value))
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (value - self.mean)
+
+        border = moment - self.interval
+        while self.ticks[0][0] <= border:
+            self.remove(self.ticks.popleft()[1])
+
+    def remove(self, value):
+        self.count -= 1
+        if not self.count:
+            # Пустое окно: сбрасываем накопленную погрешность
+            self.reset()
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.squares = max(self.squares - delta * (value - self.mean), 0.0)
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return None
+        return self.squares / (self.count - 1)
+
+    @property
+    def deviation(self):
+        variance = self.variance
+        return None if variance is None else variance ** 0.5
+
+
+class RollingExtremum:
+    """
+    Минимум или максимум по окну (t - interval, t] на монотонной очереди:
+    каждый тик добавляется и удаляется не больше одного раза.
+    """
+
+    def __init__(self, interval, comparator):
+        self.interval = interval.total_seconds()
+        self.comparator = comparator
+        self.ticks = deque()
+
+    def add(self, moment, value):
+        # Тики, которые уже не станут экстремумом, больше не нужны
+        while self.ticks and not self.comparator(self.ticks[-1][1], value):
+            self.ticks.pop()
+        self.ticks.append((moment, value))
+
+        border = moment - self.interval
+        while self.ticks[0][0] <= border:
+            self.ticks.popleft()
+
+    @property
+    def value(self):
+        return self.ticks[0][1] if self.ticks else None
+
+
+class RollingMinimum(RollingExtremum):
+
+    def __init__(self, interval):
+        super().__init__(interval, lambda left, right: left < right)
+
+
+class RollingMaximum(RollingExtremum):
+
+    def __init__(self, interval):
+        super().__init__(interval, lambda left, right: left > right)
+
+
+class ExtremaDetector:
+    """
+    Локальные минимумы и максимумы, как argrelextrema(order=order,
+    mode='clip'): точка строго меньше (больше) order соседей с каждой
+    стороны. Точка подтверждается, когда после неё пришло order тиков.
+    """
+
+    def __init__(self, order=3):
+        self.order = order
+        self.ticks = deque(maxlen=2 * order + 1)
+        self.count = 0
+
+    def add(self, moment, value):
+        """Учесть тик и вернуть подтверждённые события."""
+        self.ticks.append((moment, value))
+        self.count += 1
+        # У первой точки слева нет соседей: clip сравнивает её с собой
+        if self.count <= self.order + 1:
+            return []
+
+        center = len(self.ticks) - 1 - self.order
+        moment, value = self.ticks[center]
+        others = [
+            other for index, (_, other) in enumerate(self.ticks)
+            if index != center
+        ]
+        if all(value < other for other in others):
+            return [('minima', moment, value)]
+        if all(value > other for other in others):
+            return [('maxima', moment, value)]
+        return []
+
+
+class Indicators:
+    """Скользящие показатели и экстремумы одной цены за окно interval."""
+
+    def __init__(self, interval, order=3):
+        self.moments = RollingMoments(interval)
+        self.minimum = RollingMinimum(interval)
+        self.maximum = RollingMaximum(interval)
+        self.extremas = ExtremaDetector(order)
+        self.last_extremas = {'minima': None, 'maxima': None}
+
+    def add(self, moment, value):
+        """
+        Учесть тик: moment — datetime, value — цена или None.
+        Вернуть подтверждённые этим тиком экстремумы.
+        """
+        if value is None:
+            return []
+        events = self.extremas.add(moment, value)
+        for kind, extrema_moment, extrema_value in events:
+            self.last_extremas[kind] = (extrema_moment, extrema_value)
+
+        moment = moment.timestamp()
+        for accumulator in (self.moments, self.minimum, self.maximum):
+            accumulator.add(moment, value)
+        return events
+
+    def as_dict(self):
+        result = {
+            'count': self.moments.count,
+            'mean': self.moments.mean if self.moments.count else None,
+            'deviation': self.moments.deviation,
+            'minimum': self.minimum.value,
+            'maximum': self.maximum.value,
+            'last_minima': self.last_extremas['minima'],
+            'last_maxima': self.last_extremas['maxima'],
+        }
+        return result
@@ -1,11 +1,15 @@
-from time import sleep
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 import requests
 from flask_rest.database import orm
 
 from steamapi.constants import SteamMarketConstants
 
+from indicators import Indicators
+from scheduling import PRIORITY_DEFAULT, scheduler, get_endpoint
+from coalescing import flights
+
 
 class Screen(orm.Model):
     __tablename__ = 'screens'
@@ -30,6 +34,12 @@ class Screen(orm.Model):
         'buy_price', 'sell_price'
     )
 
+    # Не чаще одного запроса стакана за столько секунд на экран
+    poll_interval = 5
+
+    indicators_interval = timedelta(hours=1)
+    indicators_fields = ('highest_buy_order', 'lowest_sell_order')
+
     def __init__(self, item_name_id, market_hash_name,
                  buy_price=None, sell_price=None,
                  country=None, language=None, currency=None):
@@ -42,6 +52,15 @@ class Screen(orm.Model):
 
         self.buy_price = buy_price
         self.sell_price = sell_price
+        self.init_indicators()
+
+    @orm.reconstructor
+    def init_indicators(self):
+        # Экран из базы создаётся без __init__
+        self.indicators = {
+            field: Indicators(self.indicators_interval)
+            for field in self.indicators_fields
+        }
 
     def as_dict(self):
         result = {
@@ -59,6 +78,14 @@ class Screen(orm.Model):
             'item_nameid': self.item_name_id,
             'two_factor': 0,
         }
+        # Экраны одного предмета, спросившие одновременно, ждут один ответ
+        key = (url, tuple(sorted(payload.items())))
+        return flights.do(key, self.fetch, url, payload)
+
+    @staticmethod
+    def fetch(url, payload):
+        # Потоки экранов делят лимиты Steam через общий планировщик
+        scheduler.acquire(get_endpoint('get', url), PRIORITY_DEFAULT)
         response = requests.get(url, payload)
         return response
 
@@ -101,13 +128,31 @@ class Screen(orm.Model):
         }
         print(payload)
 
+    def update_indicators(self, moment, price):
+        events = {}
+        for field in self.indicators_fields:
+            events[field] = self.indicators[field].add(moment, price[field])
+        return events
+
+    def get_indicators(self):
+        return {
+            field: indicators.as_dict()
+            for field, indicators in self.indicators.items()
+        }
+
     def run(self):
         while True:
+            started_at = time.monotonic()
             response = self.get_response()
             price = self.parse_price(response.json())
 
             now = datetime.now()
-            print(f'Date: {now}. Price: {price}')
+            events = self.update_indicators(now, price)
+            print(f'Date: {now}. Price: {price}. '
+                  f'Indicators: {self.get_indicators()}')
+            for field, extremas in events.items():
+                for kind, moment, value in extremas:
+                    print(f'Extrema: {field} {kind} {value} at {moment}')
 
             if self.buy_price:
                 self.buy_if_profitable(price)
@@ -115,4 +160,5 @@ class Screen(orm.Model):
             if self.sell_price:
                 self.sell_if_profitable(price)
 
-            sleep(5)
+            elapsed = time.monotonic() - started_at
+            time.sleep(max(self.poll_interval - elapsed, 0))
@@ -9,6 +9,8 @@ from flask_rest.exceptions import APIError
 from flask_rest.application import initialize
 
 from screen import Screen
+from scheduling import scheduler
+from coalescing import flights
 
 
 screens = {}
@@ -28,7 +30,7 @@ class ScreenAPIViewSet(BaseAPIViewSet):
         orm.session.commit()
 
         thread = Thread(target=instance.run)
-        screens[instance.id] = thread
+        screens[instance.id] = instance, thread
         thread.start()
 
         data = instance.as_dict()
@@ -38,7 +40,7 @@ class ScreenAPIViewSet(BaseAPIViewSet):
     def delete(self, index):
         instance = self.model.query.get(index)
         if instance:
-            thread = screens.pop(instance.id)
+            screen, thread = screens.pop(instance.id)
             thread.stop()
             orm.session.delete(instance)
             orm.session.commit()
@@ -54,6 +56,12 @@ class ScreenAPIViewSet(BaseAPIViewSet):
                 'database': queryset.count(),
                 'threads': len(screens),
             },
+            'indicators': {
+                index: screen.get_indicators()
+                for index, (screen, thread) in list(screens.items())
+            },
+            'scheduler': scheduler.get_statistics(),
+            'coalescing': flights.get_statistics(),
         }
         return response(200, data)
 
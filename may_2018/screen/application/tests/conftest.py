@@ -0,0 +1,13 @@
+import os
+import sys
+
+
+# Модули приложения лежат плоско, рядом с папкой tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# scheduling.py и coalescing.py общие с march_2018: в контейнер они
+# монтируются из docker-compose.yml, в тестах берутся оттуда же
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    *[os.pardir] * 4, 'march_2018', 'application', 'steam'
+))
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+
+from indicators import (
+    RollingMoments, RollingMinimum, RollingMaximum, ExtremaDetector
+)
+
+# Образцовые реализации есть только в окружении разработки:
+# в образе сервиса pandas нет
+numpy = pytest.importorskip('numpy')
+pandas = pytest.importorskip('pandas')
+
+
+def generate_ticks(size, seed):
+    """Тики с неравными промежутками, повторами цен и разбросом масштаба."""
+    random = numpy.random.RandomState(seed)
+    moments = numpy.cumsum(random.randint(1, 12, size)).astype(float)
+    values = numpy.round(random.lognormal(0, 1, size) * 100, 2)
+    values[random.rand(size) < 0.2] = values[0]
+    return moments, values
+
+
+def get_rolling(moments, values, interval):
+    index = pandas.to_datetime(moments, unit='s')
+    return pandas.Series(values, index=index) \
+        .rolling(f'{int(interval.total_seconds())}s')
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('seconds', [1, 30, 600])
+def test_rolling_accumulators_match_pandas(seed, seconds):
+    interval = timedelta(seconds=seconds)
+    moments, values = generate_ticks(2000, seed)
+    rolling = get_rolling(moments, values, interval)
+    expected = {
+        'mean': rolling.mean(), 'variance': rolling.var(),
+        'minimum': rolling.min(), 'maximum': rolling.max(),
+    }
+
+    rolling_moments = RollingMoments(interval)
+    minimum = RollingMinimum(interval)
+    maximum = RollingMaximum(interval)
+    result = {name: [] for name in expected}
+    for moment, value in zip(moments.tolist(), values.tolist()):
+        for accumulator in (rolling_moments, minimum, maximum):
+            accumulator.add(moment, value)
+        result['mean'].append(rolling_moments.mean)
+        variance = rolling_moments.variance
+        result['variance'].append(numpy.nan if variance is None else variance)
+        result['minimum'].append(minimum.value)
+        result['maximum'].append(maximum.value)
+
+    # Удаление из окна оставляет погрешность порядка eps * цена ** 2:
+    # у окна из равных цен дисперсия не ровно ноль
+    scale = values.max() ** 2 * 1e-12
+    for name, series in expected.items():
+        assert numpy.allclose(
+            result[name], series.values, rtol=1e-9,
+            atol=scale if name == 'variance' else 1e-9, equal_nan=True
+        ), name
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('order', [1, 3, 5])
+def test_extrema_detector_matches_argrelextrema(seed, order):
+    signal = pytest.importorskip('scipy.signal')
+    values = generate_ticks(1000, seed)[1]
+    detector = ExtremaDetector(order)
+    events = {'minima': [], 'maxima': []}
+    for index, value in enumerate(values.tolist()):
+        for kind, moment, extrema_value in detector.add(index, value):
+            assert extrema_value == values[moment]
+            # Точка подтверждается ровно через order тиков
+            assert index - moment == order
+            events[kind].append(moment)
+
+    # Последние order точек ещё не подтверждены
+    confirmed = len(values) - order
+    for kind, comparator in (('minima', numpy.less), ('maxima', numpy.greater)):
+        expected = signal.argrelextrema(
+            values, comparator, order=order, mode='clip'
+        )[0]
+        assert events[kind] == expected[expected < confirmed].tolist()